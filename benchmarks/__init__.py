@@ -0,0 +1,8 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
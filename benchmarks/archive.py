@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import benchmarks.emitter as _bm_emitter
+import benchmarks.shift_loop as _bm_shift_loop
+import xnilang.compiler.archive as _archive
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def check(name, script):
+    """Archive a script, read it back and compare it with the script emitted by Compiler.
+
+    :type name: str
+    :type script: str
+    :param name: The script name.
+    :param script: The script.
+    """
+
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+
+    #  Compile and emit the frames.
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+    expected = evaluator.get_script()
+
+    #  Write the archive.
+    start = time.perf_counter()
+    data = _archive.write_archive(commands)
+    write_time = time.perf_counter() - start
+
+    #  Read the archive (frames only, then back to a script).
+    start = time.perf_counter()
+    reader = _archive.ArchiveReader(data)
+    for _ in reader.iterate_frame():
+        pass
+    read_time = time.perf_counter() - start
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    _archive.emit_canvas(reader, evaluator, "main")
+
+    print("%s: %d frames, archive %d bytes (script %d bytes), write %.1f ms, read %.0f frames/s, identical: %s" % (
+        name,
+        reader.get_frame_count(),
+        len(data),
+        len(expected),
+        write_time * 1000,
+        reader.get_frame_count() / read_time,
+        "yes" if evaluator.get_script() == expected else "NO"))
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([repeat times]).
+    """
+
+    times = int(argv[0]) if len(argv) > 0 else 20000
+    check("Sample x 20", _bm_emitter.build_script(20))
+    check("Loop %d" % times, _bm_shift_loop.build_script(times))
+    check("Float loop %d" % times, _bm_shift_loop.build_script(times).replace(" 0)", " 0.25)"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import shutil
+import sys
+import tempfile
+import time
+import benchmarks.tokenizer as _bench_tokenizer
+import xnilang.parser.cache as _cache
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([copies]).
+    """
+
+    #  Build the input.
+    copies = int(argv[0]) if len(argv) > 0 else 200
+    with open(_bench_tokenizer.SAMPLE_PATH, "r") as fp:
+        script = fp.read() * copies
+
+    directory = tempfile.mkdtemp()
+    try:
+        #  Parse.
+        start = time.perf_counter()
+        commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+        parse_time = time.perf_counter() - start
+
+        #  Store and load.
+        cache = _cache.ASTCache(directory)
+        cache.store(script, commands)
+        start = time.perf_counter()
+        cache.load(script)
+        load_time = time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+    print("Script size: %d bytes" % len(script))
+    print("Tokenizer + Interpreter: %.3f sec" % parse_time)
+    print("AST cache: %.3f sec" % load_time)
+    print("Speed-up: %.1fx" % (parse_time / load_time))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
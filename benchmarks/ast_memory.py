@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import tracemalloc
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def build_drawing(size):
+    """Build a script that defines a large drawing (a grid of shapes).
+
+    :type size: int
+    :param size: The grid size.
+    :rtype : str
+    :return: The script.
+    """
+
+    commands = []
+    for row in range(0, size):
+        commands.append("(define row%d (" % row)
+        for column in range(0, size):
+            x = column * 10
+            commands.append("  (line (%d 0) (%d 10))" % (x, x + 10))
+            commands.append("  (circle (%d 5) 5)" % x)
+            commands.append("  (area path ((%d 0) (%d 0) (%d 10) (0 0)))" % (x, x + 10, x + 10))
+        commands.append("))")
+        commands.append("(place row%d (0 %d))" % (row, row * 10))
+
+    return "\n".join(commands)
+
+
+def measure(script, compact):
+    """Measure the memory held by the AST of a script.
+
+    :type script: str
+    :type compact: bool
+    :param script: The script.
+    :param compact: True if the compact mode is enabled.
+    :rtype : int
+    :return: The memory (in bytes).
+    """
+
+    #  Measure the memory while the AST is alive.
+    tracemalloc.start()
+    try:
+        interpreter = _interpreter.Interpreter(_token.Tokenizer(script), compact)
+        commands = list(interpreter.iterate_command())
+        del interpreter
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    return size
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([size]).
+    """
+
+    #  Build the input.
+    size = int(argv[0]) if len(argv) > 0 else 100
+    script = build_drawing(size)
+
+    #  Measure both modes.
+    plain = measure(script, False)
+    compact = measure(script, True)
+
+    print("Script size: %d bytes" % len(script))
+    print("Plain AST: %d bytes" % plain)
+    print("Compact AST: %d bytes" % compact)
+    print("Reduction: %.2fx" % (plain / compact))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import gzip
+import sys
+import benchmarks.emitter as _bm_emitter
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.compression as _compression
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def _compress_string(evaluator, encoding):
+    """Emit the script as one string and compress it afterwards.
+
+    :type evaluator: _evaluator.AnimationEvaluator
+    :type encoding: str
+    :param evaluator: The animation evaluator.
+    :param encoding: The content encoding.
+    :rtype : int
+    :return: The emitted size.
+    """
+
+    if encoding == _compression.ENCODING_GZIP:
+        return len(gzip.compress(evaluator.get_script().encode("utf-8"), 6))
+
+    compressor = _compression.Compressor(encoding)
+    compressor.write(evaluator.get_script())
+    compressor.finish()
+
+    return len(compressor.take_data())
+
+
+def _compress_incremental(evaluator, encoding):
+    """Compress the script while it's emitted (the compressor is the sink of the script buffer).
+
+    :type evaluator: _evaluator.AnimationEvaluator
+    :type encoding: str
+    :param evaluator: The animation evaluator.
+    :param encoding: The content encoding.
+    :rtype : int
+    :return: The emitted size.
+    """
+
+    compressor = _compression.Compressor(encoding)
+    buffer = _evaluator.ScriptBuffer(compressor)
+    evaluator.write_script(buffer)
+    buffer.flush()
+    compressor.finish()
+
+    return len(compressor.take_data())
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([copies]).
+    """
+
+    copies = int(argv[0]) if len(argv) > 0 else 20
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(_bm_emitter.build_script(copies))).iterate_command())
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+    size = len(evaluator.get_script())
+
+    for encoding in _compression.get_encodings():
+        for name, compress in [("String", _compress_string), ("Incremental", _compress_incremental)]:
+            compressed_size = compress(evaluator, encoding)
+            speed, peak = _bm_emitter.measure(lambda ev: compress(ev, encoding), evaluator)
+            print("%s (%s): %d -> %d bytes (%.2f%%), %.1f MB/s, peak %.1f MB" % (
+                name, encoding, size, compressed_size, 100 * compressed_size / size, speed * size / compressed_size,
+                peak / 1e6))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
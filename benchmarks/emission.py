@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import benchmarks.tokenizer as _bm_tokenizer
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.data as _data
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.compiler.timeline as _timeline
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def _emit_frames(commands):
+    """Compile commands to frames and emit the script.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :param commands: The commands.
+    :rtype : (str, _compiler.CompileStatistics)
+    :return: The script and the compile statistics.
+    """
+
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return evaluator.get_script(), compiler.get_statistics()
+
+
+def _emit_symbolic(commands):
+    """Compile commands symbolically and emit the script.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :param commands: The commands.
+    :rtype : (str, _compiler.CompileStatistics)
+    :return: The script and the compile statistics.
+    """
+
+    evaluator = _evaluator.SymbolicAnimationEvaluator(20, True)
+    compiler = _compiler.SymbolicCompiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return evaluator.get_script("main"), compiler.get_statistics()
+
+
+def _emit_data(commands, encoding):
+    """Compile commands to a timeline and emit the animation data.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :type encoding: str
+    :param commands: The commands.
+    :param encoding: The encoding of the arrays.
+    :rtype : (str, _compiler.CompileStatistics)
+    :return: The script (the data) and the compile statistics.
+    """
+
+    compiler = _timeline.TimelineCompiler()
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return _data.emit_data(compiler.get_timeline(), 20, True).get_script(encoding), compiler.get_statistics()
+
+
+def _emit_data_base64(commands):
+    """Compile commands and emit the animation data (base64 arrays).
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :param commands: The commands.
+    :rtype : (str, _compiler.CompileStatistics)
+    :return: The script (the data) and the compile statistics.
+    """
+
+    return _emit_data(commands, _data.ENCODING_BASE64)
+
+
+def _emit_data_json(commands):
+    """Compile commands and emit the animation data (JSON arrays).
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :param commands: The commands.
+    :rtype : (str, _compiler.CompileStatistics)
+    :return: The script (the data) and the compile statistics.
+    """
+
+    return _emit_data(commands, _data.ENCODING_JSON)
+
+
+def measure(emit, commands, rounds):
+    """Measure the compile-and-emit time and the output size.
+
+    :param emit: The emit function.
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :type rounds: int
+    :param commands: The commands.
+    :param rounds: The rounds.
+    :rtype : (float, int, _compiler.CompileStatistics)
+    :return: The time per round (in seconds), the output size (in characters) and the compile statistics.
+    """
+
+    script = None
+    statistics = None
+    start = time.perf_counter()
+    for _ in range(0, rounds):
+        script, statistics = emit(commands)
+
+    return (time.perf_counter() - start) / rounds, len(script), statistics
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([path [rounds]]).
+    """
+
+    path = argv[0] if len(argv) > 0 else _bm_tokenizer.SAMPLE_PATH
+    rounds = int(argv[1]) if len(argv) > 1 else 5
+    with open(path, "r") as fp:
+        commands = list(_interpreter.Interpreter(_token.Tokenizer(fp.read())).iterate_command())
+
+    for name, emit in [("Frames", _emit_frames), ("Symbolic", _emit_symbolic),
+                       ("Data (base64)", _emit_data_base64), ("Data (JSON)", _emit_data_json)]:
+        elapsed, size, statistics = measure(emit, commands, rounds)
+        print("%s: %.2f ms, %d bytes, %d frames (%d reused)" % (
+            name, elapsed * 1000, size, statistics.get_frame_count(), statistics.get_reused_frame_count()))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
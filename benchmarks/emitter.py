@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import os
+import sys
+import time
+import tracemalloc
+import benchmarks.tokenizer as _bm_tokenizer
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def build_script(copies):
+    """Build a script by repeating the sample script (each copy places its objects at other positions, so its
+    frames are not reused).
+
+    :type copies: int
+    :param copies: The count of copies.
+    :rtype : str
+    :return: The script.
+    """
+
+    with open(_bm_tokenizer.SAMPLE_PATH, "r") as fp:
+        sample = fp.read()
+
+    return "\n".join([sample.replace("(place road (0 65))", "(place road (%d 65))" % copy_id)
+                      .replace("(place player (20 23))", "(place player (%d 23))" % (20 + copy_id))
+                      for copy_id in range(0, copies)])
+
+
+def _emit_string(evaluator):
+    """Emit the script as one string and wrap it in a page.
+
+    :type evaluator: _evaluator.AnimationEvaluator
+    :param evaluator: The animation evaluator.
+    :rtype : int
+    :return: The emitted size.
+    """
+
+    page = "<script>\n" + evaluator.get_script() + "\n</script>\n"
+
+    return len(page)
+
+
+def _emit_buffer(evaluator):
+    """Emit the script (and the page) to a script buffer.
+
+    :type evaluator: _evaluator.AnimationEvaluator
+    :param evaluator: The animation evaluator.
+    :rtype : int
+    :return: The emitted size.
+    """
+
+    buffer = _evaluator.ScriptBuffer()
+    buffer.write("<script>\n")
+    evaluator.write_script(buffer)
+    buffer.write("\n</script>\n")
+
+    return len(buffer.get_script())
+
+
+def _emit_sink(evaluator):
+    """Emit the script (and the page) to a file.
+
+    :type evaluator: _evaluator.AnimationEvaluator
+    :param evaluator: The animation evaluator.
+    :rtype : int
+    :return: The emitted size.
+    """
+
+    with open(os.devnull, "w") as fp:
+        buffer = _evaluator.ScriptBuffer(fp)
+        buffer.write("<script>\n")
+        evaluator.write_script(buffer)
+        buffer.write("\n</script>\n")
+        buffer.flush()
+
+    return buffer.get_size()
+
+
+def measure(emit, evaluator):
+    """Measure the emission speed and the peak memory of the emission.
+
+    :type evaluator: _evaluator.AnimationEvaluator
+    :param emit: The emit function.
+    :param evaluator: The animation evaluator (with compiled frames).
+    :rtype : (float, int)
+    :return: The speed (in MB/s) and the peak memory (in bytes, above the memory before the emission).
+    """
+
+    #  Take the best of three rounds.
+    size = 0
+    elapsed = None
+    for _ in range(0, 3):
+        start = time.perf_counter()
+        size = emit(evaluator)
+        round_time = time.perf_counter() - start
+        if elapsed is None or round_time < elapsed:
+            elapsed = round_time
+
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    emit(evaluator)
+    peak = tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+
+    return size / elapsed / 1e6, peak
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([copies]).
+    """
+
+    copies = int(argv[0]) if len(argv) > 0 else 100
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(build_script(copies))).iterate_command())
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    for name, emit in [("String", _emit_string), ("Buffer", _emit_buffer), ("Sink", _emit_sink)]:
+        speed, peak = measure(emit, evaluator)
+        print("%s: %.1f MB/s, peak %.1f MB" % (name, speed, peak / 1e6))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
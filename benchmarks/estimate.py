@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import glob
+import os
+import sys
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "xnilang.settings")
+
+import benchmarks.shift_loop as _bm_shift_loop
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.error as _cp_error
+import xnilang.compiler.estimate as _estimate
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.compiler.timeline as _timeline
+import xnilang.parser.error as _ps_error
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+import xnilang.request as _request
+
+#  The root directory of the repository.
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _compile_actual(commands):
+    """Compile commands and get the actual cost.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :param commands: The commands.
+    :rtype : (int, int, int, float)
+    :return: The frame count, the draw call count, the emitted size and the compile time (in seconds).
+    """
+
+    #  Compile and emit the frames.
+    start = time.perf_counter()
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+    size = len(evaluator.get_script())
+    elapsed = time.perf_counter() - start
+
+    #  Count the draw calls of each row of the timeline.
+    tl_compiler = _timeline.TimelineCompiler()
+    for cmd in commands:
+        tl_compiler.compile_command(cmd)
+    timeline = tl_compiler.get_timeline()
+    draw_calls = sum([timeline.get_draw_list(template_idx).get_command_count()
+                      for template_idx in timeline.get_templates().tolist()])
+
+    return compiler.get_statistics().get_frame_count(), draw_calls, size, elapsed
+
+
+def _format_ratio(estimated, actual):
+    """Format an estimated value and its ratio to the actual value.
+
+    :type estimated: int
+    :type actual: int
+    :param estimated: The estimated value.
+    :param actual: The actual value.
+    :rtype : str
+    :return: The formatted text.
+    """
+
+    if actual == 0:
+        return "%d/%d" % (estimated, actual)
+
+    return "%d/%d (x%.2f)" % (estimated, actual, estimated / actual)
+
+
+def check(name, script):
+    """Compare the estimated cost of a script with the cost of compiling it and print the result.
+
+    :type name: str
+    :type script: str
+    :param name: The script name.
+    :param script: The script.
+    """
+
+    try:
+        commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+    except _ps_error.ParserError as err:
+        print("%s: parser error (%s)" % (name, str(err)))
+        return
+
+    start = time.perf_counter()
+    estimator = _estimate.estimate_cost(commands)
+    estimate_time = time.perf_counter() - start
+
+    try:
+        frames, draw_calls, size, compile_time = _compile_actual(commands)
+    except _cp_error.CompilationError as err:
+        print("%s: %d frames estimated, compilation error (%s)" % (name, estimator.get_frame_count(), str(err)))
+        return
+
+    print("%s: frames %s, draw calls %s, bytes %s, estimate %.3f ms, compile %.3f ms" % (
+        name,
+        _format_ratio(estimator.get_frame_count(), frames),
+        _format_ratio(estimator.get_draw_call_count(), draw_calls),
+        _format_ratio(estimator.get_output_bytes(), size),
+        estimate_time * 1000,
+        compile_time * 1000))
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([path ...]; the tests and the regressions by default).
+    """
+
+    paths = argv
+    if len(paths) == 0:
+        paths = sorted(glob.glob(os.path.join(_ROOT_DIR, "tests", "*.txt"))) + \
+            sorted(glob.glob(os.path.join(_ROOT_DIR, "regressions", "*.in")))
+
+    for path in paths:
+        #  Drop the mode directive of the regression cases.
+        with open(path, "r") as fp:
+            check(os.path.relpath(path, _ROOT_DIR), _request._split_mode_directive(fp.read())[1])
+    check("loop 10000", _bm_shift_loop.build_script(10000))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import glob
+import os
+import sys
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "xnilang.settings")
+
+import benchmarks.shift_loop as _bm_shift_loop
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.error as _cp_error
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.parser.error as _ps_error
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+import xnilang.request as _request
+
+#  The root directory of the repository.
+_ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _emit_size(commands, evaluator):
+    """Compile commands and get the emitted size.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :type evaluator: _evaluator.AnimationEvaluator
+    :param commands: The commands.
+    :param evaluator: The animation evaluator.
+    :rtype : int
+    :return: The size.
+    """
+
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return len(evaluator.get_script())
+
+
+def check(name, script, decimals):
+    """Compare the size of the minified script of a script with the size of the normal script and print the
+    result.
+
+    :type name: str
+    :type script: str
+    :type decimals: int
+    :param name: The script name.
+    :param script: The script.
+    :param decimals: The count of decimals of coordinates.
+    :rtype : (int, int)
+    :return: The normal size and the minified size (both zero if the script can't be compiled).
+    """
+
+    try:
+        commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+        size = _emit_size(commands, _evaluator.AnimationEvaluator(20, True))
+        min_size = _emit_size(commands, _evaluator.MinAnimationEvaluator(20, True, "main", decimals))
+    except (_ps_error.ParserError, _cp_error.CompilationError) as err:
+        print("%s: error (%s)" % (name, str(err)))
+        return 0, 0
+
+    print("%s: %d -> %d bytes (-%.1f%%)" % (name, size, min_size, 100 - 100 * min_size / max(size, 1)))
+
+    return size, min_size
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([decimals [path ...]]; 2 decimals, the tests and the regressions by default).
+    """
+
+    decimals = int(argv[0]) if len(argv) > 0 else 2
+    paths = argv[1:]
+    if len(paths) == 0:
+        paths = sorted(glob.glob(os.path.join(_ROOT_DIR, "tests", "*.txt"))) + \
+            sorted(glob.glob(os.path.join(_ROOT_DIR, "regressions", "*.in")))
+
+    total_size = 0
+    total_min_size = 0
+    for path in paths:
+        #  Drop the mode directive of the regression cases.
+        with open(path, "r") as fp:
+            size, min_size = check(os.path.relpath(path, _ROOT_DIR), _request._split_mode_directive(fp.read())[1],
+                                   decimals)
+        total_size += size
+        total_min_size += min_size
+    print("Total: %d -> %d bytes (-%.1f%%)" % (
+        total_size, total_min_size, 100 - 100 * total_min_size / max(total_size, 1)))
+    check("loop 10000", _bm_shift_loop.build_script(10000), decimals)
+    check("float loop 10000", _bm_shift_loop.build_script(10000).replace(" 0)", " 0.123456)"), decimals)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
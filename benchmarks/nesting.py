@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def build_script(depth):
+    """Build a script with deeply nested loops.
+
+    :type depth: int
+    :param depth: The nesting depth.
+    :rtype : str
+    :return: The script.
+    """
+
+    return "(define dot ((circle (0 0) 1)))\n" \
+           "(place dot (0 0))\n" + \
+           "(loop 1 (" * depth + "(shift dot right)" + "))" * depth + "\n"
+
+
+def measure(script):
+    """Measure the time of parsing and compiling a script.
+
+    :type script: str
+    :param script: The script.
+    :rtype : (float, float)
+    :return: The parse time and the compile time (in seconds).
+    """
+
+    #  Parse.
+    start = time.perf_counter()
+    interpreter = _interpreter.Interpreter(_token.Tokenizer(script))
+    commands = list(interpreter.iterate_command())
+    parse_time = time.perf_counter() - start
+
+    #  Compile.
+    start = time.perf_counter()
+    compiler = _compiler.Compiler(_evaluator.AnimationEvaluator(20, True), "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+    compile_time = time.perf_counter() - start
+
+    return parse_time, compile_time
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([depth...]).
+    """
+
+    depths = [int(arg) for arg in argv] if len(argv) != 0 else [1000, 10000, 50000]
+    for depth in depths:
+        parse_time, compile_time = measure(build_script(depth))
+        print("Depth %d: parse %.3f sec (%.2f us/level), compile %.3f sec (%.2f us/level)" % (
+            depth, parse_time, parse_time * 1e6 / depth, compile_time, compile_time * 1e6 / depth))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
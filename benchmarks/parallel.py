@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import concurrent.futures
+import os
+import sys
+import time
+import benchmarks.shift_loop as _bm_shift_loop
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.compiler.parallel as _parallel
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def _emit_serial(commands):
+    """Compile commands with Compiler and emit the script.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :param commands: The commands.
+    :rtype : str
+    :return: The script.
+    """
+
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _compiler.Compiler(evaluator, "main")
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return evaluator.get_script()
+
+
+def _emit_parallel(commands, executor):
+    """Compile commands with ParallelCompiler and emit the script.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :type executor: concurrent.futures.Executor
+    :param commands: The commands.
+    :param executor: The executor of the workers.
+    :rtype : str
+    :return: The script.
+    """
+
+    evaluator = _evaluator.AnimationEvaluator(20, True)
+    compiler = _parallel.ParallelCompiler(evaluator, "main", executor)
+    for cmd in commands:
+        compiler.compile_command(cmd)
+    compiler.flush()
+
+    return evaluator.get_script()
+
+
+def build_step_script(times):
+    """Build a script with a long loop that is compiled iteration by iteration (it erases an object).
+
+    :type times: int
+    :param times: The repeat times.
+    :rtype : str
+    :return: The script.
+    """
+
+    return "(define ball ((circle (0 0) 5)))\n" \
+           "(define flag ((line (0 0) (0 10))))\n" \
+           "(place ball (0 0))\n" \
+           "(loop %d ((place flag (3 4)) (shift ball right) (shift ball down) (erase flag)))\n" % times
+
+
+def measure(commands, workers, serial):
+    """Measure the time of compiling commands with ParallelCompiler and print it.
+
+    The processor time of the calling process (the simulation, the merge and the emission of the script) is
+    printed too. It bounds the speedup when there are enough processors for the workers.
+
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :type workers: int
+    :type serial: (float, str)
+    :param commands: The commands.
+    :param workers: The count of worker processes.
+    :param serial: The time (in seconds) and the script of Compiler.
+    """
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        #  Start the workers before measuring.
+        list(executor.map(abs, range(0, workers)))
+
+        start = time.perf_counter()
+        start_cpu = time.process_time()
+        parallel = _emit_parallel(commands, executor)
+        parallel_cpu_time = time.process_time() - start_cpu
+        parallel_time = time.perf_counter() - start
+    print("  Parallel (%d workers): %.1f ms (%.1f ms in this process), speedup %.2fx, identical: %s" % (
+        workers, parallel_time * 1000, parallel_cpu_time * 1000, serial[0] / parallel_time,
+        "yes" if parallel == serial[1] else "NO"))
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([repeat times [worker counts...]]).
+    """
+
+    times = int(argv[0]) if len(argv) > 0 else 20000
+    worker_counts = [int(arg) for arg in argv[1:]] if len(argv) > 1 else [1, 2, 4]
+    print("Processors: %d" % os.cpu_count())
+
+    for name, script in [("Shift loop", _bm_shift_loop.build_script(times)),
+                         ("Step loop", build_step_script(times))]:
+        commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+
+        start = time.perf_counter()
+        serial = _emit_serial(commands)
+        serial_time = time.perf_counter() - start
+        print("%s (%d iterations):" % (name, times))
+        print("  Serial: %.1f ms, %d bytes" % (serial_time * 1000, len(serial)))
+        for workers in worker_counts:
+            measure(commands, workers, (serial_time, serial))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
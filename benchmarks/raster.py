@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import benchmarks.emitter as _bm_emitter
+import benchmarks.shift_loop as _bm_shift_loop
+import xnilang.compiler.raster as _raster
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def check(name, script, width, height):
+    """Render a script to RGBA frames and print the throughput.
+
+    The first pass rasterizes the sprites of the templates, the second pass reuses them.
+
+    :type name: str
+    :type script: str
+    :type width: int
+    :type height: int
+    :param name: The script name.
+    :param script: The script.
+    :param width: The canvas width.
+    :param height: The canvas height.
+    """
+
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+    evaluator = _raster.rasterize(commands, width, height)
+
+    speeds = []
+    for _ in range(0, 2):
+        start = time.perf_counter()
+        for _ in evaluator.iterate_image():
+            pass
+        speeds.append(evaluator.get_frame_count() / (time.perf_counter() - start))
+
+    #  Export the first frames as a sprite sheet.
+    images = []
+    for image in evaluator.iterate_image():
+        images.append(image)
+        if len(images) == 64:
+            break
+    start = time.perf_counter()
+    sheet = _raster.encode_png(_raster.make_sprite_sheet(images))
+    sheet_time = time.perf_counter() - start
+
+    print("%s: %d frames (%dx%d), %.0f frames/s (first pass), %.0f frames/s (sprites reused), "
+          "sheet of %d frames %d bytes in %.1f ms" % (
+              name, evaluator.get_frame_count(), width, height, speeds[0], speeds[1],
+              len(images), len(sheet), sheet_time * 1000))
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([repeat times]).
+    """
+
+    times = int(argv[0]) if len(argv) > 0 else 2000
+    check("Sample x 5", _bm_emitter.build_script(5), 640, 480)
+    check("Loop %d" % times, _bm_shift_loop.build_script(times), 100, 100)
+    check("Float loop %d" % times, _bm_shift_loop.build_script(times).replace(" 0)", " 0.25)"), 100, 100)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import benchmarks.tokenizer as _bench_tokenizer
+import xnilang.parser.incremental as _incremental
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([copies [edits]]).
+    """
+
+    #  Build the input.
+    copies = int(argv[0]) if len(argv) > 0 else 200
+    edits = int(argv[1]) if len(argv) > 1 else 200
+    with open(_bench_tokenizer.SAMPLE_PATH, "r") as fp:
+        script = fp.read() * copies
+
+    #  Parse the whole script.
+    start = time.perf_counter()
+    result = _incremental.parse(script)
+    parse_time = time.perf_counter() - start
+
+    #  Replace one digit in the middle of the script again and again (the result keeps the same commands).
+    offset = script.index("5", len(script) // 2)
+    start = time.perf_counter()
+    for edit_id in range(0, edits):
+        result = _incremental.reparse(result, offset, 1, "5" if edit_id % 2 == 1 else "6")
+    reparse_time = (time.perf_counter() - start) / edits
+
+    #  Check the result against a full parse.
+    expected = _incremental.parse(result.get_script())
+    identical = expected.get_command_count() == result.get_command_count() and \
+        all(expected.get_span(idx) == result.get_span(idx) for idx in range(0, result.get_command_count()))
+
+    print("Script size: %d bytes, %d commands" % (len(script), result.get_command_count()))
+    print("Full parse: %.3f ms" % (parse_time * 1000))
+    print("One-character reparse: %.3f ms (%d edits)" % (reparse_time * 1000, edits))
+    print("Speed-up: %.1fx, identical: %s" % (parse_time / reparse_time, "yes" if identical else "no"))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def build_script(count, moves):
+    """Build a script that places many objects and then moves the bottom ones to the top.
+
+    :type count: int
+    :type moves: int
+    :param count: The object count.
+    :param moves: The count of move commands.
+    :rtype : str
+    :return: The script.
+    """
+
+    script = ""
+    for obj_id in range(0, count):
+        script += "(define obj%d ((circle (0 0) 1)))\n(place obj%d (%d 0))\n" % (obj_id, obj_id, obj_id)
+    for move_id in range(0, moves):
+        script += "(place obj%d (0 %d))\n" % (move_id % count, move_id)
+        script += "(erase obj%d)\n(place obj%d (%d 0))\n" % (move_id % count, move_id % count, move_id)
+
+    return script
+
+
+def measure(script):
+    """Measure the time of compiling a script symbolically.
+
+    :type script: str
+    :param script: The script.
+    :rtype : (float, int)
+    :return: The compile time (in seconds) and the frame count.
+    """
+
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+    compiler = _compiler.SymbolicCompiler(_evaluator.SymbolicAnimationEvaluator(20, True), "main")
+    start = time.perf_counter()
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return time.perf_counter() - start, compiler.get_statistics().get_frame_count()
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([object count...]).
+    """
+
+    counts = [int(arg) for arg in argv] if len(argv) != 0 else [1000, 10000, 50000]
+    for count in counts:
+        elapsed, frames = measure(build_script(count, count))
+        print("%d objects: %.3f sec (%.2f us/frame)" % (count, elapsed, elapsed * 1e6 / frames))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import random
+import sys
+import time
+import benchmarks.shift_loop as _bm_shift_loop
+import benchmarks.tokenizer as _bm_tokenizer
+import xnilang.compiler.seek as _seek
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+def build_erase_loop_script(times):
+    """Build a script with a long loop that can't be skipped in closed form (its body erases an object).
+
+    :type times: int
+    :param times: The repeat times.
+    :rtype : str
+    :return: The script.
+    """
+
+    return "(define ball ((circle (0 0) 5)))\n" \
+           "(define flag ((line (0 0) (0 10))))\n" \
+           "(place ball (0 20))\n" \
+           "(loop %d ((shift ball right) (place flag (3 4)) (erase flag)))\n" % times
+
+
+def measure(script, queries):
+    """Measure the time of building a seek index and querying random frames.
+
+    :type script: str
+    :type queries: int
+    :param script: The script.
+    :param queries: The query count.
+    :rtype : (float, float, int, int)
+    :return: The build time, the time per query (in seconds), the frame count and the checkpoint count.
+    """
+
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+
+    #  Build the index.
+    start = time.perf_counter()
+    index = _seek.SeekIndex(commands)
+    build_time = time.perf_counter() - start
+
+    #  Query random frames.
+    frames = [random.randrange(0, index.get_frame_count()) for _ in range(0, queries)]
+    start = time.perf_counter()
+    for frame in frames:
+        index.get_frame_state(frame)
+    query_time = (time.perf_counter() - start) / queries
+
+    return build_time, query_time, index.get_frame_count(), index.get_checkpoint_count()
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([queries]).
+    """
+
+    queries = int(argv[0]) if len(argv) != 0 else 1000
+    with open(_bm_tokenizer.SAMPLE_PATH, "r") as fp:
+        sample = fp.read()
+
+    for name, script in [("cross-street.txt", sample),
+                         ("cross-street.txt x 20", sample * 20),
+                         ("loop 1000000", _bm_shift_loop.build_script(1000000)),
+                         ("erase loop 100000", build_erase_loop_script(100000))]:
+        build_time, query_time, frames, checkpoints = measure(script, queries)
+        print("%s: %d frames, index %.2f ms (%d checkpoints), %.1f us/query" % (
+            name, frames, build_time * 1000, checkpoints, query_time * 1e6))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import time
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _evaluator
+import xnilang.compiler.timeline as _timeline
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+#  The maximum repeat times of the loop compiled to frames.
+_MAX_FRAME_LOOP = 100000
+
+
+def build_script(times):
+    """Build a script with a long loop of shift and place commands.
+
+    :type times: int
+    :param times: The repeat times.
+    :rtype : str
+    :return: The script.
+    """
+
+    return "(define ball ((circle (0 0) 5)))\n" \
+           "(define flag ((line (0 0) (0 10))))\n" \
+           "(place ball (0.5 20))\n" \
+           "(loop %d ((shift ball right) (shift ball down) (place flag (3 4)) (shift ball up)))\n" % times
+
+
+def measure(compiler, script):
+    """Measure the time of simulating a script.
+
+    :type compiler: _compiler.Compiler
+    :type script: str
+    :param compiler: The compiler.
+    :param script: The script.
+    :rtype : (float, int)
+    :return: The compile time (in seconds) and the frame count.
+    """
+
+    commands = list(_interpreter.Interpreter(_token.Tokenizer(script)).iterate_command())
+    start = time.perf_counter()
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return time.perf_counter() - start, compiler.get_statistics().get_frame_count()
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([repeat times...]).
+    """
+
+    counts = [int(arg) for arg in argv] if len(argv) != 0 else [10000, 1000000]
+    for times in counts:
+        script = build_script(times)
+        compilers = [
+            ("Symbolic", _compiler.SymbolicCompiler(_evaluator.SymbolicAnimationEvaluator(20, True), "main")),
+            ("Timeline", _timeline.TimelineCompiler())
+        ]
+
+        #  The frames of long loops don't fit in memory.
+        if times <= _MAX_FRAME_LOOP:
+            compilers.insert(0, ("Frames", _compiler.Compiler(_evaluator.AnimationEvaluator(20, True), "main")))
+
+        for name, compiler in compilers:
+            elapsed, frames = measure(compiler, script)
+            print("%s, loop %d: %.2f ms (%d frames)" % (name, times, elapsed * 1000, frames))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "xnilang.settings")
+
+import xnilang.compiler.budget as _budget
+import xnilang.request as _request
+
+
+def build_script(times):
+    """Build a script that is one big loop (all frames are produced by one top-level command).
+
+    :type times: int
+    :param times: The repeat times of the loop.
+    :rtype : str
+    :return: The script.
+    """
+
+    return "(define dot ((circle (0 0) 5) (line (0 0) (5 5))))\n" \
+           "(place dot (0 0))\n" \
+           "(loop %d (\n" \
+           "  (shift dot right)\n" \
+           "  (shift dot down)\n" \
+           "))\n" % times
+
+
+def check_script_elements(page):
+    """Check that the body of every <script> element of a page parses on its own (with Node.js).
+
+    :type page: str
+    :param page: The page.
+    :rtype : int | None
+    :return: The count of <script> elements (None if Node.js isn't installed).
+    :raise AssertionError: Raise this exception if the body of a <script> element doesn't parse.
+    """
+
+    node = shutil.which("node")
+    if node is None:
+        return None
+
+    bodies = re.findall(r"<script type=\"text/javascript\">\n(.*?)\n</script>", page, re.S)
+    checker = "var bodies = JSON.parse(require(\"fs\").readFileSync(0, \"utf8\"));\n" \
+              "bodies.forEach(function(body, index) {\n" \
+              "    try {\n" \
+              "        new Function(body);\n" \
+              "    } catch (err) {\n" \
+              "        console.log(\"<script> element \" + index + \": \" + err.message);\n" \
+              "        process.exitCode = 1;\n" \
+              "    }\n" \
+              "});\n"
+    result = subprocess.run([node, "-e", checker], input=json.dumps(bodies), stdout=subprocess.PIPE,
+                            universal_newlines=True)
+    if result.returncode != 0:
+        raise AssertionError("A <script> element doesn't parse:\n" + result.stdout)
+
+    return len(bodies)
+
+
+def main(argv):
+    """Run the benchmark.
+
+    The first frame chunk of the streamed page must be received while the loop is still being compiled, and each
+    <script> element of the page must parse on its own.
+
+    :type argv: list[str]
+    :param argv: The arguments ([times]).
+    """
+
+    times = int(argv[0]) if len(argv) > 0 else 50000
+    budget = _budget.CompileBudget()
+
+    #  Read the page (the first piece is the page head, the second one is the first frame chunk).
+    start = time.perf_counter()
+    first_time = None
+    first_frames = None
+    pages = []
+    for index, page in enumerate(_request._iterate_streamed_page(build_script(times), budget=budget)):
+        if index == 1:
+            first_time = time.perf_counter() - start
+            first_frames = budget.get_frame_count()
+        pages.append(page)
+    total_time = time.perf_counter() - start
+    total_frames = budget.get_frame_count()
+
+    page = "".join(pages)
+
+    print("Loop %d: %d frames, %d bytes, %d pieces" % (times, total_frames, len(page), len(pages)))
+    print("First chunk: %.1f ms (%d frames compiled), whole page: %.1f ms" % (
+        first_time * 1000, first_frames, total_time * 1000))
+    if first_frames >= total_frames:
+        raise AssertionError("The first chunk wasn't sent before the loop was compiled.")
+    print("First chunk before the end of the compilation: yes")
+
+    count = check_script_elements(page)
+    if count is None:
+        print("<script> elements parse: skipped (Node.js isn't installed)")
+    else:
+        print("<script> elements parse: yes (%d elements)" % count)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import sys
+import tracemalloc
+import benchmarks.tokenizer as _bench_tokenizer
+import xnilang.parser.token as _token
+
+
+def measure(tokenize, script):
+    """Measure the memory held by tokenized tokens.
+
+    :param tokenize: The tokenize function (returns the tokens and the token count).
+    :type script: str
+    :param script: The script.
+    :rtype : float
+    :return: The bytes per token.
+    """
+
+    #  Measure the memory while the tokens are alive.
+    tracemalloc.start()
+    try:
+        tokens, count = tokenize(script)
+        size = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+
+    return size / count
+
+
+def _tokenize_to_list(script):
+    """Tokenize a script into a list of token objects.
+
+    :type script: str
+    :param script: The script.
+    :return: The tokens and the token count.
+    """
+
+    tokens = _token.Tokenizer(script).get_all_token()
+
+    return tokens, len(tokens)
+
+
+def _tokenize_to_buffer(script):
+    """Tokenize a script into a compact token buffer.
+
+    :type script: str
+    :param script: The script.
+    :return: The tokens and the token count.
+    """
+
+    tokens = _token.Tokenizer(script).get_token_buffer()
+
+    return tokens, tokens.get_count()
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([copies]).
+    """
+
+    #  Build the input.
+    copies = int(argv[0]) if len(argv) > 0 else 200
+    with open(_bench_tokenizer.SAMPLE_PATH, "r") as fp:
+        script = fp.read() * copies
+
+    print("Script size: %d bytes" % len(script))
+    print("Token objects: %.1f bytes/token" % measure(_tokenize_to_list, script))
+    print("Token buffer: %.1f bytes/token" % measure(_tokenize_to_buffer, script))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import os
+import sys
+import time
+import xnilang.parser.token as _token
+
+#  The script repeated to build the benchmark input.
+SAMPLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests", "cross-street.txt")
+
+
+def _tokenize_by_pattern(script):
+    """Tokenize a script with the master pattern scanner.
+
+    :type script: str
+    :param script: The script.
+    :rtype : int
+    :return: The token count.
+    """
+
+    return len(_token.Tokenizer(script).get_all_token())
+
+
+def _tokenize_by_character(script):
+    """Tokenize a script with the per-character reference scanner.
+
+    :type script: str
+    :param script: The script.
+    :rtype : int
+    :return: The token count.
+    """
+
+    tokenizer = _token.Tokenizer(script)
+    count = 0
+    while tokenizer._get_next_token_by_character() is not None:
+        count += 1
+
+    return count
+
+
+def measure(tokenize, script, rounds):
+    """Measure the throughput of a tokenizer.
+
+    :param tokenize: The tokenize function.
+    :type script: str
+    :type rounds: int
+    :param script: The script.
+    :param rounds: The rounds.
+    :rtype : float
+    :return: The throughput (tokens/sec).
+    """
+
+    best = None
+    count = 0
+    for _ in range(0, rounds):
+        start = time.perf_counter()
+        count = tokenize(script)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return count / best
+
+
+def main(argv):
+    """Run the benchmark.
+
+    :type argv: list[str]
+    :param argv: The arguments ([copies [rounds]]).
+    """
+
+    #  Build the input.
+    copies = int(argv[0]) if len(argv) > 0 else 200
+    rounds = int(argv[1]) if len(argv) > 1 else 5
+    with open(SAMPLE_PATH, "r") as fp:
+        script = fp.read() * copies
+
+    #  Measure both scanners.
+    by_character = measure(_tokenize_by_character, script, rounds)
+    by_pattern = measure(_tokenize_by_pattern, script, rounds)
+
+    print("Script size: %d bytes" % len(script))
+    print("Per-character scanner: %.0f tokens/sec" % by_character)
+    print("Master pattern scanner: %.0f tokens/sec" % by_pattern)
+    print("Speed-up: %.2fx" % (by_pattern / by_character))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
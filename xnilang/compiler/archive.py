@@ -0,0 +1,769 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import decimal as _decimal
+import math as _math
+import struct as _struct
+import zlib as _zlib
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.error as _error
+import xnilang.compiler.evaluator as _ev
+import xnilang.parser.ast as _ast
+import xnilang.parser.serializer as _serializer
+
+#  Format magic and version.
+FORMAT_MAGIC = b"XNIT"
+FORMAT_VERSION = 1
+
+#  Header (magic, version, payload CRC-32).
+_HEADER = _struct.Struct("<4sHI")
+
+#  The default count of frames of a block.
+_BLOCK_FRAMES = 1024
+
+#  Kinds of position values.
+_KIND_INTEGER = 0
+_KIND_FLOAT = 1
+_KIND_NEGATIVE_ZERO = 2
+
+#  The initial capacity of a writer.
+_INITIAL_CAPACITY = 1 << 12
+
+
+def _zigzag(value):
+    """Map a signed integer to an unsigned integer (0, -1, 1, -2, ... are mapped to 0, 1, 2, 3, ...).
+
+    :type value: int
+    :param value: The value.
+    :rtype : int
+    :return: The mapped value.
+    """
+
+    return value << 1 if value >= 0 else ((-value) << 1) - 1
+
+
+def _unzigzag(value):
+    """Map an unsigned integer back to a signed integer (see _zigzag()).
+
+    :type value: int
+    :param value: The mapped value.
+    :rtype : int
+    :return: The value.
+    """
+
+    return (value >> 1) if value & 1 == 0 else -((value + 1) >> 1)
+
+
+def _store_float(value, scale):
+    """Convert a float position value to a stored value.
+
+    :type value: float
+    :type scale: int
+    :param value: The value.
+    :param scale: The scale of the block (at least the count of decimals of the value).
+    :rtype : (int, int)
+    :return: The stored value (the value scaled by 10 ** scale) and its kind.
+    """
+
+    if value == 0 and _math.copysign(1, value) < 0:
+        return 0, _KIND_NEGATIVE_ZERO
+
+    return int(_decimal.Decimal(repr(value)).scaleb(scale)), _KIND_FLOAT
+
+
+def _restore_value(stored, kind, scale):
+    """Restore a position value.
+
+    :type stored: int
+    :type kind: int
+    :type scale: int
+    :param stored: The stored value.
+    :param kind: The kind of the value.
+    :param scale: The scale of the block.
+    :rtype : int | float
+    :return: The value.
+    :raise ValueError: Raise this exception if the kind is invalid.
+    """
+
+    if kind == _KIND_INTEGER:
+        return stored
+    elif kind == _KIND_FLOAT:
+        return float(_decimal.Decimal(stored).scaleb(-scale))
+    elif kind == _KIND_NEGATIVE_ZERO:
+        return -0.0
+    else:
+        raise ValueError("Corrupted data.")
+
+
+def _get_float_scale(value):
+    """Get the count of decimals of a float (the shortest decimal representation that reads back as it).
+
+    :type value: float
+    :param value: The value.
+    :rtype : int
+    :return: The count (0 if the value is integral).
+    :raise ValueError: Raise this exception if the value isn't finite.
+    """
+
+    if not _math.isfinite(value):
+        raise ValueError("Only finite positions can be archived.")
+
+    return max(0, -_decimal.Decimal(repr(value)).as_tuple().exponent)
+
+
+class VarintWriter:
+    """Varint writer.
+
+    Values are written in place into a preallocated bytearray (through a memoryview), which is only
+    reallocated (doubled) when it's full, so writing a value allocates nothing.
+    """
+
+    def __init__(self, capacity=_INITIAL_CAPACITY):
+        """Initialize the writer.
+
+        :type capacity: int
+        :param capacity: The initial capacity (in bytes).
+        """
+
+        self._buffer = bytearray(max(capacity, 16))
+        self._view = memoryview(self._buffer)
+        self._size = 0
+
+    def get_size(self):
+        """Get the size of the data written so far.
+
+        :rtype : int
+        :return: The size (in bytes).
+        """
+
+        return self._size
+
+    def get_view(self):
+        """Get the data written so far.
+
+        The view is only valid until the next write.
+
+        :rtype : memoryview
+        :return: The view.
+        """
+
+        return self._view[:self._size]
+
+    def clear(self):
+        """Clear the data (the capacity is kept)."""
+
+        self._size = 0
+
+    def _reserve(self, count):
+        """Make room for more bytes.
+
+        :type count: int
+        :param count: The count of bytes.
+        """
+
+        if self._size + count <= len(self._buffer):
+            return
+
+        capacity = len(self._buffer)
+        while capacity < self._size + count:
+            capacity *= 2
+        buffer = bytearray(capacity)
+        buffer[:self._size] = self._view[:self._size]
+        self._view.release()
+        self._buffer = buffer
+        self._view = memoryview(buffer)
+
+    def write_varint(self, value):
+        """Write an unsigned integer as a varint (7 bits per byte, least significant group first).
+
+        :type value: int
+        :param value: The value.
+        :raise ValueError: Raise this exception if the value is negative.
+        """
+
+        if value < 0:
+            raise ValueError("Invalid varint.")
+
+        self._reserve(value.bit_length() // 7 + 1)
+        view = self._view
+        pos = self._size
+        while value >= 0x80:
+            view[pos] = (value & 0x7F) | 0x80
+            value >>= 7
+            pos += 1
+        view[pos] = value
+        self._size = pos + 1
+
+    def write_zigzag(self, value):
+        """Write a signed integer as a zig-zag varint (0, -1, 1, -2, ... are written as 0, 1, 2, 3, ...).
+
+        :type value: int
+        :param value: The value.
+        """
+
+        self.write_varint(_zigzag(value))
+
+    def write_bytes(self, data):
+        """Write bytes.
+
+        :type data: bytes | bytearray | memoryview
+        :param data: The bytes.
+        """
+
+        count = len(data)
+        self._reserve(count)
+        self._view[self._size:self._size + count] = data
+        self._size += count
+
+
+class VarintReader:
+    """Varint reader (see VarintWriter)."""
+
+    def __init__(self, data, offset=0, end=None):
+        """Initialize the reader.
+
+        :type data: bytes | bytearray | memoryview
+        :type offset: int
+        :type end: int | None
+        :param data: The data.
+        :param offset: The offset of the first value.
+        :param end: The end of the data (None if it's the end of the data).
+        """
+
+        self._view = memoryview(data)
+        self._offset = offset
+        self._end = len(self._view) if end is None else end
+
+    def get_offset(self):
+        """Get the offset of the next value.
+
+        :rtype : int
+        :return: The offset.
+        """
+
+        return self._offset
+
+    def is_end(self):
+        """Get whether all data has been read.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._offset >= self._end
+
+    def read_varint(self):
+        """Read an unsigned integer.
+
+        :rtype : int
+        :return: The value.
+        :raise ValueError: Raise this exception if the data is truncated.
+        """
+
+        view = self._view
+        pos = self._offset
+        end = self._end
+        value = 0
+        shift = 0
+        while True:
+            if pos >= end:
+                raise ValueError("Corrupted data.")
+            byte = view[pos]
+            pos += 1
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                break
+            shift += 7
+        self._offset = pos
+
+        return value
+
+    def read_zigzag(self):
+        """Read a signed integer.
+
+        :rtype : int
+        :return: The value.
+        :raise ValueError: Raise this exception if the data is truncated.
+        """
+
+        return _unzigzag(self.read_varint())
+
+    def read_bytes(self, count):
+        """Read bytes.
+
+        :type count: int
+        :param count: The count of bytes.
+        :rtype : memoryview
+        :return: The bytes.
+        :raise ValueError: Raise this exception if the data is truncated.
+        """
+
+        if self._offset + count > self._end:
+            raise ValueError("Corrupted data.")
+        data = self._view[self._offset:self._offset + count]
+        self._offset += count
+
+        return data
+
+
+class ArchiveWriter:
+    """Timeline archive writer.
+
+    The archive holds the geometry of each template once (the object-define command that introduced it,
+    serialized by xnilang.parser.serializer), then the frames in columnar blocks. Each block has three
+    columns:
+
+        display     For each frame, 0 if its display list is the one of the previous frame, otherwise the
+                    entry count + 1 and the (object ID, template) of each entry.
+        x, y        For each entry, the position delta of its object (from the previous entry of the object in
+                    the block) as a zig-zag varint, shifted left by two bits (the low bits are the kind of the
+                    value: integer, float or negative zero).
+
+    Floats are stored as integers scaled by 10 ** scale, where the scale of a block is the largest count of
+    decimals of its floats (a frame that needs more decimals starts a new block), so positions are restored
+    exactly, including whether they are integers or floats.
+    """
+
+    def __init__(self, block_frames=_BLOCK_FRAMES):
+        """Initialize the writer.
+
+        :type block_frames: int
+        :param block_frames: The maximum count of frames of a block.
+        :raise ValueError: Raise this exception if the block size is invalid.
+        """
+
+        if block_frames <= 0:
+            raise ValueError("Invalid block size.")
+        self._block_frames = block_frames
+
+        #  Initialize the templates (the object-define commands and the frame count when they were added).
+        self._templates = []
+        self._template_frames = []
+
+        #  Initialize the blocks and the columns of the current block.
+        self._blocks = VarintWriter()
+        self._block_count = 0
+        self._frame_count = 0
+        self._display = VarintWriter()
+        self._xs = VarintWriter()
+        self._ys = VarintWriter()
+        self._block_frame_count = 0
+        self._block_scale = 0
+        self._previous_display = None
+        self._previous_positions = {}
+
+    def get_frame_count(self):
+        """Get the count of frames written so far.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def add_template(self, cmd):
+        """Add a template (the templates are numbered in order).
+
+        :type cmd: xnilang.parser.ast.ObjectDefineCommand
+        :param cmd: The object-define command that introduced the template.
+        """
+
+        self._templates.append(cmd)
+        self._template_frames.append(self._frame_count)
+
+    def _end_block(self):
+        """Write the current block."""
+
+        if self._block_frame_count == 0:
+            return
+
+        blocks = self._blocks
+        blocks.write_varint(self._block_frame_count)
+        blocks.write_varint(self._block_scale)
+        for column in [self._display, self._xs, self._ys]:
+            blocks.write_varint(column.get_size())
+        for column in [self._display, self._xs, self._ys]:
+            blocks.write_bytes(column.get_view())
+            column.clear()
+        self._block_count += 1
+
+        #  Start a new block.
+        self._block_frame_count = 0
+        self._block_scale = 0
+        self._previous_display = None
+        self._previous_positions = {}
+
+    def add_frame(self, rows):
+        """Add a frame.
+
+        :type rows: list[(int, int, int | float, int | float)]
+        :param rows: The (object ID, template index, x, y) of each display entry, in display order.
+        :raise ValueError: Raise this exception if a position isn't finite.
+        """
+
+        #  Get the decimals needed by the frame (a frame that needs more decimals starts a new block).
+        scale = 0
+        for _, _, x, y in rows:
+            if isinstance(x, float):
+                scale = max(scale, _get_float_scale(x))
+            if isinstance(y, float):
+                scale = max(scale, _get_float_scale(y))
+        if self._block_frame_count == self._block_frames or \
+                (scale > self._block_scale and self._block_frame_count != 0):
+            self._end_block()
+        if scale > self._block_scale:
+            self._block_scale = scale
+
+        #  Write the display list (if it changed).
+        display = [(object_id, template_idx) for object_id, template_idx, _, _ in rows]
+        if display == self._previous_display:
+            self._display.write_varint(0)
+        else:
+            self._display.write_varint(len(display) + 1)
+            for object_id, template_idx in display:
+                self._display.write_varint(object_id)
+                self._display.write_varint(template_idx)
+            self._previous_display = display
+
+        #  Write the position deltas.
+        positions = self._previous_positions
+        xs = self._xs
+        ys = self._ys
+        scale = self._block_scale
+        for object_id, _, x, y in rows:
+            previous_x, previous_y = positions.get(object_id, (0, 0))
+            if isinstance(x, float):
+                stored_x, kind_x = _store_float(x, scale)
+            else:
+                stored_x, kind_x = x, _KIND_INTEGER
+            if isinstance(y, float):
+                stored_y, kind_y = _store_float(y, scale)
+            else:
+                stored_y, kind_y = y, _KIND_INTEGER
+            xs.write_varint(_zigzag(stored_x - previous_x) << 2 | kind_x)
+            ys.write_varint(_zigzag(stored_y - previous_y) << 2 | kind_y)
+            positions[object_id] = (stored_x, stored_y)
+
+        self._block_frame_count += 1
+        self._frame_count += 1
+
+    def get_data(self):
+        """Get the archive (the current block is ended).
+
+        :rtype : bytes
+        :return: The archive.
+        """
+
+        self._end_block()
+
+        #  Write the templates, then the blocks.
+        payload = VarintWriter(self._blocks.get_size() + _INITIAL_CAPACITY)
+        geometry = _serializer.serialize("", self._templates)
+        payload.write_varint(len(geometry))
+        payload.write_bytes(geometry)
+        payload.write_varint(len(self._template_frames))
+        previous = 0
+        for frame_count in self._template_frames:
+            payload.write_varint(frame_count - previous)
+            previous = frame_count
+        payload.write_varint(self._frame_count)
+        payload.write_varint(self._block_count)
+        payload.write_bytes(self._blocks.get_view())
+        data = payload.get_view()
+
+        return _HEADER.pack(FORMAT_MAGIC, FORMAT_VERSION, _zlib.crc32(data)) + bytes(data)
+
+
+class ArchiveReader:
+    """Timeline archive reader (see ArchiveWriter)."""
+
+    def __init__(self, data):
+        """Initialize the reader.
+
+        :type data: bytes | bytearray | memoryview
+        :param data: The archive.
+        :raise ValueError: Raise this exception if the archive is corrupted or of another version.
+        """
+
+        #  Check the header.
+        view = memoryview(data)
+        if len(view) < _HEADER.size:
+            raise ValueError("Corrupted data.")
+        magic, version, checksum = _HEADER.unpack_from(view, 0)
+        if magic != FORMAT_MAGIC or version != FORMAT_VERSION:
+            raise ValueError("Stale data.")
+        if _zlib.crc32(view[_HEADER.size:]) != checksum:
+            raise ValueError("Corrupted data.")
+        self._view = view
+
+        #  Read the templates.
+        reader = VarintReader(view, _HEADER.size)
+        self._templates = _serializer.deserialize(reader.read_bytes(reader.read_varint()))
+        for cmd in self._templates:
+            if not isinstance(cmd, _ast.ObjectDefineCommand):
+                raise ValueError("Corrupted data.")
+        if reader.read_varint() != len(self._templates):
+            raise ValueError("Corrupted data.")
+        self._template_frames = []
+        frame_count = 0
+        for _ in range(0, len(self._templates)):
+            frame_count += reader.read_varint()
+            self._template_frames.append(frame_count)
+
+        #  Locate the blocks.
+        self._frame_count = reader.read_varint()
+        self._block_count = reader.read_varint()
+        self._blocks_offset = reader.get_offset()
+
+    def get_frame_count(self):
+        """Get the frame count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def get_template_count(self):
+        """Get the template count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._templates)
+
+    def get_template_command(self, template_idx):
+        """Get the object-define command that introduced a template.
+
+        :type template_idx: int
+        :param template_idx: The template index.
+        :rtype : _ast.ObjectDefineCommand
+        :return: The command.
+        """
+
+        return self._templates[template_idx]
+
+    def get_template_frame(self, template_idx):
+        """Get the count of frames that were added before a template.
+
+        :type template_idx: int
+        :param template_idx: The template index.
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._template_frames[template_idx]
+
+    def iterate_frame(self):
+        """Iterate the frames.
+
+        :rtype : collections.Iterable[list[(int, int, int | float, int | float)]]
+        :return: The iterator of the (object ID, template index, x, y) of each display entry of each frame.
+        :raise ValueError: Raise this exception if the archive is corrupted.
+        """
+
+        reader = VarintReader(self._view, self._blocks_offset)
+        frame_count = 0
+        for _ in range(0, self._block_count):
+            #  Read the block header and locate the columns.
+            block_frames = reader.read_varint()
+            scale = reader.read_varint()
+            lengths = [reader.read_varint() for _ in range(0, 3)]
+            columns = []
+            for length in lengths:
+                offset = reader.get_offset()
+                reader.read_bytes(length)
+                columns.append(VarintReader(self._view, offset, offset + length))
+            display_column, xs, ys = columns
+
+            #  Decode the frames.
+            display = None
+            positions = {}
+            for _ in range(0, block_frames):
+                entry_count = display_column.read_varint()
+                if entry_count != 0:
+                    display = [(display_column.read_varint(), display_column.read_varint())
+                               for _ in range(0, entry_count - 1)]
+                elif display is None:
+                    raise ValueError("Corrupted data.")
+
+                rows = []
+                for object_id, template_idx in display:
+                    stored_x, stored_y = positions.get(object_id, (0, 0))
+                    token_x = xs.read_varint()
+                    token_y = ys.read_varint()
+                    stored_x += _unzigzag(token_x >> 2)
+                    stored_y += _unzigzag(token_y >> 2)
+                    positions[object_id] = (stored_x, stored_y)
+                    rows.append((object_id,
+                                 template_idx,
+                                 _restore_value(stored_x, token_x & 3, scale),
+                                 _restore_value(stored_y, token_y & 3, scale)))
+                yield rows
+            for column in columns:
+                if not column.is_end():
+                    raise ValueError("Corrupted data.")
+            frame_count += block_frames
+
+        if frame_count != self._frame_count or not reader.is_end():
+            raise ValueError("Corrupted data.")
+
+
+class ArchiveCompiler(_compiler.Compiler):
+    """Archive compiler class.
+
+    The commands are simulated like Compiler does, but the display entries of each frame are written to an
+    archive (see ArchiveWriter) instead of being emitted.
+    """
+
+    def __init__(self, writer=None, budget=None):
+        """Initialize the compiler.
+
+        :type writer: ArchiveWriter | None
+        :type budget: xnilang.compiler.budget.CompileBudget | None
+        :param writer: The archive writer (None if a new one is used).
+        :param budget: The compile budget (None if unlimited).
+        """
+
+        #  Let the base class initialize (the templates are kept by a bare animation evaluator).
+        _compiler.Compiler.__init__(self, _ev.AnimationEvaluator(0, False), None, budget)
+
+        #  Save the writer.
+        if writer is None:
+            writer = ArchiveWriter()
+        self._writer = writer
+
+    def get_writer(self):
+        """Get the archive writer.
+
+        :rtype : ArchiveWriter
+        :return: The writer.
+        """
+
+        return self._writer
+
+    def _compile_object_define_command(self, cmd):
+        """Compile an object-define command (and write the geometry of new templates).
+
+        :type cmd: _ast.ObjectDefineCommand
+        :param cmd: The command.
+        """
+
+        is_new = cmd.get_draw_list() not in self._templates
+        _compiler.Compiler._compile_object_define_command(self, cmd)
+        if is_new:
+            self._writer.add_template(cmd)
+
+    def _macro_redraw(self):
+        """(Macro) Write the visible objects as a new frame of the archive.
+
+        :raise _error.CompilationError: Raise this exception if the template of an object can't be compiled.
+        """
+
+        scene = self._scene
+        rows = []
+        for object_id in scene.iterate_display_id():
+            obj = scene.get_object(object_id)
+
+            #  Check the template.
+            if obj.get_template_error() is not None:
+                raise _error.CompilationError(obj.get_template_error())
+
+            rows.append((object_id, obj.get_template(), obj.get_x(), obj.get_y()))
+
+        self._writer.add_frame(rows)
+        self._count_frame(False)
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands (the display
+        entries of each frame are written with their object IDs, so the iterations are compiled command by
+        command).
+
+        :type move_list: _ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        """
+
+        self._step_loop_body(move_list, times)
+
+
+def write_archive(commands, budget=None):
+    """Compile commands to an archive.
+
+    :type commands: collections.Iterable[_ast.CommandNode]
+    :type budget: xnilang.compiler.budget.CompileBudget | None
+    :param commands: The commands.
+    :param budget: The compile budget (None if unlimited).
+    :rtype : bytes
+    :return: The archive.
+    :raise _error.CompilationError: Raise this exception if an error occurred.
+    """
+
+    compiler = ArchiveCompiler(budget=budget)
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return compiler.get_writer().get_data()
+
+
+def emit_canvas(reader, evaluator, canvas):
+    """Emit an archive to an animation evaluator (the script is identical to the one emitted by Compiler).
+
+    :type reader: ArchiveReader
+    :type evaluator: _ev.AnimationEvaluator
+    :type canvas: str
+    :param reader: The archive reader.
+    :param evaluator: The animation evaluator.
+    :param canvas: The canvas name.
+    :raise ValueError: Raise this exception if the archive is corrupted.
+    """
+
+    evaluator.clear_frame()
+
+    #  Compile templates (like Compiler does, templates that can't be compiled are kept as far as compiled).
+    templates = []
+    for template_idx in range(0, reader.get_template_count()):
+        template = evaluator.create_template()
+        draw_list = reader.get_template_command(template_idx).get_draw_list()
+        try:
+            for dw_id in range(0, draw_list.get_command_count()):
+                _compiler.Compiler._compile_draw_command(0, 0, draw_list.get_command(dw_id), template)
+        except _error.CompilationError:
+            pass
+        templates.append(template)
+
+    #  Emit frames (and add each template before the frames that were added after it).
+    scene_frames = {}
+    template_idx = 0
+    frame_idx = 0
+    for rows in reader.iterate_frame():
+        while template_idx < len(templates) and reader.get_template_frame(template_idx) <= frame_idx:
+            evaluator.add_template(templates[template_idx])
+            template_idx += 1
+
+        #  Reuse the frame of the same scene state.
+        state = _compiler.get_state_digest(tuple([(row[1], row[2], row[3]) for row in rows]))
+        reused_idx = scene_frames.get(state)
+        if reused_idx is not None:
+            evaluator.add_frame_reference(reused_idx)
+        else:
+            scene_frames[state] = frame_idx
+            frame = evaluator.create_frame(canvas)
+            frame.emit_clear()
+            for _, template, x, y in rows:
+                frame.emit_draw_template(template, x, y)
+            evaluator.add_frame(frame)
+        frame_idx += 1
+    for template in templates[template_idx:]:
+        evaluator.add_template(template)
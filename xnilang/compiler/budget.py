@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import time as _time
+import xnilang.compiler.error as _error
+
+#  The count of ticks between two deadline checks.
+_TICKS_PER_CHECK = 1024
+
+
+class CompileBudget:
+    """Compile budget (the resource limits of one compilation).
+
+    The budget counts the produced frames, the emitted bytes and the steps of loops as the compiler and the
+    animation evaluator go, and raises BudgetExceededError as soon as a limit is exceeded. The wall clock is
+    only read once every few ticks, so counting is cheap. The clock starts when the budget is created.
+    """
+
+    def __init__(self, max_frames=None, max_output_bytes=None, max_objects=None, time_limit=None):
+        """Initialize the budget.
+
+        :type max_frames: int | None
+        :type max_output_bytes: int | None
+        :type max_objects: int | None
+        :type time_limit: int | float | None
+        :param max_frames: The maximum count of frames (None if unlimited).
+        :param max_output_bytes: The maximum size of the emitted script (None if unlimited).
+        :param max_objects: The maximum count of defined objects (None if unlimited).
+        :param time_limit: The maximum wall-clock time in seconds (None if unlimited).
+        :raise ValueError: Raise this exception if a limit is negative.
+        """
+
+        for limit in [max_frames, max_output_bytes, max_objects, time_limit]:
+            if limit is not None and limit < 0:
+                raise ValueError("Invalid budget limit.")
+
+        self._max_frames = max_frames
+        self._max_output_bytes = max_output_bytes
+        self._max_objects = max_objects
+        self._time_limit = time_limit
+        self._deadline = None if time_limit is None else _time.monotonic() + time_limit
+        self._frame_count = 0
+        self._output_bytes = 0
+        self._ticks = _TICKS_PER_CHECK
+
+    def get_max_frames(self):
+        """Get the maximum count of frames.
+
+        :rtype : int | None
+        :return: The count (None if unlimited).
+        """
+
+        return self._max_frames
+
+    def get_max_output_bytes(self):
+        """Get the maximum size of the emitted script.
+
+        :rtype : int | None
+        :return: The size in bytes (None if unlimited).
+        """
+
+        return self._max_output_bytes
+
+    def get_max_objects(self):
+        """Get the maximum count of defined objects.
+
+        :rtype : int | None
+        :return: The count (None if unlimited).
+        """
+
+        return self._max_objects
+
+    def get_time_limit(self):
+        """Get the maximum wall-clock time.
+
+        :rtype : int | float | None
+        :return: The time in seconds (None if unlimited).
+        """
+
+        return self._time_limit
+
+    def get_frame_count(self):
+        """Get the count of frames produced so far.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def get_output_bytes(self):
+        """Get the size of the script emitted so far.
+
+        :rtype : int
+        :return: The size in bytes.
+        """
+
+        return self._output_bytes
+
+    def check_deadline(self):
+        """Check the wall-clock time.
+
+        :raise _error.BudgetExceededError: Raise this exception if the time limit is exceeded.
+        """
+
+        if self._deadline is not None and _time.monotonic() > self._deadline:
+            raise _error.BudgetExceededError("Compilation took too long (the limit is %g seconds)." %
+                                             self._time_limit)
+
+    def tick(self):
+        """Count a step of the compilation (the wall-clock time is checked once every few steps).
+
+        :raise _error.BudgetExceededError: Raise this exception if the time limit is exceeded.
+        """
+
+        self._ticks -= 1
+        if self._ticks == 0:
+            self._ticks = _TICKS_PER_CHECK
+            self.check_deadline()
+
+    def add_frames(self, count):
+        """Count produced frames.
+
+        :type count: int
+        :param count: The frame count.
+        :raise _error.BudgetExceededError: Raise this exception if a limit is exceeded.
+        """
+
+        self._frame_count += count
+        if self._max_frames is not None and self._frame_count > self._max_frames:
+            raise _error.BudgetExceededError("Too many frames (the limit is %d)." % self._max_frames)
+        self.tick()
+
+    def check_frame_estimate(self, count):
+        """Check the estimated count of frames (see xnilang.compiler.estimate.CostEstimator) before compiling.
+
+        :type count: int
+        :param count: The estimated count.
+        :raise _error.BudgetExceededError: Raise this exception if the frame limit would be exceeded.
+        """
+
+        if self._max_frames is not None and count > self._max_frames:
+            raise _error.BudgetExceededError("Too many frames (%d estimated, the limit is %d)." %
+                                             (count, self._max_frames))
+
+    def add_output_bytes(self, count):
+        """Count emitted bytes.
+
+        :type count: int
+        :param count: The byte count.
+        :raise _error.BudgetExceededError: Raise this exception if the size limit is exceeded.
+        """
+
+        self._output_bytes += count
+        if self._max_output_bytes is not None and self._output_bytes > self._max_output_bytes:
+            raise _error.BudgetExceededError("The animation is too large (the limit is %d bytes)." %
+                                             self._max_output_bytes)
+
+    def check_object_count(self, count):
+        """Check the count of defined objects.
+
+        :type count: int
+        :param count: The count.
+        :raise _error.BudgetExceededError: Raise this exception if the object limit is exceeded.
+        """
+
+        if self._max_objects is not None and count > self._max_objects:
+            raise _error.BudgetExceededError("Too many objects (the limit is %d)." % self._max_objects)
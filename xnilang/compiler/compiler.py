@@ -8,21 +8,172 @@
 #
 
 #  Import other modules.
+import hashlib as _hashlib
+import math as _math
+import xnilang.compiler.budget as _budget
 import xnilang.compiler.error as _error
-import xnilang.compiler.evaluator as _ev
+import xnilang.compiler.scene as _scene
 import xnilang.parser.ast as _ast
 
+#  The maximum count of deltas that are accumulated at once (see advance_position()).
+_ADVANCE_CHUNK = 1 << 20
+
+
+def is_exact_advance(value, deltas, times):
+    """Get whether adding a sequence of deltas to a coordinate repeatedly is exact (every partial sum is exactly
+    represented, so the result doesn't depend on the order of the additions).
+
+    :type value: int | float
+    :type deltas: list[int]
+    :type times: int
+    :param value: The initial value.
+    :param deltas: The deltas (of one repetition).
+    :param times: The repeat times.
+    :rtype : bool
+    :return: True if so.
+    """
+
+    #  Integer values are exact.
+    if isinstance(value, int):
+        return True
+
+    #  Float values are exact if all partial sums fit in the mantissa.
+    if not _math.isfinite(value):
+        return False
+    numerator, denominator = value.as_integer_ratio()
+
+    return abs(numerator) + denominator * times * sum([abs(delta) for delta in deltas]) < 2 ** 53
+
+
+def advance_position(value, deltas, times):
+    """Get the value of a coordinate after adding a sequence of deltas to it repeatedly.
+
+    The result is identical to adding the deltas one by one (in the same order), including the rounding of
+    float values, which is reproduced with cumulative sums.
+
+    :type value: int | float
+    :type deltas: list[int]
+    :type times: int
+    :param value: The initial value.
+    :param deltas: The deltas (of one repetition).
+    :param times: The repeat times.
+    :rtype : int | float
+    :return: The final value.
+    """
+
+    if len(deltas) == 0 or times <= 0:
+        return value
+
+    #  Integer values and float values whose partial sums are all exact have a closed form.
+    if isinstance(value, int):
+        return value + sum(deltas) * times
+    if is_exact_advance(value, deltas, times):
+        numerator, denominator = value.as_integer_ratio()
+        return (numerator + denominator * sum(deltas) * times) / denominator
+
+    #  NumPy is optional for the compiler (it's only imported here), so accumulate float values one by one if the
+    #  module isn't installed.
+    try:
+        import numpy as _np
+    except ImportError:
+        for _ in range(0, times):
+            for delta in deltas:
+                value += delta
+        return value
+
+    #  Accumulate float values in chunks (to bound the memory usage).
+    chunk_times = max(1, _ADVANCE_CHUNK // len(deltas))
+    chunk = _np.tile(_np.array(deltas, dtype=_np.float64), chunk_times)
+    while times > 0:
+        count = min(times, chunk_times)
+        sums = _np.cumsum(_np.concatenate(([value], chunk[:count * len(deltas)])))
+        value = float(sums[-1])
+        times -= count
+
+    return value
+
+
+def get_state_digest(state):
+    """Get the digest of a scene state (frames are reused by the digests of their states, so the table of
+    emitted frames doesn't keep the states, which grow with the count of visible objects).
+
+    :type state: tuple
+    :param state: The scene state (the template and the position of each visible object, in display order).
+    :rtype : bytes
+    :return: The digest (16 bytes).
+    """
+
+    return _hashlib.blake2b(repr(state).encode("ascii"), digest_size=16).digest()
+
+
+class CompileStatistics:
+    """Compile statistics class."""
+
+    def __init__(self):
+        """Initialize the statistics."""
+
+        self._frame_count = 0
+        self._reused_frame_count = 0
+        self._template_count = 0
+
+    def get_frame_count(self):
+        """Get the count of produced frames.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def get_reused_frame_count(self):
+        """Get the count of frames that reused an already emitted frame.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._reused_frame_count
+
+    def get_template_count(self):
+        """Get the count of compiled object templates.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._template_count
+
+    def add_frame(self, reused, count=1):
+        """Count produced frames.
+
+        :type reused: bool
+        :type count: int
+        :param reused: True if the frames reused already emitted frames.
+        :param count: The frame count.
+        """
+
+        self._frame_count += count
+        if reused:
+            self._reused_frame_count += count
+
+    def add_template(self):
+        """Count a compiled object template."""
+
+        self._template_count += 1
+
 
 class Compiler:
     """AST compiler class."""
 
-    def __init__(self, evaluator, canvas):
+    def __init__(self, evaluator, canvas, budget=None):
         """Initialize the compiler.
 
         :type canvas: str
-        :type evaluator: _ev.AnimationEvaluator
+        :type evaluator: xnilang.compiler.evaluator.AnimationEvaluator
+        :type budget: _budget.CompileBudget | None
         :param evaluator: The animation evaluator.
         :param canvas: The canvas.
+        :param budget: The compile budget (None if unlimited).
         """
 
         #  Clear all frames.
@@ -34,15 +185,32 @@ class Compiler:
         #  Save the canvas.
         self._canvas = canvas
 
-        #  Initialize the object manager.
-        self._objects = {}
-
-        #  Initialize the display list.
-        self._display_list = []
+        #  Initialize the scene (the object manager and the display list).
+        self._scene = _scene.SceneGraph()
 
         #  Initialize current frame.
         self._frame = None
 
+        #  Initialize the template table (draw list -> [template index, error message]).
+        self._templates = {}
+
+        #  Initialize the frame table (digest of scene state -> frame index).
+        self._scene_frames = {}
+
+        #  Initialize the statistics.
+        self._statistics = CompileStatistics()
+
+        #  Initialize the table of analysed loop bodies (move list -> steps or None).
+        self._loop_steps = {}
+
+        #  Initialize the frame sink.
+        self._frame_sink = None
+
+        #  Save the compile budget.
+        if budget is None:
+            budget = _budget.CompileBudget()
+        self._budget = budget
+
     def get_canvas(self):
         """Get the canvas name.
 
@@ -52,6 +220,71 @@ class Compiler:
 
         return self._canvas
 
+    def get_scene(self):
+        """Get the scene (the objects and the display list).
+
+        :rtype : _scene.SceneGraph
+        :return: The scene.
+        """
+
+        return self._scene
+
+    def get_statistics(self):
+        """Get the compile statistics.
+
+        :rtype : CompileStatistics
+        :return: The statistics.
+        """
+
+        return self._statistics
+
+    def get_budget(self):
+        """Get the compile budget.
+
+        :rtype : _budget.CompileBudget
+        :return: The budget.
+        """
+
+        return self._budget
+
+    def set_frame_sink(self, sink):
+        """Set the sink that frames are handed to as soon as they are produced.
+
+        Frames are handed over while a command is compiled (e.g. in each iteration of a long loop), so they are
+        not kept in the animation evaluator until the command is done.
+
+        :type sink: collections.Callable | None
+        :param sink: The sink (a callable (frame), see iterate_frame() for the frames), None if the frames are
+                     kept in the animation evaluator.
+        """
+
+        self._frame_sink = sink
+
+    def _hand_frames(self):
+        """Hand the frames added to the animation evaluator to the frame sink (if any)."""
+
+        if self._frame_sink is not None:
+            for frame in self._evaluator.take_frame():
+                self._frame_sink(frame)
+
+    def flush(self):
+        """Hand the frames that are still kept in the animation evaluator to the frame sink (if any)."""
+
+        self._hand_frames()
+
+    def _count_frame(self, reused, count=1):
+        """Count produced frames (in the statistics and against the budget).
+
+        :type reused: bool
+        :type count: int
+        :param reused: True if the frames reused already emitted frames.
+        :param count: The frame count.
+        :raise _error.BudgetExceededError: Raise this exception if the compile budget is exceeded.
+        """
+
+        self._statistics.add_frame(reused, count)
+        self._budget.add_frames(count)
+
     @staticmethod
     def _compile_draw_command(base_x, base_y, cmd, frame):
         """Compile a draw command to a frame.
@@ -59,7 +292,7 @@ class Compiler:
         :type base_x: int
         :type base_y: int
         :type cmd: _ast.DrawCommand
-        :type frame: _ev.FrameEvaluator
+        :type frame: xnilang.compiler.evaluator.FrameEvaluator
         :param base_x: The base X axis value.
         :param base_y: The base Y axis value.
         :param cmd: The command.
@@ -124,6 +357,32 @@ class Compiler:
         else:
             raise RuntimeError("Invalid command.")
 
+    def _get_template(self, draw_list):
+        """Get (compile if needed) the template of a draw list.
+
+        :type draw_list: _ast.DrawList
+        :param draw_list: The draw list.
+        :rtype : list
+        :return: The template index and the compilation error message (None if no error).
+        """
+
+        tpl_info = self._templates.get(draw_list)
+        if tpl_info is None:
+            #  Compile the draw list. The error (if any) is raised when the object is drawn.
+            template = self._evaluator.create_template()
+            error = None
+            try:
+                for dw_id in range(0, draw_list.get_command_count()):
+                    self._compile_draw_command(0, 0, draw_list.get_command(dw_id), template)
+            except _error.CompilationError as err:
+                error = str(err)
+
+            #  Save the template.
+            tpl_info = self._templates[draw_list] = [self._evaluator.add_template(template), error]
+            self._statistics.add_template()
+
+        return tpl_info
+
     def _compile_object_define_command(self, cmd):
         """Compile an object-define command.
 
@@ -131,45 +390,99 @@ class Compiler:
         :param cmd: The command.
         """
 
-        #  Save the object.
-        self._objects[cmd.get_target().get_target_name()] = {
-            "Visible": False,
-            "BaseX": 0,
-            "BaseY": 0,
-            "DrawList": cmd.get_draw_list()
-        }
+        #  Save the object (the draw list is compiled to a template once here).
+        template_idx, error = self._get_template(cmd.get_draw_list())
+        self._scene.define(_scene.SceneObject(cmd.get_target().get_target_name(),
+                                              cmd.get_draw_list(),
+                                              template_idx,
+                                              error))
+        self._budget.check_object_count(self._scene.get_object_count())
 
-    def _redraw_to_frame(self, frame):
-        """Redraw visible objects to a frame.
+    def _check_templates(self):
+        """Check the templates of visible objects.
 
-        :type frame: _ev.FrameEvaluator
-        :param frame: The frame evaluator.
+        :raise _error.CompilationError: Raise this exception if the template of an object can't be compiled.
         """
 
-        #  Clear the frame.
-        frame.emit_clear()
+        for obj in self._scene.iterate_display():
+            if obj.get_template_error() is not None:
+                raise _error.CompilationError(obj.get_template_error())
 
-        #  Draw objects.
-        for disp_id in range(0, len(self._display_list)):
-            #  Get the information.
-            obj_info = self._objects[self._display_list[disp_id]]
+    def _get_scene_state(self):
+        """Get the scene state (the template and the position of each visible object, in display order).
+
+        :rtype : tuple
+        :return: The state.
+        """
 
-            #  Do all draw commands.
-            dw_list = obj_info["DrawList"]
-            for dw_id in range(0, dw_list.get_command_count()):
-                self._compile_draw_command(obj_info["BaseX"], obj_info["BaseY"], dw_list.get_command(dw_id), frame)
+        return tuple([(obj.get_template(), obj.get_x(), obj.get_y()) for obj in self._scene.iterate_display()])
 
-    def _macro_redraw(self):
-        """(Macro) Redraw visible objects to a new animation frame."""
+    def _add_frame_references(self, frame_indexes):
+        """Add references to already emitted frames as new animation frames.
+
+        :type frame_indexes: list[int]
+        :param frame_indexes: The index of the frame of each new animation frame.
+        """
+
+        for frame_idx in frame_indexes:
+            self._evaluator.add_frame_reference(frame_idx)
+        self._count_frame(True, len(frame_indexes))
+        self._hand_frames()
+
+    def _add_state_frame(self, state):
+        """Draw a scene state to a new animation frame.
+
+        :type state: tuple
+        :param state: The scene state (see _get_scene_state(), the templates must have been checked).
+        """
 
         #  Create the frame.
-        frame = _ev.FrameEvaluator(self.get_canvas())
+        frame = self._evaluator.create_frame(self.get_canvas())
 
         #  Draw objects.
-        self._redraw_to_frame(frame)
+        frame.emit_clear()
+        for template_idx, x, y in state:
+            frame.emit_draw_template(template_idx, x, y)
 
         #  Add the frame.
         self._evaluator.add_frame(frame)
+        self._count_frame(False)
+        self._hand_frames()
+
+    def _redraw_state(self, state):
+        """Add a new animation frame of a scene state.
+
+        If the scene state is identical to the one of an already emitted frame, that frame is reused.
+
+        :type state: tuple
+        :param state: The scene state (see _get_scene_state(), the templates must have been checked).
+        :rtype : int
+        :return: The index of the emitted (or reused) frame.
+        """
+
+        #  Reuse the frame of the same scene state.
+        digest = get_state_digest(state)
+        frame_idx = self._scene_frames.get(digest)
+        if frame_idx is not None:
+            self._add_frame_references([frame_idx])
+            return frame_idx
+
+        #  Add the frame.
+        frame_idx = self._scene_frames[digest] = self._statistics.get_frame_count()
+        self._add_state_frame(state)
+
+        return frame_idx
+
+    def _macro_redraw(self):
+        """(Macro) Redraw visible objects to a new animation frame.
+
+        If the scene state is identical to the one of an already emitted frame, that frame is reused.
+
+        :raise _error.CompilationError: Raise this exception if the template of an object can't be compiled.
+        """
+
+        self._check_templates()
+        self._redraw_state(self._get_scene_state())
 
     def _compile_move_command(self, cmd):
         """Compile a move command.
@@ -185,20 +498,12 @@ class Compiler:
             position = cmd.get_position()
 
             #  Check target existence.
-            if target_name not in self._objects:
+            object_id = self._scene.get_object_id(target_name)
+            if object_id is None:
                 raise _error.CompilationError("No such target.")
 
-            #  Remove the existed display object.
-            if self._objects[target_name]["Visible"]:
-                self._display_list.remove(target_name)
-
-            #  Place the object to specified position.
-            self._objects[target_name]["BaseX"] = position.get_x().get_value()
-            self._objects[target_name]["BaseY"] = position.get_y().get_value()
-            self._objects[target_name]["Visible"] = True
-
-            #  Append the object onto the top of the list.
-            self._display_list.append(target_name)
+            #  Place the object to specified position (on the top of the display list).
+            self._scene.place(object_id, position.get_x().get_value(), position.get_y().get_value())
 
             #  Redraw.
             self._macro_redraw()
@@ -208,16 +513,18 @@ class Compiler:
             direction = cmd.get_direction()
 
             #  Check target existence.
-            if target_name not in self._objects:
+            object_id = self._scene.get_object_id(target_name)
+            if object_id is None:
                 raise _error.CompilationError("No such target.")
 
             #  Check target visibility.
-            if not self._objects[target_name]["Visible"]:
+            obj = self._scene.get_object(object_id)
+            if not obj.is_visible():
                 raise _error.CompilationError("Target hasn't been placed.")
 
             #  Calculate the new X and Y axis values.
-            x = self._objects[target_name]["BaseX"]
-            y = self._objects[target_name]["BaseY"]
+            x = obj.get_x()
+            y = obj.get_y()
             if direction.is_up():
                 y -= 1
             elif direction.is_down():
@@ -230,8 +537,7 @@ class Compiler:
                 raise _error.CompilationError("Invalid direction.")
 
             #  Set the new X and Y axis values.
-            self._objects[target_name]["BaseX"] = x
-            self._objects[target_name]["BaseY"] = y
+            obj.set_position(x, y)
 
             #  Redraw.
             self._macro_redraw()
@@ -240,32 +546,292 @@ class Compiler:
             target_name = cmd.get_target().get_target_name()
 
             #  Check target existence.
-            if target_name not in self._objects:
+            object_id = self._scene.get_object_id(target_name)
+            if object_id is None:
                 raise _error.CompilationError("No such target.")
 
             #  Check target visibility.
-            if not self._objects[target_name]["Visible"]:
+            if not self._scene.get_object(object_id).is_visible():
                 raise _error.CompilationError("Target hasn't been placed.")
 
-            #  Mark the object as 'Invisible'.
-            self._objects[target_name]["Visible"] = False
-
-            #  Remove the object from the display list.
-            self._display_list.remove(target_name)
+            #  Mark the object as 'Invisible' and remove it from the display list.
+            self._scene.erase(object_id)
 
             #  Redraw.
             self._macro_redraw()
         elif isinstance(cmd, _ast.LoopCommand):
-            #  Get repeat times and the move-command list.
-            times = int(cmd.get_times().get_value())
-            move_list = cmd.get_move_list()
+            self._compile_loop_command(cmd)
+        else:
+            raise _error.CompilationError("Invalid command.")
+
+    def _compile_loop_command(self, cmd):
+        """Compile a loop command.
+
+        Nested loops are executed with an explicit stack instead of recursion, so the nesting depth is not
+        limited by the recursion limit.
+
+        :type cmd: _ast.LoopCommand
+        :param cmd: The command.
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
 
-            #  Do repeating.
-            for i in range(0, times):
+        #  The stack of loop frames ([move list, next command index, remaining times]).
+        stack = []
+        self._push_loop_frame(stack, cmd)
+        self._run_loop_stack(stack)
+
+    def _begin_loop_iteration(self, stack):
+        """Handle the beginning of an iteration of a loop on the loop stack (the first iteration of a loop is not
+        included).
+
+        :type stack: list[list]
+        :param stack: The loop stack (see _run_loop_stack(), the top frame is the loop).
+        """
+
+        pass
+
+    def _run_loop_stack(self, stack):
+        """Compile the loops on a loop stack until the stack is empty.
+
+        :type stack: list[list]
+        :param stack: The loop stack (the frames are [move list, next command index, remaining times]).
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        while len(stack) != 0:
+            #  Loops may run long without producing frames (e.g. loops of empty loops).
+            self._budget.tick()
+
+            frame = stack[-1]
+            move_list = frame[0]
+
+            #  Start the next iteration (or leave the loop) at the end of the move list.
+            if frame[1] == move_list.get_command_count():
+                frame[2] -= 1
+                if frame[2] == 0:
+                    stack.pop()
+                    continue
+                frame[1] = 0
+                self._begin_loop_iteration(stack)
+
+            #  Get the next command.
+            mv_cmd = move_list.get_command(frame[1])
+            frame[1] += 1
+
+            #  Compile the command (or enter the nested loop).
+            if isinstance(mv_cmd, _ast.LoopCommand):
+                self._push_loop_frame(stack, mv_cmd)
+            else:
+                self._compile_move_command(mv_cmd)
+
+    def _push_loop_frame(self, stack, cmd):
+        """Push a loop frame onto the loop stack.
+
+        Loops whose body only contains place and shift commands are not pushed. Their first two iterations
+        are compiled step by step (so errors are raised at the right point) and the remaining iterations, which
+        can't raise errors, are compiled by _repeat_loop_body().
+
+        :type stack: list[list]
+        :type cmd: _ast.LoopCommand
+        :param stack: The loop stack.
+        :param cmd: The loop command.
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        #  Get repeat times and the move-command list.
+        times = int(cmd.get_times().get_value())
+        move_list = cmd.get_move_list()
+
+        #  Loops that do nothing are skipped.
+        if times <= 0 or move_list.get_command_count() == 0:
+            return
+
+        #  Compile loops of place and shift commands.
+        steps = self._get_loop_steps(move_list)
+        if steps is not None and times > 2 and self._is_loop_periodic(steps):
+            for _ in range(0, 2):
                 for mv_id in range(0, move_list.get_command_count()):
                     self._compile_move_command(move_list.get_command(mv_id))
-        else:
-            raise _error.CompilationError("Invalid command.")
+            self._repeat_loop_body(move_list, steps, times - 2)
+            return
+
+        stack.append([move_list, 0, times])
+
+    def _get_loop_steps(self, move_list):
+        """Analyse (once) a loop body that only contains place and shift commands.
+
+        :type move_list: _ast.MoveList
+        :param move_list: The loop body.
+        :rtype : tuple | None
+        :return: The steps ((target name, True, x, y) for place commands and (target name, False, dx, dy) for
+                 shift commands), or None if the body contains other commands.
+        """
+
+        if move_list in self._loop_steps:
+            return self._loop_steps[move_list]
+
+        steps = []
+        for mv_id in range(0, move_list.get_command_count()):
+            mv_cmd = move_list.get_command(mv_id)
+            if isinstance(mv_cmd, _ast.PlaceCommand):
+                position = mv_cmd.get_position()
+                steps.append((mv_cmd.get_target().get_target_name(), True,
+                              position.get_x().get_value(), position.get_y().get_value()))
+            elif isinstance(mv_cmd, _ast.ShiftCommand):
+                direction = mv_cmd.get_direction()
+                if direction.is_up():
+                    steps.append((mv_cmd.get_target().get_target_name(), False, 0, -1))
+                elif direction.is_down():
+                    steps.append((mv_cmd.get_target().get_target_name(), False, 0, 1))
+                elif direction.is_left():
+                    steps.append((mv_cmd.get_target().get_target_name(), False, -1, 0))
+                elif direction.is_right():
+                    steps.append((mv_cmd.get_target().get_target_name(), False, 1, 0))
+                else:
+                    steps = None
+                    break
+            else:
+                steps = None
+                break
+
+        if steps is not None:
+            steps = tuple(steps)
+        self._loop_steps[move_list] = steps
+
+        return steps
+
+    def _is_loop_periodic(self, steps):
+        """Get whether the scene repeats after two iterations of a loop body of place and shift commands.
+
+        Placing an object removes its earliest display entry only, so if a placed object is displayed more
+        than once (after being redefined), the display order keeps changing for more iterations.
+
+        :type steps: tuple
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :rtype : bool
+        :return: True if so.
+        """
+
+        for target_name, is_place, _, _ in steps:
+            if is_place:
+                object_id = self._scene.get_object_id(target_name)
+                if object_id is not None and self._scene.get_entry_count(object_id) > 1:
+                    return False
+
+        return True
+
+    @staticmethod
+    def _get_shift_deltas(steps):
+        """Get the deltas of the objects that are shifted (but never placed) by a loop body.
+
+        :type steps: tuple
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :rtype : dict[str, (list[int], list[int])]
+        :return: The X and Y axis deltas (in order) of each object.
+        """
+
+        placed = set([step[0] for step in steps if step[1]])
+        deltas = {}
+        for target_name, is_place, dx, dy in steps:
+            if is_place or target_name in placed:
+                continue
+            if target_name not in deltas:
+                deltas[target_name] = ([], [])
+            if dx != 0:
+                deltas[target_name][0].append(dx)
+            if dy != 0:
+                deltas[target_name][1].append(dy)
+
+        return deltas
+
+    def _step_loop_body(self, move_list, times):
+        """Compile iterations of a loop body command by command.
+
+        :type move_list: _ast.MoveList
+        :type times: int
+        :param move_list: The loop body.
+        :param times: The repeat times.
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        for _ in range(0, times):
+            for mv_id in range(0, move_list.get_command_count()):
+                self._compile_move_command(move_list.get_command(mv_id))
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands.
+
+        The loop body has already been compiled twice, so the scene repeats: the display order and the
+        positions of placed objects are the same in every iteration, and shifted objects move by the same
+        deltas. One more iteration is simulated to get the scene state of each step, and the states of later
+        iterations are extrapolated from them (so the commands are not simulated again). If the shifted objects
+        end each iteration where they started, the frames of later iterations are references to the frames of
+        that iteration.
+
+        If the positions of the shifted objects would be rounded (see is_exact_advance()), the iterations are
+        compiled command by command, so the rounding is the same.
+
+        :type move_list: _ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        """
+
+        #  Get the deltas of the shifted objects in one iteration.
+        scene = self._scene
+        iteration_deltas = {}
+        for target_name, deltas in self._get_shift_deltas(steps).items():
+            object_id = scene.get_object_id(target_name)
+            obj = scene.get_object(object_id)
+            if not is_exact_advance(obj.get_x(), deltas[0], times) or \
+                    not is_exact_advance(obj.get_y(), deltas[1], times):
+                self._step_loop_body(move_list, times)
+                return
+            iteration_deltas[object_id] = (sum(deltas[0]), sum(deltas[1]))
+
+        #  Simulate one iteration and get the scene state of each step (with the rows of the shifted objects).
+        step_states = []
+        step_frames = []
+        for target_name, is_place, x, y in steps:
+            object_id = scene.get_object_id(target_name)
+            obj = scene.get_object(object_id)
+            if is_place:
+                scene.place(object_id, x, y)
+            else:
+                obj.set_position(obj.get_x() + x, obj.get_y() + y)
+            state = self._get_scene_state()
+            rows = [(row, iteration_deltas[row_object_id])
+                    for row, row_object_id in enumerate(scene.iterate_display_id())
+                    if row_object_id in iteration_deltas and iteration_deltas[row_object_id] != (0, 0)]
+            step_states.append((state, rows))
+            step_frames.append(self._redraw_state(state))
+        times -= 1
+
+        #  Repeat the frames if the scene is the same after each iteration.
+        if all([delta == (0, 0) for delta in iteration_deltas.values()]):
+            for _ in range(0, times):
+                self._budget.tick()
+                self._add_frame_references(step_frames)
+            return
+
+        #  Extrapolate the positions of the shifted objects.
+        for iteration in range(1, times + 1):
+            self._budget.tick()
+            for state, rows in step_states:
+                if len(rows) != 0:
+                    state = list(state)
+                    for row, (dx, dy) in rows:
+                        template_idx, x, y = state[row]
+                        state[row] = (template_idx, x + dx * iteration, y + dy * iteration)
+                    state = tuple(state)
+                self._redraw_state(state)
+
+        #  Move the shifted objects to their final positions.
+        for object_id, (dx, dy) in iteration_deltas.items():
+            obj = scene.get_object(object_id)
+            obj.set_position(obj.get_x() + dx * times, obj.get_y() + dy * times)
 
     def compile_command(self, cmd):
         """Compile a command.
@@ -281,3 +847,174 @@ class Compiler:
             self._compile_move_command(cmd)
         else:
             raise _error.CompilationError("Invalid command.")
+
+    def iterate_frame(self, commands):
+        """Compile commands one by one and iterate the frames as soon as they are produced.
+
+        The frames are taken from the animation evaluator, so they are not kept after being yielded.
+
+        :type commands: collections.Iterable[_ast.CommandNode]
+        :param commands: The commands.
+        :rtype : collections.Iterable[xnilang.compiler.evaluator.FrameEvaluator | int]
+        :return: The frame iterator.
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        for cmd in commands:
+            #  Compile the command.
+            self.compile_command(cmd)
+
+            #  Yield its frames.
+            for frame in self._evaluator.take_frame():
+                yield frame
+
+
+class SymbolicCompiler(Compiler):
+    """Symbolic AST compiler class.
+
+    The commands are still simulated (to check errors and to count frames), but instead of emitting full
+    frames, each object definition is compiled once to a template and the move commands (with loops kept
+    symbolic) are emitted as a program for the player of the symbolic animation evaluator.
+    """
+
+    def __init__(self, evaluator, canvas, budget=None):
+        """Initialize the compiler.
+
+        :type canvas: str
+        :type evaluator: xnilang.compiler.evaluator.SymbolicAnimationEvaluator
+        :type budget: _budget.CompileBudget | None
+        :param evaluator: The symbolic animation evaluator.
+        :param canvas: The canvas.
+        :param budget: The compile budget (None if unlimited).
+        """
+
+        #  Let the base class initialize.
+        Compiler.__init__(self, evaluator, canvas, budget)
+
+        #  Initialize the set of redefined objects that are still displayed but can't be drawn.
+        self._pending_errors = set()
+
+    def _compile_object_define_command(self, cmd):
+        """Compile an object-define command.
+
+        :type cmd: _ast.ObjectDefineCommand
+        :param cmd: The command.
+        """
+
+        Compiler._compile_object_define_command(self, cmd)
+
+        #  The display entries of a redefined object draw the new record at the next redraw.
+        object_id = self._scene.get_object_id(cmd.get_target().get_target_name())
+        if self._scene.get_object(object_id).get_template_error() is not None and \
+                self._scene.is_displayed(object_id):
+            self._pending_errors.add(object_id)
+        else:
+            self._pending_errors.discard(object_id)
+
+    def _macro_redraw(self):
+        """(Macro) Count a new animation frame.
+
+        Instead of checking the templates of all visible objects, only the top object (the latest placed one)
+        and redefined objects are checked, since other objects have already been checked by earlier redraws.
+
+        :raise _error.CompilationError: Raise this exception if the template of an object can't be compiled.
+        """
+
+        #  Check the templates.
+        if len(self._pending_errors) != 0:
+            object_id = next(iter(self._pending_errors))
+            raise _error.CompilationError(self._scene.get_object(object_id).get_template_error())
+        top = self._scene.get_top_object()
+        if top is not None and top.get_template_error() is not None:
+            raise _error.CompilationError(top.get_template_error())
+
+        #  Count the frame.
+        self._evaluator.add_frame_count(1)
+        self._count_frame(False)
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands.
+
+        Only the frames are counted and the shifted objects are moved to their final positions.
+
+        :type move_list: _ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        """
+
+        #  Count the frames.
+        self._evaluator.add_frame_count(times * len(steps))
+        self._count_frame(False, times * len(steps))
+
+        #  Move the shifted objects.
+        for target_name, deltas in self._get_shift_deltas(steps).items():
+            obj = self._scene.get_object(self._scene.get_object_id(target_name))
+            obj.set_position(advance_position(obj.get_x(), deltas[0], times),
+                             advance_position(obj.get_y(), deltas[1], times))
+
+    def _emit_move_command(self, cmd):
+        """Emit a move command (and its nested loops) to the program.
+
+        :type cmd: _ast.MoveCommand
+        :param cmd: The command.
+        """
+
+        #  The stack of move-command iterators, the bottom one contains the command itself.
+        stack = [iter((cmd,))]
+
+        while len(stack) != 0:
+            mv_cmd = next(stack[-1], None)
+
+            #  Close the loop at the end of its move list.
+            if mv_cmd is None:
+                stack.pop()
+                if len(stack) != 0:
+                    self._evaluator.emit_loop_end()
+                continue
+
+            if isinstance(mv_cmd, _ast.PlaceCommand):
+                position = mv_cmd.get_position()
+                self._evaluator.emit_place(mv_cmd.get_target().get_target_name(),
+                                           position.get_x().get_value(),
+                                           position.get_y().get_value())
+            elif isinstance(mv_cmd, _ast.ShiftCommand):
+                direction = mv_cmd.get_direction()
+                dx = 0
+                dy = 0
+                if direction.is_up():
+                    dy = -1
+                elif direction.is_down():
+                    dy = 1
+                elif direction.is_left():
+                    dx = -1
+                elif direction.is_right():
+                    dx = 1
+                self._evaluator.emit_shift(mv_cmd.get_target().get_target_name(), dx, dy)
+            elif isinstance(mv_cmd, _ast.EraseCommand):
+                self._evaluator.emit_erase(mv_cmd.get_target().get_target_name())
+            elif isinstance(mv_cmd, _ast.LoopCommand):
+                move_list = mv_cmd.get_move_list()
+                self._evaluator.emit_loop_begin(int(mv_cmd.get_times().get_value()))
+                stack.append(iter([move_list.get_command(mv_id) for mv_id in range(0, move_list.get_command_count())]))
+
+    def compile_command(self, cmd):
+        """Compile a command.
+
+        :type cmd: _ast.CommandNode
+        :param cmd: The command.
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        #  Simulate the command.
+        Compiler.compile_command(self, cmd)
+
+        #  Emit the command.
+        if isinstance(cmd, _ast.ObjectDefineCommand):
+            target_name = cmd.get_target().get_target_name()
+            self._evaluator.emit_define(target_name,
+                                        self._scene.get_object(self._scene.get_object_id(target_name)).get_template())
+        else:
+            self._emit_move_command(cmd)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import zlib as _zlib
+
+#  Brotli is optional (the "br" encoding is only available if the module is installed).
+try:
+    import brotli as _brotli
+except ImportError:
+    _brotli = None
+
+#  Content encodings.
+ENCODING_GZIP = "gzip"
+ENCODING_BROTLI = "br"
+
+#  The window bits of the gzip format (the zlib window size and the gzip header flag).
+_GZIP_WBITS = 16 + _zlib.MAX_WBITS
+
+#  The default compression levels.
+_GZIP_LEVEL = 6
+_BROTLI_QUALITY = 5
+
+
+def get_encodings():
+    """Get the available content encodings (the preferred encoding first).
+
+    :rtype : list[str]
+    :return: The encodings.
+    """
+
+    if _brotli is None:
+        return [ENCODING_GZIP]
+
+    return [ENCODING_BROTLI, ENCODING_GZIP]
+
+
+class Compressor:
+    """Incremental compressor of a text (a sink of ScriptBuffer).
+
+    Written text is encoded as UTF-8 and compressed right away, so the compressed bytes are produced while the
+    text is emitted. The compressed bytes are kept until they are taken (see take_data()).
+    """
+
+    def __init__(self, encoding):
+        """Initialize the compressor.
+
+        :type encoding: str
+        :param encoding: The content encoding (one of get_encodings()).
+        :raise ValueError: Raise this exception if the encoding is not available.
+        """
+
+        if encoding not in get_encodings():
+            raise ValueError("Invalid encoding.")
+
+        self._encoding = encoding
+        if encoding == ENCODING_BROTLI:
+            self._compressor = _brotli.Compressor(mode=_brotli.MODE_TEXT, quality=_BROTLI_QUALITY)
+        else:
+            self._compressor = _zlib.compressobj(_GZIP_LEVEL, _zlib.DEFLATED, _GZIP_WBITS)
+        self._chunks = []
+        self._size = 0
+        self._finished = False
+
+    def get_encoding(self):
+        """Get the content encoding.
+
+        :rtype : str
+        :return: The encoding.
+        """
+
+        return self._encoding
+
+    def get_size(self):
+        """Get the size of the compressed bytes produced so far.
+
+        :rtype : int
+        :return: The size (in bytes).
+        """
+
+        return self._size
+
+    def _append(self, data):
+        """Keep compressed bytes.
+
+        :type data: bytes
+        :param data: The bytes.
+        """
+
+        if len(data) != 0:
+            self._chunks.append(data)
+            self._size += len(data)
+
+    def write(self, text):
+        """Compress a piece of text.
+
+        :type text: str
+        :param text: The piece.
+        :raise ValueError: Raise this exception if the compressor is finished.
+        """
+
+        if self._finished:
+            raise ValueError("Compressor is finished.")
+
+        data = text.encode("utf-8")
+        if self._encoding == ENCODING_BROTLI:
+            self._append(self._compressor.process(data))
+        else:
+            self._append(self._compressor.compress(data))
+
+    def flush(self):
+        """Flush the text written so far, so that it can be decompressed from the bytes taken so far.
+
+        :raise ValueError: Raise this exception if the compressor is finished.
+        """
+
+        if self._finished:
+            raise ValueError("Compressor is finished.")
+
+        if self._encoding == ENCODING_BROTLI:
+            self._append(self._compressor.flush())
+        else:
+            self._append(self._compressor.flush(_zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        """Finish the compressed stream (no text can be written after it)."""
+
+        if self._finished:
+            return
+
+        if self._encoding == ENCODING_BROTLI:
+            self._append(self._compressor.finish())
+        else:
+            self._append(self._compressor.flush(_zlib.Z_FINISH))
+        self._finished = True
+
+    def take_data(self):
+        """Take the compressed bytes kept in the compressor (the bytes are removed from the compressor).
+
+        :rtype : bytes
+        :return: The bytes.
+        """
+
+        data = b"".join(self._chunks)
+        self._chunks = []
+
+        return data
@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import base64 as _base64
+import json as _json
+import numpy as _np
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _ev
+
+#  Operation codes of templates (see PlayAnimation() in preview.js).
+_DATA_OP_MOVE = 0
+_DATA_OP_LINE = 1
+_DATA_OP_ARC = 2
+_DATA_OP_STROKE = 3
+_DATA_OP_FILL_STROKE = 4
+
+#  Encodings of the arrays of the animation data.
+ENCODING_BASE64 = "base64"
+ENCODING_JSON = "json"
+
+
+def _to_json_number(value):
+    """Convert a value of a Float32 array to the number written to a JSON array.
+
+    The arrays only hold values (preview.js reads every number as a JavaScript number), so the source format of
+    the values (e.g. "10" or "10.0") is not kept in any encoding. Integral values are written without a fraction
+    to keep the JSON arrays short.
+
+    :type value: float
+    :param value: The value.
+    :rtype : int | float
+    :return: The number.
+    """
+
+    if value.is_integer() and abs(value) < 2 ** 53:
+        return int(value)
+
+    return value
+
+
+class DataTemplateEvaluator(_ev.DrawEvaluator):
+    """Data template evaluator.
+
+    Instead of codes, draw commands are emitted as operation codes and coordinates (relative to the position
+    of the object):
+
+        MOVE x y          Begin a path and move to a point.
+        LINE x y          Draw a line to a point.
+        ARC x y radius    Begin a path and draw a circle.
+        STROKE            Close the path and stroke it.
+        FILL_STROKE       Close the path, fill and stroke it.
+    """
+
+    def __init__(self):
+        """Initialize the evaluator."""
+
+        #  Let the base class initialize.
+        _ev.DrawEvaluator.__init__(self)
+
+        #  Initialize the operations and their coordinates.
+        self._ops = []
+        self._coords = []
+
+    def get_ops(self):
+        """Get the emitted operation codes.
+
+        :rtype : list[int]
+        :return: The operation codes.
+        """
+
+        return self._ops
+
+    def get_coords(self):
+        """Get the coordinates of the emitted operations.
+
+        :rtype : list[int | float]
+        :return: The coordinates.
+        """
+
+        return self._coords
+
+    def _emit_path(self, path, close_op):
+        """Emit operations of drawing a path.
+
+        :type path: list[(int | float, int | float)]
+        :type close_op: int
+        :param path: The path.
+        :param close_op: The operation that closes the path.
+        :raise ValueError: Raise this exception if the path has less than 3 points.
+        """
+
+        #  Safe check.
+        if len(path) < 3:
+            raise ValueError("Invalid path.")
+
+        self._ops.append(_DATA_OP_MOVE)
+        self._ops.extend([_DATA_OP_LINE] * (len(path) - 1))
+        self._ops.append(close_op)
+        for x, y in path:
+            self._coords.append(x)
+            self._coords.append(y)
+
+    def emit_draw_line(self, x1, y1, x2, y2):
+        """Emit operations of drawing a line.
+
+        :type x1: int | float
+        :type y1: int | float
+        :type x2: int | float
+        :type y2: int | float
+        :param x1: The X axis value of the first point.
+        :param y1: The Y axis value of the first point.
+        :param x2: The X axis value of the second point.
+        :param y2: The Y axis value of the second point.
+        """
+
+        self._ops.extend([_DATA_OP_MOVE, _DATA_OP_LINE, _DATA_OP_STROKE])
+        self._coords.extend([x1, y1, x2, y2])
+
+    def emit_draw_circle(self, x, y, radius):
+        """Emit operations of drawing a circle.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        """
+
+        self._ops.extend([_DATA_OP_ARC, _DATA_OP_STROKE])
+        self._coords.extend([x, y, radius])
+
+    def emit_draw_path(self, path):
+        """Emit operations of drawing a path.
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        """
+
+        self._emit_path(path, _DATA_OP_STROKE)
+
+    def emit_draw_circle_area(self, x, y, radius):
+        """Emit operations of drawing a circle area.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        """
+
+        self._ops.extend([_DATA_OP_ARC, _DATA_OP_FILL_STROKE])
+        self._coords.extend([x, y, radius])
+
+    def emit_draw_path_area(self, path):
+        """Emit operations of drawing a closed path area.
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        """
+
+        self._emit_path(path, _DATA_OP_FILL_STROKE)
+
+
+class AnimationData:
+    """Animation data (the data-driven output format).
+
+    The animation is stored as typed arrays that are played by the generic player in preview.js
+    (PlayAnimation()), so the emitted script doesn't grow with code for each frame:
+
+        ops               Uint8     The operations of all templates (see DataTemplateEvaluator).
+        coords            Float32   The coordinates of the operations.
+        template_ops      Uint32    The first operation of each template (and the operation count at the end).
+        template_coords   Uint32    The first coordinate of each template.
+        state_offsets     Uint32    The first row of each scene state (and the row count at the end).
+        row_templates     Uint32    The template of each row (a row is a drawn object of a scene state).
+        row_positions     Float32   The position (x, y) of each row.
+        frames            Uint32    The scene state of each frame (frames of the same state share the rows).
+    """
+
+    def __init__(self, interval, loop, arrays):
+        """Initialize the data.
+
+        :type interval: int
+        :type loop: bool
+        :type arrays: dict[str, numpy.ndarray]
+        :param interval: The interval.
+        :param loop: Loop flag.
+        :param arrays: The arrays (name -> array, see the class description).
+        """
+
+        self._interval = interval
+        self._loop = loop
+        self._arrays = arrays
+
+    def get_interval(self):
+        """Get the interval.
+
+        :rtype : int
+        :return: The interval.
+        """
+
+        return self._interval
+
+    def is_loop(self):
+        """Get whether the animation is looped.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._loop
+
+    def get_frame_count(self):
+        """Get the frame count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._arrays["frames"])
+
+    def get_array(self, name):
+        """Get an array.
+
+        :type name: str
+        :param name: The array name (see the class description).
+        :rtype : numpy.ndarray
+        :return: The array (float64 for Float32 arrays, which are only narrowed when they are encoded).
+        :raise KeyError: Raise this exception if there is no such array.
+        """
+
+        return self._arrays[name]
+
+    def get_script(self, encoding=ENCODING_BASE64):
+        """Get the data as a JavaScript object (the argument of PlayAnimation()).
+
+        With the base64 encoding, each array is the base64 string of its bytes (little-endian). With the JSON
+        encoding, each array is a list of numbers.
+
+        :type encoding: str
+        :param encoding: The encoding of the arrays (ENCODING_BASE64 or ENCODING_JSON).
+        :rtype : str
+        :return: The script.
+        :raise ValueError: Raise this exception if the encoding is invalid.
+        """
+
+        if encoding not in [ENCODING_BASE64, ENCODING_JSON]:
+            raise ValueError("Invalid encoding.")
+
+        data = {"interval": self.get_interval(), "loop": self.is_loop()}
+        for name, array in sorted(self._arrays.items()):
+            if encoding == ENCODING_JSON:
+                if array.dtype == _np.float64:
+                    data[name] = [_to_json_number(value) for value in array.tolist()]
+                else:
+                    data[name] = array.tolist()
+            else:
+                if array.dtype == _np.float64:
+                    array = array.astype("<f4")
+                else:
+                    array = array.astype(array.dtype.newbyteorder("<"))
+                data[name] = _base64.b64encode(array.tobytes()).decode("ascii")
+
+        return _json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+
+def emit_data(timeline, interval, loop):
+    """Emit a timeline as animation data (the data-driven backend).
+
+    :type timeline: xnilang.compiler.timeline.Timeline
+    :type interval: int
+    :type loop: bool
+    :param timeline: The timeline.
+    :param interval: The interval.
+    :param loop: Loop flag.
+    :rtype : AnimationData
+    :return: The animation data.
+    """
+
+    #  Compile templates (templates that can't be compiled are never drawn, they are emitted empty).
+    ops = []
+    coords = []
+    template_ops = [0]
+    template_coords = [0]
+    for template_idx in range(0, timeline.get_template_count()):
+        template = DataTemplateEvaluator()
+        if timeline.get_template_error(template_idx) is None:
+            draw_list = timeline.get_draw_list(template_idx)
+            for dw_id in range(0, draw_list.get_command_count()):
+                _compiler.Compiler._compile_draw_command(0, 0, draw_list.get_command(dw_id), template)
+        ops.extend(template.get_ops())
+        coords.extend(template.get_coords())
+        template_ops.append(len(ops))
+        template_coords.append(len(coords))
+
+    #  Number the scene states (frames of the same state share the rows, just like Compiler reuses frames).
+    offsets = timeline.get_offsets().tolist()
+    templates = timeline.get_templates().tolist()
+    xs = timeline.get_xs().tolist()
+    ys = timeline.get_ys().tolist()
+    scene_states = {}
+    frames = []
+    state_rows = []
+    for frame_idx in range(0, timeline.get_frame_count()):
+        first = offsets[frame_idx]
+        last = offsets[frame_idx + 1]
+        state = tuple(zip(templates[first:last], xs[first:last], ys[first:last]))
+        state_idx = scene_states.get(state)
+        if state_idx is None:
+            state_idx = scene_states[state] = len(state_rows)
+            state_rows.append((first, last))
+        frames.append(state_idx)
+
+    #  Gather the rows of the scene states.
+    if len(state_rows) == 0:
+        rows = _np.zeros(0, dtype=_np.int64)
+    else:
+        rows = _np.concatenate([_np.arange(first, last, dtype=_np.int64) for first, last in state_rows])
+    state_offsets = _np.cumsum([0] + [last - first for first, last in state_rows])
+    row_positions = _np.empty(2 * len(rows), dtype=_np.float64)
+    row_positions[0::2] = timeline.get_xs()[rows]
+    row_positions[1::2] = timeline.get_ys()[rows]
+
+    return AnimationData(interval, loop, {
+        "ops": _np.array(ops, dtype=_np.uint8),
+        "coords": _np.array(coords, dtype=_np.float64),
+        "template_ops": _np.array(template_ops, dtype=_np.uint32),
+        "template_coords": _np.array(template_coords, dtype=_np.uint32),
+        "state_offsets": state_offsets.astype(_np.uint32),
+        "row_templates": timeline.get_templates()[rows].astype(_np.uint32),
+        "row_positions": row_positions,
+        "frames": _np.array(frames, dtype=_np.uint32)
+    })
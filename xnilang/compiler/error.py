@@ -12,3 +12,9 @@ class CompilationError(Exception):
     """Compilation error exception."""
 
     pass
+
+
+class BudgetExceededError(CompilationError):
+    """Compile budget exceeded exception (see xnilang.compiler.budget.CompileBudget)."""
+
+    pass
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import xnilang.compiler.evaluator as _ev
+import xnilang.parser.ast as _ast
+
+#  The approximate size of a line of a template (a canvas call).
+_TEMPLATE_LINE_BYTES = 28
+
+#  The approximate size of the call that draws a template in a frame.
+_DRAW_CALL_BYTES = len("$templates[0]($ctx, 100, 100);\n")
+
+
+class CostEstimator:
+    """Static cost estimator.
+
+    The estimator walks the AST of the top-level commands (without compiling them) and predicts the count of
+    frames, the count of draw calls (draw commands of visible objects, summed over all frames) and the size of
+    the script emitted by AnimationEvaluator.
+
+    The frame count is exact unless the compilation fails. Loop bodies are walked once (or twice, see
+    _add_move_command()) and their cost is multiplied by the repeat times, so the draw calls are exact when the
+    visible objects are the same in the remaining iterations. The emitted size is approximate (frames that are
+    identical to earlier frames are emitted as short references, which makes it an overestimate for such
+    scripts).
+    """
+
+    def __init__(self, canvas="main"):
+        """Initialize the estimator.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        """
+
+        #  Get the size of an empty frame and of the script around the frames.
+        frame = _ev.FrameEvaluator(canvas)
+        frame.emit_clear()
+        animation = _ev.AnimationEvaluator(20, True)
+        self._frame_bytes = len("$frames.push(function() {%s});\n" % frame.get_script())
+        self._output_bytes = len(animation.get_script_head()) + len(animation.get_script_tail())
+
+        #  Initialize the counters.
+        self._frame_count = 0
+        self._draw_call_count = 0
+        self._max_draw_call_count = 0
+
+        #  Initialize the objects (name -> count of draw commands), the templates and the display list (name ->
+        #  count of display entries).
+        self._objects = {}
+        self._templates = set()
+        self._visible = set()
+        self._entries = {}
+        self._entry_count = 0
+        self._frame_draw_calls = 0
+
+        #  Initialize the version of the display list (increased when the display list changes).
+        self._display_version = 0
+
+    def get_frame_count(self):
+        """Get the estimated count of frames.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def get_draw_call_count(self):
+        """Get the estimated count of draw calls (summed over all frames).
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._draw_call_count
+
+    def get_max_draw_call_count(self):
+        """Get the estimated maximum count of draw calls of a frame.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._max_draw_call_count
+
+    def get_output_bytes(self):
+        """Get the estimated size of the emitted script.
+
+        :rtype : int
+        :return: The size in bytes.
+        """
+
+        return self._output_bytes
+
+    @staticmethod
+    def _get_template_bytes(draw_list):
+        """Get the approximate size of the template of a draw list.
+
+        :type draw_list: _ast.DrawList
+        :param draw_list: The draw list.
+        :rtype : int
+        :return: The size in bytes.
+        """
+
+        lines = 0
+        for dw_id in range(0, draw_list.get_command_count()):
+            cmd = draw_list.get_command(dw_id)
+            if isinstance(cmd, _ast.LineCommand):
+                lines += 5
+            elif isinstance(cmd, _ast.CircleCommand):
+                lines += 4
+            elif isinstance(cmd, _ast.CircleAreaCommand):
+                lines += 5
+            elif isinstance(cmd, _ast.SquareAreaCommand):
+                lines += 7
+            elif isinstance(cmd, _ast.ClosedPathCommand):
+                lines += cmd.get_path().get_point_count() + 3
+            elif isinstance(cmd, _ast.ClosedPathAreaCommand):
+                lines += cmd.get_path().get_point_count() + 4
+
+        return lines * _TEMPLATE_LINE_BYTES
+
+    def _add_object_define_command(self, cmd):
+        """Estimate an object-define command.
+
+        :type cmd: _ast.ObjectDefineCommand
+        :param cmd: The command.
+        """
+
+        name = cmd.get_target().get_target_name()
+        draw_list = cmd.get_draw_list()
+        draw_calls = draw_list.get_command_count()
+
+        #  Each template is emitted once.
+        if draw_list not in self._templates:
+            self._templates.add(draw_list)
+            self._output_bytes += self._get_template_bytes(draw_list)
+
+        #  The display entries of the object draw the new record (which is invisible until it's placed).
+        entries = self._entries.get(name, 0)
+        self._frame_draw_calls += entries * (draw_calls - self._objects.get(name, 0))
+        self._objects[name] = draw_calls
+        self._entries[name] = entries
+        self._visible.discard(name)
+
+    def _add_frame(self, level):
+        """Estimate a frame.
+
+        :type level: list
+        :param level: The innermost loop level (see _add_move_command()).
+        """
+
+        level[2] += 1
+        level[3] += self._frame_draw_calls
+        level[4] += self._frame_bytes + self._entry_count * _DRAW_CALL_BYTES
+        if self._frame_draw_calls > self._max_draw_call_count:
+            self._max_draw_call_count = self._frame_draw_calls
+
+    def _add_move_command(self, cmd):
+        """Estimate a move command.
+
+        Nested loops are walked with an explicit stack instead of recursion, so the nesting depth is not
+        limited by the recursion limit. If the first iteration of an innermost loop changes the display list,
+        its body is walked once more and the cost of the second iteration is used for the remaining ones.
+
+        :type cmd: _ast.MoveCommand
+        :param cmd: The command.
+        """
+
+        #  The stack of loop levels ([command iterator, repeat times, frames, draw calls, bytes, commands, display
+        #  version at the start of the iteration, totals of the first iteration]), the bottom one contains the
+        #  command itself.
+        stack = [[iter((cmd,)), 1, 0, 0, 0, (cmd,), self._display_version, None]]
+
+        while True:
+            level = stack[-1]
+            mv_cmd = next(level[0], None)
+
+            if mv_cmd is None:
+                times = level[1]
+
+                #  Walk the second iteration of an innermost loop whose first iteration changed the display list.
+                if times > 1 and level[7] is None and level[6] != self._display_version and \
+                        not any([isinstance(body_cmd, _ast.LoopCommand) for body_cmd in level[5]]):
+                    level[0] = iter(level[5])
+                    level[7] = level[2:5]
+                    level[2:5] = [0, 0, 0]
+                    continue
+
+                #  Multiply the totals of a loop body by its repeat times at the end of the loop.
+                stack.pop()
+                if len(stack) == 0:
+                    break
+                for total_id in range(2, 5):
+                    if level[7] is None:
+                        stack[-1][total_id] += level[total_id] * times
+                    else:
+                        stack[-1][total_id] += level[7][total_id - 2] + level[total_id] * (times - 1)
+                continue
+
+            if isinstance(mv_cmd, _ast.PlaceCommand):
+                #  A placed object keeps one display entry (a new one if it was invisible).
+                name = mv_cmd.get_target().get_target_name()
+                if name in self._objects and name not in self._visible:
+                    self._visible.add(name)
+                    self._entries[name] += 1
+                    self._entry_count += 1
+                    self._frame_draw_calls += self._objects[name]
+                    self._display_version += 1
+                self._add_frame(level)
+            elif isinstance(mv_cmd, _ast.ShiftCommand):
+                self._add_frame(level)
+            elif isinstance(mv_cmd, _ast.EraseCommand):
+                #  An erased object loses one display entry.
+                name = mv_cmd.get_target().get_target_name()
+                if name in self._visible:
+                    self._visible.discard(name)
+                    self._entries[name] -= 1
+                    self._entry_count -= 1
+                    self._frame_draw_calls -= self._objects[name]
+                    self._display_version += 1
+                self._add_frame(level)
+            elif isinstance(mv_cmd, _ast.LoopCommand):
+                #  Walk the loop body.
+                times = int(mv_cmd.get_times().get_value())
+                if times > 0:
+                    move_list = mv_cmd.get_move_list()
+                    commands = [move_list.get_command(mv_id) for mv_id in range(0, move_list.get_command_count())]
+                    stack.append([iter(commands), times, 0, 0, 0, commands, self._display_version, None])
+
+        #  Save the totals.
+        frames, draw_calls, output_bytes = level[2:5]
+        self._frame_count += frames
+        self._draw_call_count += draw_calls
+        self._output_bytes += output_bytes
+
+    def add_command(self, cmd):
+        """Estimate a top-level command.
+
+        :type cmd: _ast.CommandNode
+        :param cmd: The command.
+        """
+
+        if isinstance(cmd, _ast.ObjectDefineCommand):
+            self._add_object_define_command(cmd)
+        elif isinstance(cmd, _ast.MoveCommand):
+            self._add_move_command(cmd)
+
+
+def estimate_cost(commands, canvas="main"):
+    """Estimate the cost of compiling commands (see CostEstimator).
+
+    :type commands: collections.Iterable[_ast.CommandNode]
+    :type canvas: str
+    :param commands: The top-level commands.
+    :param canvas: The canvas name.
+    :rtype : CostEstimator
+    :return: The estimator (with the estimate of all commands).
+    """
+
+    estimator = CostEstimator(canvas)
+    for cmd in commands:
+        estimator.add_command(cmd)
+
+    return estimator
@@ -7,37 +7,133 @@
 #  holder listed above.
 #
 
+#  Import other modules.
+import functools as _functools
+import xnilang.compiler.budget as _budget
 
-class FrameEvaluator:
-    """Frame evaluator."""
+#  The default size of the chunks of a script buffer.
+_CHUNK_SIZE = 1 << 16
 
-    def __init__(self, canvas):
-        """Initialize the evaluator.
+#  The startup codes of frames (canvas name -> codes).
+_FRAME_STARTUP_CODES = {}
 
-        :type canvas: str
-        :param canvas: The canvas name.
+#  The default count of decimals of coordinates in the minified mode.
+_MIN_DECIMALS = 2
+
+#  The largest float that is printed as an integer in the minified mode.
+_MIN_INTEGRAL_LIMIT = 2 ** 53
+
+
+class ScriptBuffer:
+    """Chunked script buffer.
+
+    Written pieces are collected in a list and joined once per chunk (about 64KB), so a script is never copied
+    again as it grows. Each full chunk is written to the sink (any object with a write(str) method) or kept in
+    the buffer until it's taken (see take_chunks() and get_script()).
+    """
+
+    def __init__(self, sink=None, chunk_size=_CHUNK_SIZE):
+        """Initialize the buffer.
+
+        :type chunk_size: int
+        :param sink: The sink (None if the chunks are kept in the buffer).
+        :param chunk_size: The chunk size.
         """
 
-        #  Initialize the script.
-        self._script = ""
+        self._sink = sink
+        self._chunk_size = chunk_size
+        self._pieces = []
+        self._piece_size = 0
+        self._chunks = []
+        self._size = 0
 
-        #  Save the canvas name.
-        self._canvas = canvas
+    def get_size(self):
+        """Get the size of the script written so far.
 
-        #  Emit the startup code.
-        self._append_line("var $ctx = %s.getContext(\"2d\");" % canvas)
-        self._append_line("$ctx.fillStyle = \"rgb(255, 255, 255)\";")
-        self._append_line("$ctx.strokeStyle = \"rgb(0, 0, 0)\";")
-        self._append_line("$ctx.lineWidth = 2;")
+        :rtype : int
+        :return: The size (in characters).
+        """
 
-    def get_canvas(self):
-        """Get the canvas name.
+        return self._size + self._piece_size
+
+    def _end_chunk(self):
+        """Join the pieces to a chunk and write the chunk to the sink (or keep it)."""
+
+        if len(self._pieces) == 0:
+            return
+
+        chunk = "".join(self._pieces)
+        self._pieces = []
+        self._size += self._piece_size
+        self._piece_size = 0
+        if self._sink is not None:
+            self._sink.write(chunk)
+        else:
+            self._chunks.append(chunk)
+
+    def write(self, text):
+        """Write a piece of the script.
+
+        :type text: str
+        :param text: The piece.
+        """
+
+        self._pieces.append(text)
+        self._piece_size += len(text)
+        if self._piece_size >= self._chunk_size:
+            self._end_chunk()
+
+    def write_pieces(self, pieces):
+        """Write pieces of the script.
+
+        :type pieces: list[str]
+        :param pieces: The pieces.
+        """
+
+        self._pieces.extend(pieces)
+        self._piece_size += sum(map(len, pieces))
+        if self._piece_size >= self._chunk_size:
+            self._end_chunk()
+
+    def flush(self):
+        """Write the pending pieces as a chunk (even if the chunk isn't full)."""
+
+        self._end_chunk()
+
+    def take_chunks(self):
+        """Take the full chunks kept in the buffer (the chunks are removed from the buffer).
+
+        :rtype : list[str]
+        :return: The chunks.
+        """
+
+        chunks = self._chunks
+        self._chunks = []
+
+        return chunks
+
+    def get_script(self):
+        """Get the script kept in the buffer (the chunks that haven't been taken and the pending pieces).
 
         :rtype : str
-        :return: The name.
+        :return: The script.
         """
 
-        return self._canvas
+        self._end_chunk()
+        if len(self._chunks) != 1:
+            self._chunks = ["".join(self._chunks)]
+
+        return self._chunks[0]
+
+
+class DrawEvaluator:
+    """Base evaluator of draw commands."""
+
+    def __init__(self):
+        """Initialize the evaluator."""
+
+        #  Initialize the lines of the script.
+        self._lines = []
 
     def _append_line(self, line):
         """Append a line to the script.
@@ -46,13 +142,20 @@ class FrameEvaluator:
         :param line: The line.
         """
 
-        self._script += line
-        self._script += "\n"
+        self._lines.append(line + "\n")
 
-    def emit_clear(self):
-        """Emit codes of clearing the canvas."""
+    def _format_point(self, x, y):
+        """Format the coordinates of a point.
 
-        self._append_line("$ctx.clearRect(0, 0, %s.width, %s.height);" % (self.get_canvas(), self.get_canvas()))
+        :type x: int | float
+        :type y: int | float
+        :param x: The X axis value.
+        :param y: The Y axis value.
+        :rtype : str
+        :return: The formatted coordinates.
+        """
+
+        return "%s, %s" % (x, y)
 
     def emit_draw_line(self, x1, y1, x2, y2):
         """Emit codes of drawing a line.
@@ -68,8 +171,8 @@ class FrameEvaluator:
         """
 
         self._append_line("$ctx.beginPath();")
-        self._append_line("$ctx.moveTo(%s, %s);" % (str(x1), str(y1)))
-        self._append_line("$ctx.lineTo(%s, %s);" % (str(x2), str(y2)))
+        self._append_line("$ctx.moveTo(%s);" % self._format_point(x1, y1))
+        self._append_line("$ctx.lineTo(%s);" % self._format_point(x2, y2))
         self._append_line("$ctx.closePath();")
         self._append_line("$ctx.stroke();")
 
@@ -85,7 +188,7 @@ class FrameEvaluator:
         """
 
         self._append_line("$ctx.beginPath();")
-        self._append_line("$ctx.arc(%s, %s, %s, 0, 2 * Math.PI, false);" % (str(x), str(y), str(radius)))
+        self._append_line("$ctx.arc(%s, %s, 0, 2 * Math.PI, false);" % (self._format_point(x, y), radius))
         self._append_line("$ctx.closePath();")
         self._append_line("$ctx.stroke();")
 
@@ -105,12 +208,12 @@ class FrameEvaluator:
 
         #  Move the cursor to the first point.
         initial_point = path[0]
-        self._append_line("$ctx.moveTo(%s, %s);" % (str(initial_point[0]), str(initial_point[1])))
+        self._append_line("$ctx.moveTo(%s);" % self._format_point(initial_point[0], initial_point[1]))
 
         #  Draw the path.
         for point_id in range(1, len(path)):
             x, y = path[point_id]
-            self._append_line("$ctx.lineTo(%s, %s);" % (str(x), str(y)))
+            self._append_line("$ctx.lineTo(%s);" % self._format_point(x, y))
 
         #  Close the path, stroke and fill.
         self._append_line("$ctx.closePath();")
@@ -128,7 +231,7 @@ class FrameEvaluator:
         """
 
         self._append_line("$ctx.beginPath();")
-        self._append_line("$ctx.arc(%s, %s, %s, 0, 2 * Math.PI, false);" % (str(x), str(y), str(radius)))
+        self._append_line("$ctx.arc(%s, %s, 0, 2 * Math.PI, false);" % (self._format_point(x, y), radius))
         self._append_line("$ctx.closePath();")
         self._append_line("$ctx.fill();")
         self._append_line("$ctx.stroke();")
@@ -149,12 +252,12 @@ class FrameEvaluator:
 
         #  Move the cursor to the first point.
         initial_point = path[0]
-        self._append_line("$ctx.moveTo(%s, %s);" % (str(initial_point[0]), str(initial_point[1])))
+        self._append_line("$ctx.moveTo(%s);" % self._format_point(initial_point[0], initial_point[1]))
 
         #  Draw the path.
         for point_id in range(1, len(path)):
             x, y = path[point_id]
-            self._append_line("$ctx.lineTo(%s, %s);" % (str(x), str(y)))
+            self._append_line("$ctx.lineTo(%s);" % self._format_point(x, y))
 
         #  Close the path, stroke and fill.
         self._append_line("$ctx.closePath();")
@@ -181,6 +284,70 @@ class FrameEvaluator:
                                   (x + half_width, y + half_height),
                                   (x - half_width, y + half_height)])
 
+
+class FrameEvaluator(DrawEvaluator):
+    """Frame evaluator."""
+
+    def __init__(self, canvas):
+        """Initialize the evaluator.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        """
+
+        #  Let the base class initialize.
+        DrawEvaluator.__init__(self)
+
+        #  Save the canvas name.
+        self._canvas = canvas
+
+        #  Emit the startup code (one piece, formatted once per canvas).
+        startup = _FRAME_STARTUP_CODES.get(canvas)
+        if startup is None:
+            startup = _FRAME_STARTUP_CODES[canvas] = "var $ctx = %s.getContext(\"2d\");\n" \
+                                                     "$ctx.fillStyle = \"rgb(255, 255, 255)\";\n" \
+                                                     "$ctx.strokeStyle = \"rgb(0, 0, 0)\";\n" \
+                                                     "$ctx.lineWidth = 2;\n" % canvas
+        self._lines.append(startup)
+
+    def get_canvas(self):
+        """Get the canvas name.
+
+        :rtype : str
+        :return: The name.
+        """
+
+        return self._canvas
+
+    def emit_clear(self):
+        """Emit codes of clearing the canvas."""
+
+        self._append_line("$ctx.clearRect(0, 0, %s.width, %s.height);" % (self.get_canvas(), self.get_canvas()))
+
+    def emit_draw_template(self, template_idx, x, y):
+        """Emit codes of drawing a template (see AnimationEvaluator.add_template()) at a position.
+
+        :type template_idx: int
+        :type x: int | float
+        :type y: int | float
+        :param template_idx: The template index.
+        :param x: The X axis value of the position.
+        :param y: The Y axis value of the position.
+        """
+
+        self._lines.append("$templates[%d]($ctx, %s, %s);\n" % (template_idx, x, y))
+
+    def write_script(self, buffer):
+        """Write the emitted script to a buffer.
+
+        :type buffer: ScriptBuffer
+        :param buffer: The buffer.
+        """
+
+        buffer.write("{\n")
+        buffer.write_pieces(self._lines)
+        buffer.write("}")
+
     def get_script(self):
         """Get the emitted script.
 
@@ -188,100 +355,1043 @@ class FrameEvaluator:
         :return: The script.
         """
 
-        return "{\n%s}" % self._script
+        return "{\n%s}" % "".join(self._lines)
 
 
-class AnimationEvaluator:
-    """Animation evaluator."""
+class TemplateEvaluator(DrawEvaluator):
+    """Template evaluator.
 
-    def __init__(self, interval, loop):
-        """Initialize the animation evaluator.
+    A template is a JavaScript function ($ctx, $x, $y) that draws an object at a position. Coordinates passed
+    to the evaluator are relative to the position, and they are added to the position in the same order as
+    the compiler adds them to the base of an object, so the drawing is identical.
+    """
 
-        :type interval: int
-        :type loop: bool
-        :param interval: The interval.
-        :param loop: Loop flag.
+    def _format_point(self, x, y):
+        """Format the coordinates of a point (relative to the position).
+
+        :type x: int | float | str
+        :type y: int | float | str
+        :param x: The X axis value.
+        :param y: The Y axis value.
+        :rtype : str
+        :return: The formatted coordinates.
         """
 
-        self._frames = []
-        self._interval = interval
-        self._loop = loop
+        return "$x + %s, $y + %s" % (x, y)
 
-    def get_interval(self):
-        """Get the interval.
+    def emit_draw_square_area(self, x, y, width, height):
+        """Emit codes of drawing a square area.
+
+        :type x: int | float
+        :type y: int | float
+        :type width: int | float
+        :type height: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param width: The square width.
+        :param height: The square height.
+        """
+
+        #  The corners are computed from the absolute center, just like FrameEvaluator does.
+        half_width = width / 2
+        half_height = height / 2
+        self.emit_draw_path_area([("%s - %s" % (str(x), str(half_width)), "%s - %s" % (str(y), str(half_height))),
+                                  ("%s + %s" % (str(x), str(half_width)), "%s - %s" % (str(y), str(half_height))),
+                                  ("%s + %s" % (str(x), str(half_width)), "%s + %s" % (str(y), str(half_height))),
+                                  ("%s - %s" % (str(x), str(half_width)), "%s + %s" % (str(y), str(half_height)))])
+
+    def write_script(self, buffer):
+        """Write the emitted script (a function expression) to a buffer.
+
+        :type buffer: ScriptBuffer
+        :param buffer: The buffer.
+        """
+
+        buffer.write("function($ctx, $x, $y) {\n")
+        buffer.write_pieces(self._lines)
+        buffer.write("}")
+
+    def get_script(self):
+        """Get the emitted script.
+
+        :rtype : str
+        :return: The script (a function expression).
+        """
+
+        return "function($ctx, $x, $y) {\n%s}" % "".join(self._lines)
+
+
+class MinDrawEvaluator(DrawEvaluator):
+    """Base evaluator of draw commands in the minified mode.
+
+    Canvas methods are called through the short aliases defined by MinAnimationEvaluator (b: beginPath,
+    m: moveTo, l: lineTo, a: full-circle arc, c: closePath, s: stroke, f: fill, k: clear the canvas) on the
+    context $c, statements are not separated by newlines, and float coordinates are rounded to a count of
+    decimals (integral values are printed as integers).
+    """
+
+    def __init__(self, decimals=_MIN_DECIMALS):
+        """Initialize the evaluator.
+
+        :type decimals: int
+        :param decimals: The count of decimals of coordinates.
+        :raise ValueError: Raise this exception if the count of decimals is negative.
+        """
+
+        if decimals < 0:
+            raise ValueError("Invalid count of decimals.")
+
+        #  Let the base class initialize.
+        DrawEvaluator.__init__(self)
+
+        #  Save the count of decimals.
+        self._decimals = decimals
+
+    def get_decimals(self):
+        """Get the count of decimals of coordinates.
 
         :rtype : int
-        :return: The interval.
+        :return: The count.
         """
 
-        return self._interval
+        return self._decimals
 
-    def is_loop(self):
-        """Get whether the animation is looped.
+    def _append_line(self, line):
+        """Append a statement to the script.
 
-        :rtype : bool
-        :return: True if so.
+        :type line: str
+        :param line: The statement.
         """
 
-        return self._loop
+        self._lines.append(line)
 
-    def add_frame(self, evaluator):
-        """Add a frame.
+    def _format_number(self, value):
+        """Format a coordinate (rounded to the count of decimals).
 
-        :type evaluator: FrameEvaluator
-        :param evaluator: The frame evaluator.
+        :type value: int | float
+        :param value: The value.
+        :rtype : str
+        :return: The formatted value.
         """
 
-        self._frames.append(evaluator)
+        if isinstance(value, int):
+            return str(value)
 
-    def clear_frame(self):
-        """Clear all frames."""
+        value = round(value, self._decimals)
+        if value.is_integer() and abs(value) < _MIN_INTEGRAL_LIMIT:
+            return str(int(value))
 
-        self._frames.clear()
+        text = repr(value)
+        if text.startswith("0."):
+            return text[1:]
+        elif text.startswith("-0."):
+            return "-" + text[2:]
 
-    def get_script(self):
-        """Get the emitted script.
+        return text
+
+    def _format_point(self, x, y):
+        """Format the coordinates of a point.
 
+        :type x: int | float
+        :type y: int | float
+        :param x: The X axis value.
+        :param y: The Y axis value.
         :rtype : str
-        :return: The script.
+        :return: The formatted coordinates.
         """
 
-        #  Emit all frames.
-        script = "var $frames = [];\n"
-        for frame_ev in self._frames:
-            script += "$frames.push(function() {%s});\n" % frame_ev.get_script()
+        return self._format_number(x) + "," + self._format_number(y)
 
-        #  Emit configurations.
-        script += "var $interval = %d;\n" % self.get_interval()
-        if self.is_loop():
-            script += "var $loop = true;\n"
-        else:
-            script += "var $loop = false;\n"
+    def emit_draw_line(self, x1, y1, x2, y2):
+        """Emit codes of drawing a line.
 
-        #  Emit the time-line controller.
-        script += "var $current = 0;\n"
-        script += "function next_frame() {\n"
-        script += "    if ($current == $frames.length) {\n"
-        script += "        return false;\n"
-        script += "    } else {\n"
-        script += "        $frames[$current].call(this);\n"
-        script += "        $current++;\n"
-        script += "        if ($current == $frames.length) {\n"
-        script += "            if ($loop == true) {\n"
-        script += "                $current = 0;\n"
-        script += "                return true;\n"
-        script += "            } else {\n"
-        script += "                return false;\n"
-        script += "            }\n"
-        script += "        } else {\n"
-        script += "            return true;\n"
-        script += "        }\n"
-        script += "    }\n"
-        script += "}\n"
-        script += "var $animator = setInterval(function() {\n"
-        script += "    if (!next_frame()) {\n"
-        script += "        clearInterval($animator);\n"
-        script += "    }\n"
-        script += "}, $interval);\n"
+        :type x1: int | float
+        :type y1: int | float
+        :type x2: int | float
+        :type y2: int | float
+        :param x1: The X axis value of the first point.
+        :param y1: The Y axis value of the first point.
+        :param x2: The X axis value of the second point.
+        :param y2: The Y axis value of the second point.
+        """
+
+        self._lines.append("b();m(%s);l(%s);c();s();" % (self._format_point(x1, y1), self._format_point(x2, y2)))
+
+    def emit_draw_circle(self, x, y, radius):
+        """Emit codes of drawing a circle.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        """
+
+        self._lines.append("b();a(%s,%s);c();s();" % (self._format_point(x, y), self._format_number(radius)))
+
+    def _emit_path(self, path):
+        """Emit codes of drawing the lines of a path (without closing the path).
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        :raise ValueError: Raise this exception if the path has less than 3 points.
+        """
+
+        #  Safe check.
+        if len(path) < 3:
+            raise ValueError("Invalid path.")
+
+        lines = self._lines
+        lines.append("b();m(%s);" % self._format_point(path[0][0], path[0][1]))
+        for point_id in range(1, len(path)):
+            x, y = path[point_id]
+            lines.append("l(%s);" % self._format_point(x, y))
+
+    def emit_draw_path(self, path):
+        """Emit codes of drawing a path.
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        """
+
+        self._emit_path(path)
+        self._lines.append("c();s();")
+
+    def emit_draw_circle_area(self, x, y, radius):
+        """Emit codes of drawing a circle area.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        """
+
+        self._lines.append("b();a(%s,%s);c();f();s();" % (self._format_point(x, y), self._format_number(radius)))
+
+    def emit_draw_path_area(self, path):
+        """Emit codes of drawing a closed path area.
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        """
+
+        self._emit_path(path)
+        self._lines.append("c();f();s();")
+
+
+class MinFrameEvaluator(MinDrawEvaluator):
+    """Frame evaluator in the minified mode (the context is set up by the player, see MinAnimationEvaluator)."""
+
+    def __init__(self, canvas, decimals=_MIN_DECIMALS):
+        """Initialize the evaluator.
+
+        :type canvas: str
+        :type decimals: int
+        :param canvas: The canvas name.
+        :param decimals: The count of decimals of coordinates.
+        :raise ValueError: Raise this exception if the count of decimals is negative.
+        """
+
+        #  Let the base class initialize.
+        MinDrawEvaluator.__init__(self, decimals)
+
+        #  Save the canvas name.
+        self._canvas = canvas
+
+    def get_canvas(self):
+        """Get the canvas name.
+
+        :rtype : str
+        :return: The name.
+        """
+
+        return self._canvas
+
+    def emit_clear(self):
+        """Emit codes of clearing the canvas."""
+
+        self._lines.append("k();")
+
+    def emit_draw_template(self, template_idx, x, y):
+        """Emit codes of drawing a template at a position.
+
+        :type template_idx: int
+        :type x: int | float
+        :type y: int | float
+        :param template_idx: The template index.
+        :param x: The X axis value of the position.
+        :param y: The Y axis value of the position.
+        """
+
+        self._lines.append("$t[%d](%s);" % (template_idx, self._format_point(x, y)))
+
+    def write_script(self, buffer):
+        """Write the emitted script (the body of the frame function) to a buffer.
+
+        :type buffer: ScriptBuffer
+        :param buffer: The buffer.
+        """
+
+        buffer.write_pieces(self._lines)
+
+    def get_script(self):
+        """Get the emitted script.
+
+        :rtype : str
+        :return: The script (the body of the frame function).
+        """
+
+        return "".join(self._lines)
+
+
+class MinTemplateEvaluator(MinDrawEvaluator):
+    """Template evaluator in the minified mode (a function (x, y) that draws an object at a position)."""
+
+    def _format_point(self, x, y):
+        """Format the coordinates of a point (relative to the position).
+
+        :type x: int | float
+        :type y: int | float
+        :param x: The X axis value.
+        :param y: The Y axis value.
+        :rtype : str
+        :return: The formatted coordinates.
+        """
+
+        return self._format_offset("x", x) + "," + self._format_offset("y", y)
+
+    def _format_offset(self, base, value):
+        """Format a coordinate relative to the position.
+
+        :type base: str
+        :type value: int | float
+        :param base: The variable of the position.
+        :param value: The relative value.
+        :rtype : str
+        :return: The formatted coordinate.
+        """
+
+        text = self._format_number(value)
+        if text == "0" or text == "-0":
+            return base
+        elif text.startswith("-"):
+            return base + text
+
+        return base + "+" + text
+
+    def write_script(self, buffer):
+        """Write the emitted script (a function expression) to a buffer.
+
+        :type buffer: ScriptBuffer
+        :param buffer: The buffer.
+        """
+
+        buffer.write("function(x,y){")
+        buffer.write_pieces(self._lines)
+        buffer.write("}")
+
+    def get_script(self):
+        """Get the emitted script.
+
+        :rtype : str
+        :return: The script (a function expression).
+        """
+
+        return "function(x,y){%s}" % "".join(self._lines)
+
+
+class AnimationEvaluator:
+    """Animation evaluator."""
+
+    def __init__(self, interval, loop, budget=None):
+        """Initialize the animation evaluator.
+
+        :type interval: int
+        :type loop: bool
+        :type budget: _budget.CompileBudget | None
+        :param interval: The interval.
+        :param loop: Loop flag.
+        :param budget: The compile budget that the emitted bytes are counted against (None if unlimited).
+        """
+
+        self._frames = []
+        self._templates = []
+        self._template_emitted = 0
+        self._interval = interval
+        self._loop = loop
+        if budget is None:
+            budget = _budget.CompileBudget()
+        self._budget = budget
+
+    def get_frame_factory(self):
+        """Get the factory of the frame evaluators of the animation (a picklable callable (canvas)).
+
+        :rtype : collections.Callable
+        :return: The factory.
+        """
+
+        return FrameEvaluator
+
+    def create_frame(self, canvas):
+        """Create a frame evaluator for the animation.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        :rtype : FrameEvaluator
+        :return: The frame evaluator.
+        """
+
+        return self.get_frame_factory()(canvas)
+
+    @staticmethod
+    def create_template():
+        """Create a template evaluator for the animation.
+
+        :rtype : TemplateEvaluator
+        :return: The template evaluator.
+        """
+
+        return TemplateEvaluator()
+
+    def get_interval(self):
+        """Get the interval.
+
+        :rtype : int
+        :return: The interval.
+        """
+
+        return self._interval
+
+    def is_loop(self):
+        """Get whether the animation is looped.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._loop
+
+    def add_frame(self, evaluator):
+        """Add a frame.
+
+        :type evaluator: FrameEvaluator
+        :param evaluator: The frame evaluator.
+        """
+
+        self._frames.append(evaluator)
+
+    def add_frame_reference(self, frame_idx):
+        """Add a frame that reuses an already added frame.
+
+        :type frame_idx: int
+        :param frame_idx: The index of the reused frame.
+        """
+
+        self._frames.append(frame_idx)
+
+    def add_template(self, template):
+        """Add an object template.
+
+        :type template: TemplateEvaluator
+        :param template: The template evaluator.
+        :rtype : int
+        :return: The template index.
+        """
+
+        self._templates.append(template)
+
+        return len(self._templates) - 1
+
+    def clear_frame(self):
+        """Clear all frames (and templates)."""
+
+        self._frames.clear()
+        self._templates.clear()
+        self._template_emitted = 0
+
+    def take_frame(self):
+        """Take all frames added so far (the frames are removed from the evaluator).
+
+        :rtype : list[FrameEvaluator | int]
+        :return: The frames (a reused frame is represented by its index).
+        """
+
+        frames = self._frames
+        self._frames = []
+
+        return frames
+
+    @staticmethod
+    def get_script_head():
+        """Get the head of the emitted script (before the frames).
+
+        :rtype : str
+        :return: The script.
+        """
+
+        return "{var $frames = [];\nvar $templates = [];\n"
+
+    def write_frame_script(self, frame_ev, buffer):
+        """Write the script of one frame (preceded by the templates that haven't been emitted yet) to a buffer.
+
+        Frames must be passed in order, since a frame can only draw templates that were added before it.
+
+        :type frame_ev: FrameEvaluator | int
+        :type buffer: ScriptBuffer
+        :param frame_ev: The frame evaluator (or the index of a reused frame).
+        :param buffer: The buffer.
+        :raise xnilang.compiler.error.BudgetExceededError: Raise this exception if the emitted script is too large.
+        """
+
+        start = buffer.get_size()
+
+        #  Emit the reference of a reused frame.
+        if isinstance(frame_ev, int):
+            buffer.write("$frames.push($frames[%d]);\n" % frame_ev)
+        else:
+            #  Emit new templates.
+            while self._template_emitted < len(self._templates):
+                buffer.write("$templates.push(")
+                self._templates[self._template_emitted].write_script(buffer)
+                buffer.write(");\n")
+                self._template_emitted += 1
+
+            buffer.write("$frames.push(function() {")
+            frame_ev.write_script(buffer)
+            buffer.write("});\n")
+
+        #  Count the emitted bytes (the script is ASCII).
+        self._budget.add_output_bytes(buffer.get_size() - start)
+
+    def get_frame_script(self, frame_ev):
+        """Get the script of one frame (see write_frame_script()).
+
+        :type frame_ev: FrameEvaluator | int
+        :param frame_ev: The frame evaluator (or the index of a reused frame).
+        :rtype : str
+        :return: The script.
+        :raise xnilang.compiler.error.BudgetExceededError: Raise this exception if the emitted script is too large.
+        """
+
+        buffer = ScriptBuffer()
+        self.write_frame_script(frame_ev, buffer)
+
+        return buffer.get_script()
+
+    def get_script_tail(self):
+        """Get the tail of the emitted script (after the frames).
+
+        :rtype : str
+        :return: The script.
+        """
+
+        #  Emit configurations.
+        script = "var $interval = %d;\n" % self.get_interval()
+        if self.is_loop():
+            script += "var $loop = true;\n"
+        else:
+            script += "var $loop = false;\n"
+
+        #  Emit the time-line controller.
+        script += "var $current = 0;\n"
+        script += "function next_frame() {\n"
+        script += "    if ($current == $frames.length) {\n"
+        script += "        return false;\n"
+        script += "    } else {\n"
+        script += "        $frames[$current].call(this);\n"
+        script += "        $current++;\n"
+        script += "        if ($current == $frames.length) {\n"
+        script += "            if ($loop == true) {\n"
+        script += "                $current = 0;\n"
+        script += "                return true;\n"
+        script += "            } else {\n"
+        script += "                return false;\n"
+        script += "            }\n"
+        script += "        } else {\n"
+        script += "            return true;\n"
+        script += "        }\n"
+        script += "    }\n"
+        script += "}\n"
+        script += "var $animator = setInterval(function() {\n"
+        script += "    if (!next_frame()) {\n"
+        script += "        clearInterval($animator);\n"
+        script += "    }\n"
+        script += "}, $interval);\n"
+
+        return script + "}"
+
+    def write_script(self, buffer):
+        """Write the emitted script to a buffer.
+
+        :type buffer: ScriptBuffer
+        :param buffer: The buffer.
+        :raise xnilang.compiler.error.BudgetExceededError: Raise this exception if the emitted script is too large.
+        """
+
+        #  Emit all frames.
+        self._template_emitted = 0
+        buffer.write(self.get_script_head())
+        for frame_ev in self._frames:
+            self.write_frame_script(frame_ev, buffer)
+        buffer.write(self.get_script_tail())
+
+    def get_script(self):
+        """Get the emitted script.
+
+        :rtype : str
+        :return: The script.
+        :raise xnilang.compiler.error.BudgetExceededError: Raise this exception if the emitted script is too large.
+        """
+
+        buffer = ScriptBuffer()
+        self.write_script(buffer)
+
+        return buffer.get_script()
+
+
+class MinAnimationEvaluator(AnimationEvaluator):
+    """Animation evaluator in the minified mode.
+
+    The frames and the templates are emitted by MinFrameEvaluator and MinTemplateEvaluator. The context
+    setup and the aliases of canvas methods are emitted once, and the player sets the context up before each
+    frame (resizing the canvas resets the context).
+    """
+
+    def __init__(self, interval, loop, canvas, decimals=_MIN_DECIMALS, budget=None):
+        """Initialize the animation evaluator.
+
+        :type interval: int
+        :type loop: bool
+        :type canvas: str
+        :type decimals: int
+        :type budget: _budget.CompileBudget | None
+        :param interval: The interval.
+        :param loop: Loop flag.
+        :param canvas: The canvas name.
+        :param decimals: The count of decimals of coordinates.
+        :param budget: The compile budget that the emitted bytes are counted against (None if unlimited).
+        :raise ValueError: Raise this exception if the count of decimals is negative.
+        """
+
+        if decimals < 0:
+            raise ValueError("Invalid count of decimals.")
+
+        #  Let the base class initialize.
+        AnimationEvaluator.__init__(self, interval, loop, budget)
+
+        #  Save the canvas name and the count of decimals.
+        self._canvas = canvas
+        self._decimals = decimals
+
+    def get_canvas(self):
+        """Get the canvas name.
+
+        :rtype : str
+        :return: The name.
+        """
+
+        return self._canvas
+
+    def get_decimals(self):
+        """Get the count of decimals of coordinates.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._decimals
+
+    def get_frame_factory(self):
+        """Get the factory of the frame evaluators of the animation (a picklable callable (canvas)).
+
+        :rtype : collections.Callable
+        :return: The factory.
+        """
+
+        return _functools.partial(MinFrameEvaluator, decimals=self._decimals)
+
+    def create_template(self):
+        """Create a template evaluator for the animation.
+
+        :rtype : MinTemplateEvaluator
+        :return: The template evaluator.
+        """
+
+        return MinTemplateEvaluator(self._decimals)
+
+    @staticmethod
+    def get_script_head():
+        """Get the head of the emitted script (before the frames).
+
+        :rtype : str
+        :return: The script.
+        """
+
+        return "{var $f=[],$t=[],$c," \
+               "b=function(){$c.beginPath();}," \
+               "m=function(x,y){$c.moveTo(x,y);}," \
+               "l=function(x,y){$c.lineTo(x,y);}," \
+               "a=function(x,y,r){$c.arc(x,y,r,0,2*Math.PI,false);}," \
+               "c=function(){$c.closePath();}," \
+               "s=function(){$c.stroke();}," \
+               "f=function(){$c.fill();}," \
+               "k=function(){$c.clearRect(0,0,$c.canvas.width,$c.canvas.height);};\n"
+
+    def write_frame_script(self, frame_ev, buffer):
+        """Write the script of one frame (preceded by the templates that haven't been emitted yet) to a buffer.
+
+        Frames must be passed in order, since a frame can only draw templates that were added before it.
+
+        :type frame_ev: MinFrameEvaluator | int
+        :type buffer: ScriptBuffer
+        :param frame_ev: The frame evaluator (or the index of a reused frame).
+        :param buffer: The buffer.
+        :raise xnilang.compiler.error.BudgetExceededError: Raise this exception if the emitted script is too large.
+        """
+
+        start = buffer.get_size()
+
+        #  Emit the reference of a reused frame.
+        if isinstance(frame_ev, int):
+            buffer.write("$f.push($f[%d]);\n" % frame_ev)
+        else:
+            #  Emit new templates.
+            while self._template_emitted < len(self._templates):
+                buffer.write("$t.push(")
+                self._templates[self._template_emitted].write_script(buffer)
+                buffer.write(");\n")
+                self._template_emitted += 1
+
+            buffer.write("$f.push(function(){")
+            frame_ev.write_script(buffer)
+            buffer.write("});\n")
+
+        #  Count the emitted bytes (the script is ASCII).
+        self._budget.add_output_bytes(buffer.get_size() - start)
+
+    def get_script_tail(self):
+        """Get the tail of the emitted script (after the frames).
+
+        :rtype : str
+        :return: The script.
+        """
+
+        return "var $i=0,$a=setInterval(function(){" \
+               "if($i==$f.length){clearInterval($a);return;}" \
+               "$c=%s.getContext(\"2d\");" \
+               "$c.fillStyle=\"rgb(255, 255, 255)\";" \
+               "$c.strokeStyle=\"rgb(0, 0, 0)\";" \
+               "$c.lineWidth=2;" \
+               "$f[$i++]();" \
+               "if($i==$f.length){if(%s){$i=0;}else{clearInterval($a);}}" \
+               "},%d);\n}" % (self.get_canvas(), "true" if self.is_loop() else "false", self.get_interval())
+
+
+#  Operation codes of the symbolic program.
+_SYMBOLIC_OP_DEFINE = 0
+_SYMBOLIC_OP_PLACE = 1
+_SYMBOLIC_OP_SHIFT = 2
+_SYMBOLIC_OP_ERASE = 3
+_SYMBOLIC_OP_LOOP_BEGIN = 4
+_SYMBOLIC_OP_LOOP_END = 5
+
+
+class SymbolicAnimationEvaluator:
+    """Symbolic animation evaluator.
+
+    Instead of one closure per frame, the emitted script contains one template per object definition and the
+    move program (with loops kept symbolic). A small player runs the program and redraws the display list
+    after each place, shift and erase operation, so the script size is proportional to the program size
+    instead of the frame count.
+    """
+
+    def __init__(self, interval, loop, budget=None):
+        """Initialize the animation evaluator.
+
+        :type interval: int
+        :type loop: bool
+        :type budget: _budget.CompileBudget | None
+        :param interval: The interval.
+        :param loop: Loop flag.
+        :param budget: The compile budget that the emitted bytes are counted against (None if unlimited).
+        """
+
+        self._interval = interval
+        self._loop = loop
+        if budget is None:
+            budget = _budget.CompileBudget()
+        self._budget = budget
+        self.clear_frame()
+
+    def get_interval(self):
+        """Get the interval.
+
+        :rtype : int
+        :return: The interval.
+        """
+
+        return self._interval
+
+    def is_loop(self):
+        """Get whether the animation is looped.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._loop
+
+    def clear_frame(self):
+        """Clear all frames (and the program)."""
+
+        self._templates = []
+        self._program = []
+        self._loop_begins = []
+        self._object_ids = {}
+        self._frame_count = 0
+
+    def add_frame_count(self, count):
+        """Add frames to the frame count.
+
+        :type count: int
+        :param count: The frame count.
+        """
+
+        self._frame_count += count
+
+    def get_frame_count(self):
+        """Get the frame count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def add_template(self, template):
+        """Add an object template.
+
+        :type template: TemplateEvaluator
+        :param template: The template evaluator.
+        :rtype : int
+        :return: The template index.
+        """
+
+        self._templates.append(template)
+
+        return len(self._templates) - 1
+
+    @staticmethod
+    def create_template():
+        """Create a template evaluator for the animation.
+
+        :rtype : TemplateEvaluator
+        :return: The template evaluator.
+        """
+
+        return TemplateEvaluator()
+
+    def _get_object_id(self, name):
+        """Get the ID of an object in the emitted program.
+
+        :type name: str
+        :param name: The object name.
+        :rtype : int
+        :return: The ID.
+        """
+
+        object_id = self._object_ids.get(name)
+        if object_id is None:
+            object_id = self._object_ids[name] = len(self._object_ids)
+
+        return object_id
+
+    def emit_define(self, name, template_idx):
+        """Emit an object definition.
+
+        :type name: str
+        :type template_idx: int
+        :param name: The object name.
+        :param template_idx: The template index.
+        """
+
+        self._program.append("[%d,%d,%d]" % (_SYMBOLIC_OP_DEFINE, self._get_object_id(name), template_idx))
+
+    def emit_place(self, name, x, y):
+        """Emit a place operation.
+
+        :type name: str
+        :type x: int | float
+        :type y: int | float
+        :param name: The object name.
+        :param x: The X axis value of the position.
+        :param y: The Y axis value of the position.
+        """
+
+        self._program.append("[%d,%d,%s,%s]" % (_SYMBOLIC_OP_PLACE, self._get_object_id(name), str(x), str(y)))
+
+    def emit_shift(self, name, dx, dy):
+        """Emit a shift operation.
+
+        :type name: str
+        :type dx: int
+        :type dy: int
+        :param name: The object name.
+        :param dx: The X axis offset.
+        :param dy: The Y axis offset.
+        """
+
+        self._program.append("[%d,%d,%d,%d]" % (_SYMBOLIC_OP_SHIFT, self._get_object_id(name), dx, dy))
+
+    def emit_erase(self, name):
+        """Emit an erase operation.
+
+        :type name: str
+        :param name: The object name.
+        """
+
+        self._program.append("[%d,%d]" % (_SYMBOLIC_OP_ERASE, self._get_object_id(name)))
+
+    def emit_loop_begin(self, times):
+        """Emit the beginning of a loop.
+
+        :type times: int
+        :param times: The repeat times.
+        """
+
+        #  The operation is completed (with the end of the loop) by emit_loop_end().
+        self._loop_begins.append((len(self._program), times))
+        self._program.append(None)
+
+    def emit_loop_end(self):
+        """Emit the end of the innermost loop."""
+
+        begin, times = self._loop_begins.pop()
+        self._program.append("[%d,%d]" % (_SYMBOLIC_OP_LOOP_END, begin + 1))
+        self._program[begin] = "[%d,%d,%d]" % (_SYMBOLIC_OP_LOOP_BEGIN, times, len(self._program))
+
+    def get_script(self, canvas):
+        """Get the emitted script.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        :rtype : str
+        :return: The script.
+        :raise xnilang.compiler.error.BudgetExceededError: Raise this exception if the emitted script is too large.
+        """
+
+        #  Emit all templates and the program.
+        script = "var $templates = [\n%s];\n" % ",\n".join([template.get_script() for template in self._templates])
+        script += "var $program = [\n%s];\n" % ",\n".join(self._program)
+        script += "var $frame_count = %d;\n" % self.get_frame_count()
+
+        #  Emit configurations.
+        script += "var $interval = %d;\n" % self.get_interval()
+        if self.is_loop():
+            script += "var $loop = true;\n"
+        else:
+            script += "var $loop = false;\n"
+
+        #  Emit the player.
+        script += "var $objects, $display, $pc, $loops;\n"
+        script += "function reset_program() {\n"
+        script += "    $objects = [];\n"
+        script += "    $display = [];\n"
+        script += "    $pc = 0;\n"
+        script += "    $loops = [];\n"
+        script += "}\n"
+        script += "function run_program() {\n"
+        script += "    while ($pc < $program.length) {\n"
+        script += "        var op = $program[$pc++];\n"
+        script += "        var obj = $objects[op[1]];\n"
+        script += "        switch (op[0]) {\n"
+        script += "        case %d:\n" % _SYMBOLIC_OP_DEFINE
+        script += "            $objects[op[1]] = {template: op[2], x: 0, y: 0, visible: false};\n"
+        script += "            break;\n"
+        script += "        case %d:\n" % _SYMBOLIC_OP_PLACE
+        script += "            if (obj.visible) {\n"
+        script += "                $display.splice($display.indexOf(op[1]), 1);\n"
+        script += "            }\n"
+        script += "            obj.x = op[2];\n"
+        script += "            obj.y = op[3];\n"
+        script += "            obj.visible = true;\n"
+        script += "            $display.push(op[1]);\n"
+        script += "            return;\n"
+        script += "        case %d:\n" % _SYMBOLIC_OP_SHIFT
+        script += "            if (op[2] != 0) {\n"
+        script += "                obj.x += op[2];\n"
+        script += "            }\n"
+        script += "            if (op[3] != 0) {\n"
+        script += "                obj.y += op[3];\n"
+        script += "            }\n"
+        script += "            return;\n"
+        script += "        case %d:\n" % _SYMBOLIC_OP_ERASE
+        script += "            obj.visible = false;\n"
+        script += "            $display.splice($display.indexOf(op[1]), 1);\n"
+        script += "            return;\n"
+        script += "        case %d:\n" % _SYMBOLIC_OP_LOOP_BEGIN
+        script += "            if (op[1] > 0) {\n"
+        script += "                $loops.push([$pc, op[1]]);\n"
+        script += "            } else {\n"
+        script += "                $pc = op[2];\n"
+        script += "            }\n"
+        script += "            break;\n"
+        script += "        case %d:\n" % _SYMBOLIC_OP_LOOP_END
+        script += "            var top = $loops[$loops.length - 1];\n"
+        script += "            if (--top[1] > 0) {\n"
+        script += "                $pc = top[0];\n"
+        script += "            } else {\n"
+        script += "                $loops.pop();\n"
+        script += "            }\n"
+        script += "            break;\n"
+        script += "        }\n"
+        script += "    }\n"
+        script += "}\n"
+        script += "function draw_frame() {\n"
+        script += "    var $ctx = %s.getContext(\"2d\");\n" % canvas
+        script += "    $ctx.fillStyle = \"rgb(255, 255, 255)\";\n"
+        script += "    $ctx.strokeStyle = \"rgb(0, 0, 0)\";\n"
+        script += "    $ctx.lineWidth = 2;\n"
+        script += "    $ctx.clearRect(0, 0, %s.width, %s.height);\n" % (canvas, canvas)
+        script += "    for (var i = 0; i < $display.length; i++) {\n"
+        script += "        var obj = $objects[$display[i]];\n"
+        script += "        $templates[obj.template]($ctx, obj.x, obj.y);\n"
+        script += "    }\n"
+        script += "}\n"
+
+        #  Emit the time-line controller.
+        script += "var $current = 0;\n"
+        script += "reset_program();\n"
+        script += "function next_frame() {\n"
+        script += "    if ($current == $frame_count) {\n"
+        script += "        return false;\n"
+        script += "    } else {\n"
+        script += "        run_program();\n"
+        script += "        draw_frame();\n"
+        script += "        $current++;\n"
+        script += "        if ($current == $frame_count) {\n"
+        script += "            if ($loop == true) {\n"
+        script += "                $current = 0;\n"
+        script += "                reset_program();\n"
+        script += "                return true;\n"
+        script += "            } else {\n"
+        script += "                return false;\n"
+        script += "            }\n"
+        script += "        } else {\n"
+        script += "            return true;\n"
+        script += "        }\n"
+        script += "    }\n"
+        script += "}\n"
+        script += "var $animator = setInterval(function() {\n"
+        script += "    if (!next_frame()) {\n"
+        script += "        clearInterval($animator);\n"
+        script += "    }\n"
+        script += "}, $interval);\n"
+
+        #  Count the emitted bytes (the script is ASCII).
+        self._budget.add_output_bytes(len(script) + 2)
 
         return "{%s}" % script
@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import collections as _collections
+import concurrent.futures as _futures
+import xnilang.compiler.compiler as _compiler
+import xnilang.parser.ast as _ast
+
+#  The default count of frames emitted by a worker at once.
+_CHUNK_FRAMES = 1024
+
+#  The maximum count of chunks that are submitted but not merged (the simulation waits for the earliest one).
+_MAX_PENDING_CHUNKS = 64
+
+
+class _ChunkEnd(Exception):
+    """Raised by _ChunkCompiler when the last frame of its chunk has been emitted."""
+
+    pass
+
+
+class _ChunkEvaluator:
+    """Evaluator that collects the frames of a chunk (it stands for an AnimationEvaluator in _ChunkCompiler)."""
+
+    def __init__(self, frame_factory):
+        """Initialize the evaluator.
+
+        :type frame_factory: collections.Callable
+        :param frame_factory: The factory of frame evaluators (see AnimationEvaluator.get_frame_factory()).
+        """
+
+        self._frame_factory = frame_factory
+        self._frames = []
+
+    def create_frame(self, canvas):
+        """Create a frame evaluator.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        :rtype : xnilang.compiler.evaluator.FrameEvaluator
+        :return: The frame evaluator.
+        """
+
+        return self._frame_factory(canvas)
+
+    def add_frame(self, digest, script):
+        """Add a frame.
+
+        :type digest: bytes
+        :type script: str | None
+        :param digest: The digest of the scene state of the frame.
+        :param script: The frame script (None if the frame reuses an earlier frame of the same digest).
+        """
+
+        self._frames.append((digest, script))
+
+    def clear_frame(self):
+        """Clear all frames."""
+
+        self._frames.clear()
+
+    def take_frame(self):
+        """Take all frames added so far (the frames are removed from the evaluator).
+
+        :rtype : list[(bytes, str | None)]
+        :return: The frames (see add_frame()).
+        """
+
+        frames = self._frames
+        self._frames = []
+
+        return frames
+
+
+class _ChunkCompiler(_compiler.Compiler):
+    """Compiler that simulates commands from a checkpoint and emits the frames of a chunk (run by the workers).
+
+    Frames before the chunk are only counted, and the frames of the chunk are identified by the digests of their
+    scene states (the frames are reused across chunks when the chunks are merged, see ParallelCompiler).
+    """
+
+    def __init__(self, frame_factory, canvas, scene, first, last):
+        """Initialize the compiler.
+
+        :type frame_factory: collections.Callable
+        :type canvas: str
+        :type scene: xnilang.compiler.scene.SceneGraph
+        :type first: int
+        :type last: int
+        :param frame_factory: The factory of frame evaluators (see AnimationEvaluator.get_frame_factory()).
+        :param canvas: The canvas.
+        :param scene: The scene at the checkpoint (it's changed by the simulation).
+        :param first: The index of the first frame of the chunk (counted from the checkpoint).
+        :param last: The index after the last frame of the chunk (counted from the checkpoint).
+        """
+
+        #  Let the base class initialize.
+        _compiler.Compiler.__init__(self, _ChunkEvaluator(frame_factory), canvas)
+
+        #  Restore the scene.
+        self._scene = scene
+
+        #  Save the range of the chunk.
+        self._first = first
+        self._last = last
+        self._frame_count = 0
+
+        #  Initialize the digests of the frames emitted in the chunk.
+        self._digests = set()
+
+    def _count_chunk_frame(self):
+        """Count a frame (the frame must have been added if it's in the chunk).
+
+        :raise _ChunkEnd: Raise this exception if it was the last frame of the chunk.
+        """
+
+        self._frame_count += 1
+        if self._frame_count == self._last:
+            raise _ChunkEnd()
+
+    def _add_frame_references(self, frame_indexes):
+        """Add references to already emitted frames as new animation frames.
+
+        :type frame_indexes: list[bytes]
+        :param frame_indexes: The digest (see _redraw_state()) of the frame of each new animation frame.
+        :raise _ChunkEnd: Raise this exception if the last frame of the chunk has been added.
+        """
+
+        for digest in frame_indexes:
+            if self._frame_count >= self._first:
+                self._evaluator.add_frame(digest, None)
+            self._count_chunk_frame()
+
+    def _redraw_state(self, state):
+        """Add a new animation frame of a scene state.
+
+        :type state: tuple
+        :param state: The scene state (see _get_scene_state()).
+        :rtype : bytes
+        :return: The digest of the scene state (it stands for the frame index in _add_frame_references()).
+        :raise _ChunkEnd: Raise this exception if the last frame of the chunk has been added.
+        """
+
+        digest = _compiler.get_state_digest(state)
+        if self._frame_count >= self._first:
+            if digest in self._digests:
+                self._evaluator.add_frame(digest, None)
+            else:
+                #  Draw objects.
+                frame = self._evaluator.create_frame(self.get_canvas())
+                frame.emit_clear()
+                for template_idx, x, y in state:
+                    frame.emit_draw_template(template_idx, x, y)
+
+                #  Add the frame.
+                self._evaluator.add_frame(digest, frame.get_script())
+                self._digests.add(digest)
+        self._count_chunk_frame()
+
+        return digest
+
+    def _macro_redraw(self):
+        """(Macro) Redraw visible objects to a new animation frame (only counted before the chunk).
+
+        The templates are not checked, since the commands have already been compiled by ParallelCompiler.
+
+        :raise _ChunkEnd: Raise this exception if the last frame of the chunk has been added.
+        """
+
+        if self._frame_count < self._first:
+            self._frame_count += 1
+            return
+
+        self._redraw_state(self._get_scene_state())
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands.
+
+        The iterations before the chunk are skipped (only the shifted objects are moved).
+
+        :type move_list: xnilang.parser.ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        :raise _ChunkEnd: Raise this exception if the last frame of the chunk has been added.
+        """
+
+        #  Skip the iterations before the chunk.
+        skip = min(times, max(0, (self._first - self._frame_count) // len(steps)))
+        if skip != 0:
+            for target_name, deltas in self._get_shift_deltas(steps).items():
+                obj = self._scene.get_object(self._scene.get_object_id(target_name))
+                obj.set_position(_compiler.advance_position(obj.get_x(), deltas[0], skip),
+                                 _compiler.advance_position(obj.get_y(), deltas[1], skip))
+            self._frame_count += skip * len(steps)
+            times -= skip
+
+        if times != 0:
+            _compiler.Compiler._repeat_loop_body(self, move_list, steps, times)
+
+    def compile_chunk(self, stack, commands):
+        """Compile the rest of a loop stack and then commands until the last frame of the chunk.
+
+        :type stack: list[list]
+        :type commands: list[xnilang.parser.ast.CommandNode]
+        :param stack: The loop stack at the checkpoint (it's changed by the simulation).
+        :param commands: The commands after the checkpoint.
+        :rtype : list[(bytes, str | None)]
+        :return: The frames of the chunk (see _ChunkEvaluator.add_frame()).
+        :raise RuntimeError: Raise this exception if the commands end before the last frame of the chunk.
+        """
+
+        try:
+            self._run_loop_stack(stack)
+            for cmd in commands:
+                self.compile_command(cmd)
+        except _ChunkEnd:
+            return self._evaluator.take_frame()
+
+        raise RuntimeError("The commands end before the last frame of the chunk.")
+
+
+def _emit_chunk(frame_factory, canvas, scene, stack, commands, first, last):
+    """Simulate commands from a checkpoint and emit the frames of a chunk (run by the workers).
+
+    :type frame_factory: collections.Callable
+    :type canvas: str
+    :type scene: xnilang.compiler.scene.SceneGraph
+    :type stack: list[list]
+    :type commands: list[xnilang.parser.ast.CommandNode]
+    :type first: int
+    :type last: int
+    :param frame_factory: The factory of frame evaluators (see AnimationEvaluator.get_frame_factory()).
+    :param canvas: The canvas name.
+    :param scene: The scene at the checkpoint.
+    :param stack: The loop stack at the checkpoint.
+    :param commands: The commands after the checkpoint.
+    :param first: The index of the first frame of the chunk (counted from the checkpoint).
+    :param last: The index after the last frame of the chunk (counted from the checkpoint).
+    :rtype : list[(bytes, str | None)]
+    :return: The digest and the script (None if it reuses an earlier frame of the chunk) of each frame.
+    """
+
+    #  The checkpoint is copied, since a thread pool shares it with the calling thread.
+    compiler = _ChunkCompiler(frame_factory, canvas, scene.copy(), first, last)
+
+    return compiler.compile_chunk([list(frame) for frame in stack], commands)
+
+
+class _EmittedFrame:
+    """A frame emitted by a worker (it stands for a FrameEvaluator in AnimationEvaluator)."""
+
+    __slots__ = ("_script", )
+
+    def __init__(self, script):
+        """Initialize the frame.
+
+        :type script: str
+        :param script: The frame script.
+        """
+
+        self._script = script
+
+    def get_script(self):
+        """Get the frame script.
+
+        :rtype : str
+        :return: The script.
+        """
+
+        return self._script
+
+    def write_script(self, buffer):
+        """Write the frame script to a buffer.
+
+        :type buffer: xnilang.compiler.evaluator.ScriptBuffer
+        :param buffer: The buffer.
+        """
+
+        buffer.write(self._script)
+
+
+class ParallelCompiler(_compiler.Compiler):
+    """Parallel AST compiler class.
+
+    The commands are simulated in the calling process, but the frames are only counted (no scene state is
+    built). Each time about chunk_frames frames have been simulated (at the beginning of a command or of a loop
+    iteration), the range of those frames is closed and a worker process gets the scene snapshot and the loop
+    stack at its beginning (a checkpoint) and the commands after it. The worker simulates the commands again and
+    emits the frames of its range, while the simulation goes on. Ranges of more than chunk_frames frames (e.g.
+    long loops of place and shift commands) are split, and each worker skips the frames before its chunk.
+
+    The chunks are merged in order, and a frame whose scene state has already been emitted is replaced with a
+    reference (just like Compiler does), so the animation evaluator gets the same templates, frames and frame
+    references in the same order as with Compiler. Object-define commands wait for all chunks, so the templates
+    are added after the frames before them.
+    """
+
+    def __init__(self, evaluator, canvas, executor, chunk_frames=_CHUNK_FRAMES, budget=None):
+        """Initialize the compiler.
+
+        :type evaluator: xnilang.compiler.evaluator.AnimationEvaluator
+        :type canvas: str
+        :type executor: concurrent.futures.Executor
+        :type chunk_frames: int
+        :type budget: xnilang.compiler.budget.CompileBudget | None
+        :param evaluator: The animation evaluator.
+        :param canvas: The canvas.
+        :param executor: The executor of the workers (usually a process pool).
+        :param chunk_frames: The count of frames emitted by a worker at once.
+        :param budget: The compile budget (None if unlimited).
+        :raise ValueError: Raise this exception if the chunk size is invalid.
+        """
+
+        if chunk_frames <= 0:
+            raise ValueError("Invalid chunk size.")
+
+        #  Let the base class initialize.
+        _compiler.Compiler.__init__(self, evaluator, canvas, budget)
+
+        #  Save the executor.
+        self._executor = executor
+        self._chunk_frames = chunk_frames
+
+        #  Initialize the checkpoint of the current range ([scene, loop stack], None if no checkpoint is taken),
+        #  the commands after it and the count of frames simulated since it.
+        self._checkpoint = None
+        self._checkpoint_commands = []
+        self._checkpoint_frames = 0
+
+        #  Initialize the chunks that haven't been merged.
+        self._chunks = _collections.deque()
+
+    def _macro_redraw(self):
+        """(Macro) Count a new animation frame (it's emitted by a worker).
+
+        :raise xnilang.compiler.error.CompilationError: Raise this exception if the template of an object can't be
+                                                        compiled.
+        """
+
+        self._check_templates()
+        self._budget.add_frames(1)
+        self._checkpoint_frames += 1
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands.
+
+        Only the frames are counted and the shifted objects are moved to their final positions.
+
+        :type move_list: xnilang.parser.ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        """
+
+        #  Count the frames.
+        self._budget.add_frames(times * len(steps))
+        self._checkpoint_frames += times * len(steps)
+
+        #  Move the shifted objects.
+        for target_name, deltas in self._get_shift_deltas(steps).items():
+            obj = self._scene.get_object(self._scene.get_object_id(target_name))
+            obj.set_position(_compiler.advance_position(obj.get_x(), deltas[0], times),
+                             _compiler.advance_position(obj.get_y(), deltas[1], times))
+
+    def _begin_loop_iteration(self, stack):
+        """Close the current range at the beginning of a loop iteration if it has enough frames.
+
+        :type stack: list[list]
+        :param stack: The loop stack (see _run_loop_stack(), the top frame is the loop).
+        """
+
+        if self._checkpoint_frames >= self._chunk_frames:
+            self._close_range()
+            self._checkpoint = [self._scene.copy(), [list(frame) for frame in stack]]
+
+    def _close_range(self):
+        """Submit the frames simulated since the checkpoint to the workers (in chunks) and clear the checkpoint."""
+
+        if self._checkpoint_frames != 0:
+            scene, stack = self._checkpoint
+            frame_factory = self._evaluator.get_frame_factory()
+            for first in range(0, self._checkpoint_frames, self._chunk_frames):
+                #  Wait for the earliest chunk if too many chunks haven't been merged.
+                if len(self._chunks) >= _MAX_PENDING_CHUNKS:
+                    self._merge_chunk(self._chunks.popleft())
+
+                last = min(first + self._chunk_frames, self._checkpoint_frames)
+                self._chunks.append(self._executor.submit(_emit_chunk, frame_factory, self.get_canvas(), scene, stack,
+                                                          self._checkpoint_commands, first, last))
+
+        self._checkpoint = None
+        self._checkpoint_commands = []
+        self._checkpoint_frames = 0
+
+    def _merge_chunk(self, chunk):
+        """Merge the frames of a chunk (wait for the worker if needed).
+
+        :type chunk: concurrent.futures.Future
+        :param chunk: The worker task of the chunk.
+        :raise RuntimeError: Raise this exception if the worker failed.
+        """
+
+        for digest, script in chunk.result():
+            #  Reuse the frame of the same scene state.
+            frame_idx = self._scene_frames.get(digest)
+            if frame_idx is not None:
+                self._evaluator.add_frame_reference(frame_idx)
+                self._statistics.add_frame(True)
+                continue
+
+            #  Add the frame.
+            if script is None:
+                raise RuntimeError("A reused frame hasn't been emitted.")
+            self._scene_frames[digest] = self._statistics.get_frame_count()
+            self._evaluator.add_frame(_EmittedFrame(script))
+            self._statistics.add_frame(False)
+
+    def _merge_chunks(self, wait):
+        """Merge the chunks in order and hand their frames to the frame sink (if any).
+
+        :type wait: bool
+        :param wait: True if all chunks are merged (otherwise only the chunks that are done before the first one
+                     that isn't).
+        """
+
+        while len(self._chunks) != 0 and (wait or self._chunks[0].done()):
+            self._merge_chunk(self._chunks.popleft())
+        self._hand_frames()
+
+    def flush(self):
+        """Submit the frames simulated so far, wait for all chunks and merge them.
+
+        This must be called before the frames (or the statistics) are used (the frames are handed to the frame
+        sink, if any).
+        """
+
+        self._close_range()
+        self._merge_chunks(True)
+
+    def compile_command(self, cmd):
+        """Compile a command.
+
+        :type cmd: _ast.CommandNode
+        :param cmd: The command.
+        :raise xnilang.compiler.error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        #  The templates must be added after the frames before them.
+        if isinstance(cmd, _ast.ObjectDefineCommand):
+            self.flush()
+            _compiler.Compiler.compile_command(self, cmd)
+            return
+
+        #  Close the range if it has enough frames and take a checkpoint before the command if needed.
+        if self._checkpoint_frames >= self._chunk_frames:
+            self._close_range()
+        if self._checkpoint is None:
+            self._checkpoint = [self._scene.copy(), []]
+        self._checkpoint_commands.append(cmd)
+
+        _compiler.Compiler.compile_command(self, cmd)
+        self._merge_chunks(False)
+
+    def iterate_frame(self, commands):
+        """Compile commands one by one and iterate the frames as soon as they are merged.
+
+        :type commands: collections.Iterable[_ast.CommandNode]
+        :param commands: The commands.
+        :rtype : collections.Iterable[_EmittedFrame | int]
+        :return: The frame iterator.
+        :raise xnilang.compiler.error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        for cmd in commands:
+            #  The frames before an object-define command must be taken before its template is added.
+            if isinstance(cmd, _ast.ObjectDefineCommand):
+                self.flush()
+                for frame in self._evaluator.take_frame():
+                    yield frame
+
+            #  Compile the command and yield the merged frames.
+            self.compile_command(cmd)
+            for frame in self._evaluator.take_frame():
+                yield frame
+
+        #  Yield the rest.
+        self.flush()
+        for frame in self._evaluator.take_frame():
+            yield frame
+
+
+def compile_parallel(commands, evaluator, canvas, workers=None, chunk_frames=_CHUNK_FRAMES, budget=None):
+    """Compile commands with a new process pool (see ParallelCompiler) and wait for all frames.
+
+    :type commands: collections.Iterable[xnilang.parser.ast.CommandNode]
+    :type evaluator: xnilang.compiler.evaluator.AnimationEvaluator
+    :type canvas: str
+    :type workers: int | None
+    :type chunk_frames: int
+    :type budget: xnilang.compiler.budget.CompileBudget | None
+    :param commands: The commands.
+    :param evaluator: The animation evaluator.
+    :param canvas: The canvas.
+    :param workers: The count of worker processes (None if it's the count of processors).
+    :param chunk_frames: The count of frames emitted by a worker at once.
+    :param budget: The compile budget (None if unlimited).
+    :rtype : _compiler.CompileStatistics
+    :return: The compile statistics.
+    :raise xnilang.compiler.error.CompilationError: Raise this exception if an error occurred.
+    """
+
+    with _futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        compiler = ParallelCompiler(evaluator, canvas, executor, chunk_frames, budget)
+        for cmd in commands:
+            compiler.compile_command(cmd)
+        compiler.flush()
+
+    return compiler.get_statistics()
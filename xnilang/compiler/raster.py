@@ -0,0 +1,888 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import math as _math
+import struct as _struct
+import zlib as _zlib
+import numpy as _np
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _ev
+
+#  Primitive kinds of templates.
+_PRIMITIVE_LINE = 0
+_PRIMITIVE_CIRCLE = 1
+_PRIMITIVE_PATH = 2
+
+#  Colors (RGBA) and the stroke width (the same styles as the frames emitted by FrameEvaluator).
+_FILL_COLOR = _np.array([255, 255, 255, 255], dtype=_np.uint8)
+_STROKE_COLOR = _np.array([0, 0, 0, 255], dtype=_np.uint8)
+_STROKE_WIDTH = 2
+
+#  The largest width (or height) of a sprite (larger templates are rasterized in each frame, clipped to the
+#  canvas).
+_MAX_SPRITE_SIZE = 1024
+
+#  The largest count of cached sprites.
+_SPRITE_CACHE_SIZE = 4096
+
+#  The PNG signature.
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def _get_pixel_range(low, high, limit_low, limit_high):
+    """Get the pixels that a range of coordinates covers (clipped to a limit).
+
+    :type low: int | float
+    :type high: int | float
+    :type limit_low: int
+    :type limit_high: int
+    :param low: The lower bound of the range.
+    :param high: The upper bound of the range.
+    :param limit_low: The first pixel of the limit.
+    :param limit_high: The pixel after the last pixel of the limit.
+    :rtype : (int, int) | None
+    :return: The first pixel and the pixel after the last pixel (None if no pixel is covered).
+    """
+
+    if not low <= high or high < limit_low or low > limit_high:
+        return None
+
+    first = limit_low if low < limit_low else _math.floor(low)
+    last = limit_high if high > limit_high else _math.ceil(high)
+    if first >= last:
+        return None
+
+    return first, last
+
+
+def _get_window(xs, ys, x_min, y_min, x_max, y_max):
+    """Get the pixels whose centers are in a rectangle.
+
+    :type xs: numpy.ndarray
+    :type ys: numpy.ndarray
+    :type x_min: float
+    :type y_min: float
+    :type x_max: float
+    :type y_max: float
+    :param xs: The X axis values of the pixel centers of each column (ascending).
+    :param ys: The Y axis values of the pixel centers of each row (ascending).
+    :param x_min: The left bound of the rectangle.
+    :param y_min: The top bound of the rectangle.
+    :param x_max: The right bound of the rectangle.
+    :param y_max: The bottom bound of the rectangle.
+    :rtype : (slice, slice)
+    :return: The rows and the columns.
+    """
+
+    return slice(_np.searchsorted(ys, y_min, "left"), _np.searchsorted(ys, y_max, "right")), \
+        slice(_np.searchsorted(xs, x_min, "left"), _np.searchsorted(xs, x_max, "right"))
+
+
+def _stroke_segment(mask, xs, ys, x1, y1, x2, y2, round_cap):
+    """Scan-convert the stroke of a line segment.
+
+    :type mask: numpy.ndarray
+    :type xs: numpy.ndarray
+    :type ys: numpy.ndarray
+    :type x1: float
+    :type y1: float
+    :type x2: float
+    :type y2: float
+    :type round_cap: bool
+    :param mask: The stroke mask (the covered pixels are set).
+    :param xs: The X axis values of the pixel centers of each column.
+    :param ys: The Y axis values of the pixel centers of each row.
+    :param x1: The X axis value of the first point.
+    :param y1: The Y axis value of the first point.
+    :param x2: The X axis value of the second point.
+    :param y2: The Y axis value of the second point.
+    :param round_cap: True if the ends are rounded (the joins of a path), False if the ends are flat.
+    """
+
+    half_width = _STROKE_WIDTH / 2
+    rows, columns = _get_window(xs, ys,
+                                min(x1, x2) - half_width, min(y1, y2) - half_width,
+                                max(x1, x2) + half_width, max(y1, y2) + half_width)
+    dx = x2 - x1
+    dy = y2 - y1
+    length2 = dx * dx + dy * dy
+    if length2 == 0 and not round_cap:
+        return
+
+    #  Project the pixel centers onto the segment.
+    px = xs[columns][_np.newaxis, :] - x1
+    py = ys[rows][:, _np.newaxis] - y1
+    if length2 == 0:
+        t = _np.zeros((len(py), len(px[0])))
+    else:
+        t = (px * dx + py * dy) / length2
+    if round_cap:
+        t = _np.clip(t, 0, 1)
+    distance2 = (px - t * dx) ** 2 + (py - t * dy) ** 2
+    covered = distance2 <= half_width * half_width
+    if not round_cap:
+        covered &= (t >= 0) & (t <= 1)
+    mask[rows, columns] |= covered
+
+
+def _fill_polygon(mask, xs, ys, points):
+    """Scan-convert the area of a closed polygon (with the nonzero winding rule).
+
+    :type mask: numpy.ndarray
+    :type xs: numpy.ndarray
+    :type ys: numpy.ndarray
+    :type points: numpy.ndarray
+    :param mask: The fill mask (the covered pixels are set).
+    :param xs: The X axis values of the pixel centers of each column.
+    :param ys: The Y axis values of the pixel centers of each row.
+    :param points: The points (an N x 2 array).
+    """
+
+    rows, columns = _get_window(xs, ys,
+                                points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+    row_ys = ys[rows]
+    column_xs = xs[columns]
+    winding = _np.zeros((len(row_ys), len(column_xs)), dtype=_np.int32)
+
+    #  Each edge crosses the scanlines between its ends, and it winds the pixels on the left of the crossings.
+    for edge_id in range(0, len(points)):
+        x1, y1 = points[edge_id]
+        x2, y2 = points[(edge_id + 1) % len(points)]
+        if y1 == y2:
+            continue
+        if y1 < y2:
+            direction = 1
+            first, last = _np.searchsorted(row_ys, y1, "left"), _np.searchsorted(row_ys, y2, "left")
+        else:
+            direction = -1
+            first, last = _np.searchsorted(row_ys, y2, "left"), _np.searchsorted(row_ys, y1, "left")
+        if first == last:
+            continue
+        crossings = x1 + (row_ys[first:last] - y1) * ((x2 - x1) / (y2 - y1))
+        winding[first:last] += direction * (column_xs[_np.newaxis, :] < crossings[:, _np.newaxis])
+
+    mask[rows, columns] |= winding != 0
+
+
+def _rasterize(primitives, left, top, width, height, fx, fy):
+    """Rasterize the primitives of a template.
+
+    :type primitives: list[tuple]
+    :type left: int
+    :type top: int
+    :type width: int
+    :type height: int
+    :type fx: float
+    :type fy: float
+    :param primitives: The primitives (see RasterTemplateEvaluator).
+    :param left: The first column (relative to the pixel of the object position).
+    :param top: The first row (relative to the pixel of the object position).
+    :param width: The column count.
+    :param height: The row count.
+    :param fx: The fractional part of the X axis value of the object position.
+    :param fy: The fractional part of the Y axis value of the object position.
+    :rtype : numpy.ndarray
+    :return: The image (a height x width x 4 RGBA array, transparent where nothing is drawn).
+    """
+
+    #  The pixel centers (relative to the object position).
+    xs = _np.arange(left, left + width, dtype=_np.float64) + (0.5 - fx)
+    ys = _np.arange(top, top + height, dtype=_np.float64) + (0.5 - fy)
+
+    image = _np.zeros((height, width, 4), dtype=_np.uint8)
+    half_width = _STROKE_WIDTH / 2
+    for primitive in primitives:
+        kind = primitive[0]
+        fill = None
+        stroke = _np.zeros((height, width), dtype=bool)
+        if kind == _PRIMITIVE_LINE:
+            _, x1, y1, x2, y2 = primitive
+            _stroke_segment(stroke, xs, ys, x1, y1, x2, y2, False)
+        elif kind == _PRIMITIVE_CIRCLE:
+            _, x, y, radius, is_area = primitive
+            if radius <= 0:
+                #  Nothing is drawn (canvas rejects negative radii).
+                continue
+            rows, columns = _get_window(xs, ys,
+                                        x - radius - half_width, y - radius - half_width,
+                                        x + radius + half_width, y + radius + half_width)
+            distance2 = (xs[columns][_np.newaxis, :] - x) ** 2 + (ys[rows][:, _np.newaxis] - y) ** 2
+            inner = max(radius - half_width, 0)
+            stroke[rows, columns] = (distance2 >= inner * inner) & \
+                (distance2 <= (radius + half_width) * (radius + half_width))
+            if is_area:
+                fill = _np.zeros((height, width), dtype=bool)
+                fill[rows, columns] = distance2 <= radius * radius
+        else:
+            _, points, is_area = primitive
+            for point_id in range(0, len(points)):
+                x1, y1 = points[point_id]
+                x2, y2 = points[(point_id + 1) % len(points)]
+                _stroke_segment(stroke, xs, ys, x1, y1, x2, y2, True)
+            if is_area:
+                fill = _np.zeros((height, width), dtype=bool)
+                _fill_polygon(fill, xs, ys, points)
+
+        #  Fill, then stroke.
+        if fill is not None:
+            image[fill] = _FILL_COLOR
+        image[stroke] = _STROKE_COLOR
+
+    return image
+
+
+class Sprite:
+    """Raster sprite (the image of a template, drawn at the pixel of an object position)."""
+
+    def __init__(self, image, left, top):
+        """Initialize the sprite.
+
+        :type image: numpy.ndarray
+        :type left: int
+        :type top: int
+        :param image: The image (an RGBA array).
+        :param left: The column of the image (relative to the pixel of the object position).
+        :param top: The row of the image (relative to the pixel of the object position).
+        """
+
+        self._image = image
+        self._pixels = image.view(_np.uint32)[:, :, 0]
+        self._mask = image[:, :, 3] != 0
+        self._left = left
+        self._top = top
+
+    def get_image(self):
+        """Get the image.
+
+        :rtype : numpy.ndarray
+        :return: The image (an RGBA array).
+        """
+
+        return self._image
+
+    def get_mask(self):
+        """Get the mask of the drawn pixels.
+
+        :rtype : numpy.ndarray
+        :return: The mask.
+        """
+
+        return self._mask
+
+    def get_left(self):
+        """Get the column of the image.
+
+        :rtype : int
+        :return: The column (relative to the pixel of the object position).
+        """
+
+        return self._left
+
+    def get_top(self):
+        """Get the row of the image.
+
+        :rtype : int
+        :return: The row (relative to the pixel of the object position).
+        """
+
+        return self._top
+
+    def draw(self, canvas, column, row):
+        """Draw the sprite to a canvas.
+
+        :type canvas: numpy.ndarray
+        :type column: int
+        :type row: int
+        :param canvas: The canvas (a contiguous RGBA array).
+        :param column: The column of the object position.
+        :param row: The row of the object position.
+        """
+
+        height, width = self._mask.shape
+        canvas_height, canvas_width = canvas.shape[0:2]
+        left = column + self._left
+        top = row + self._top
+
+        #  Clip the sprite to the canvas.
+        x1 = max(left, 0)
+        y1 = max(top, 0)
+        x2 = min(left + width, canvas_width)
+        y2 = min(top + height, canvas_height)
+        if x1 >= x2 or y1 >= y2:
+            return
+
+        #  Copy the drawn pixels (each RGBA pixel is copied as one 32-bit word).
+        _np.copyto(canvas.view(_np.uint32)[y1:y2, x1:x2, 0],
+                   self._pixels[y1 - top:y2 - top, x1 - left:x2 - left],
+                   where=self._mask[y1 - top:y2 - top, x1 - left:x2 - left])
+
+
+class RasterTemplateEvaluator(_ev.DrawEvaluator):
+    """Raster template evaluator.
+
+    Instead of codes, draw commands are kept as primitives (relative to the position of the object), which are
+    rasterized to sprites by RasterAnimationEvaluator.
+    """
+
+    def __init__(self):
+        """Initialize the evaluator."""
+
+        #  Let the base class initialize.
+        _ev.DrawEvaluator.__init__(self)
+
+        #  Initialize the primitives and their bounds.
+        self._primitives = []
+        self._bounds = [_math.inf, _math.inf, -_math.inf, -_math.inf]
+
+    def get_primitives(self):
+        """Get the primitives.
+
+        :rtype : list[tuple]
+        :return: The primitives.
+        """
+
+        return self._primitives
+
+    def get_bounds(self):
+        """Get the bounds of the primitives (without the stroke width).
+
+        :rtype : (float, float, float, float)
+        :return: The left, top, right and bottom bounds (infinite if there is no primitive).
+        """
+
+        return tuple(self._bounds)
+
+    def _extend_bounds(self, x_min, y_min, x_max, y_max):
+        """Extend the bounds of the primitives.
+
+        :type x_min: int | float
+        :type y_min: int | float
+        :type x_max: int | float
+        :type y_max: int | float
+        :param x_min: The left bound.
+        :param y_min: The top bound.
+        :param x_max: The right bound.
+        :param y_max: The bottom bound.
+        """
+
+        bounds = self._bounds
+        bounds[0] = min(bounds[0], x_min)
+        bounds[1] = min(bounds[1], y_min)
+        bounds[2] = max(bounds[2], x_max)
+        bounds[3] = max(bounds[3], y_max)
+
+    def _add_circle(self, x, y, radius, is_area):
+        """Add a circle.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :type is_area: bool
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        :param is_area: True if the circle is filled.
+        """
+
+        self._primitives.append((_PRIMITIVE_CIRCLE, float(x), float(y), float(radius), is_area))
+        self._extend_bounds(x - abs(radius), y - abs(radius), x + abs(radius), y + abs(radius))
+
+    def _add_path(self, path, is_area):
+        """Add a closed path.
+
+        :type path: list[(int | float, int | float)]
+        :type is_area: bool
+        :param path: The path.
+        :param is_area: True if the path is filled.
+        :raise ValueError: Raise this exception if the path has less than 3 points.
+        """
+
+        #  Safe check.
+        if len(path) < 3:
+            raise ValueError("Invalid path.")
+
+        points = _np.array(path, dtype=_np.float64)
+        self._primitives.append((_PRIMITIVE_PATH, points, is_area))
+        self._extend_bounds(points[:, 0].min(), points[:, 1].min(), points[:, 0].max(), points[:, 1].max())
+
+    def emit_draw_line(self, x1, y1, x2, y2):
+        """Emit a line.
+
+        :type x1: int | float
+        :type y1: int | float
+        :type x2: int | float
+        :type y2: int | float
+        :param x1: The X axis value of the first point.
+        :param y1: The Y axis value of the first point.
+        :param x2: The X axis value of the second point.
+        :param y2: The Y axis value of the second point.
+        """
+
+        self._primitives.append((_PRIMITIVE_LINE, float(x1), float(y1), float(x2), float(y2)))
+        self._extend_bounds(min(x1, x2), min(y1, y2), max(x1, x2), max(y1, y2))
+
+    def emit_draw_circle(self, x, y, radius):
+        """Emit a circle.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        """
+
+        self._add_circle(x, y, radius, False)
+
+    def emit_draw_path(self, path):
+        """Emit a path.
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        """
+
+        self._add_path(path, False)
+
+    def emit_draw_circle_area(self, x, y, radius):
+        """Emit a circle area.
+
+        :type x: int | float
+        :type y: int | float
+        :type radius: int | float
+        :param x: The X axis value of the center point.
+        :param y: The Y axis value of the center point.
+        :param radius: The radius.
+        """
+
+        self._add_circle(x, y, radius, True)
+
+    def emit_draw_path_area(self, path):
+        """Emit a closed path area.
+
+        :type path: list[(int | float, int | float)]
+        :param path: The path.
+        """
+
+        self._add_path(path, True)
+
+
+class RasterFrameEvaluator:
+    """Raster frame evaluator (the templates drawn in a frame)."""
+
+    def __init__(self, canvas):
+        """Initialize the evaluator.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        """
+
+        self._canvas = canvas
+        self._rows = []
+
+    def get_canvas(self):
+        """Get the canvas name.
+
+        :rtype : str
+        :return: The name.
+        """
+
+        return self._canvas
+
+    def get_rows(self):
+        """Get the drawn templates.
+
+        :rtype : list[(int, int | float, int | float)]
+        :return: The template index and the position of each drawn template (in drawing order).
+        """
+
+        return self._rows
+
+    def emit_clear(self):
+        """Clear the canvas."""
+
+        self._rows = []
+
+    def emit_draw_template(self, template_idx, x, y):
+        """Draw a template at a position.
+
+        :type template_idx: int
+        :type x: int | float
+        :type y: int | float
+        :param template_idx: The template index.
+        :param x: The X axis value of the position.
+        :param y: The Y axis value of the position.
+        """
+
+        self._rows.append((template_idx, x, y))
+
+
+class RasterAnimationEvaluator:
+    """Raster animation evaluator (the backend that renders frames to RGBA images).
+
+    The frames are rendered with the same styles as the canvas script (white fill and 2px black stroke on a
+    transparent canvas). Pixels are covered if their centers are covered (no anti-aliasing), and the joins of
+    paths are rounded.
+
+    Each template is rasterized once to a sprite (once per fractional part of the object position) and the
+    sprites are drawn to each frame.
+    """
+
+    def __init__(self, width, height, interval=20, loop=True):
+        """Initialize the animation evaluator.
+
+        :type width: int
+        :type height: int
+        :type interval: int
+        :type loop: bool
+        :param width: The canvas width.
+        :param height: The canvas height.
+        :param interval: The interval.
+        :param loop: Loop flag.
+        :raise ValueError: Raise this exception if the canvas size is invalid.
+        """
+
+        if width <= 0 or height <= 0:
+            raise ValueError("Invalid canvas size.")
+
+        self._width = width
+        self._height = height
+        self._interval = interval
+        self._loop = loop
+        self._frames = []
+        self._templates = []
+        self._sprites = {}
+
+    def get_width(self):
+        """Get the canvas width.
+
+        :rtype : int
+        :return: The width.
+        """
+
+        return self._width
+
+    def get_height(self):
+        """Get the canvas height.
+
+        :rtype : int
+        :return: The height.
+        """
+
+        return self._height
+
+    def get_interval(self):
+        """Get the interval.
+
+        :rtype : int
+        :return: The interval.
+        """
+
+        return self._interval
+
+    def is_loop(self):
+        """Get whether the animation is looped.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._loop
+
+    @staticmethod
+    def create_frame(canvas):
+        """Create a frame evaluator for the animation.
+
+        :type canvas: str
+        :param canvas: The canvas name.
+        :rtype : RasterFrameEvaluator
+        :return: The frame evaluator.
+        """
+
+        return RasterFrameEvaluator(canvas)
+
+    @staticmethod
+    def create_template():
+        """Create a template evaluator for the animation.
+
+        :rtype : RasterTemplateEvaluator
+        :return: The template evaluator.
+        """
+
+        return RasterTemplateEvaluator()
+
+    def add_frame(self, evaluator):
+        """Add a frame.
+
+        :type evaluator: RasterFrameEvaluator
+        :param evaluator: The frame evaluator.
+        """
+
+        self._frames.append(evaluator)
+
+    def add_frame_reference(self, frame_idx):
+        """Add a frame that reuses an already added frame.
+
+        :type frame_idx: int
+        :param frame_idx: The index of the reused frame.
+        """
+
+        self._frames.append(frame_idx)
+
+    def add_template(self, template):
+        """Add an object template.
+
+        :type template: RasterTemplateEvaluator
+        :param template: The template evaluator.
+        :rtype : int
+        :return: The template index.
+        """
+
+        self._templates.append(template)
+
+        return len(self._templates) - 1
+
+    def clear_frame(self):
+        """Clear all frames (and templates)."""
+
+        self._frames.clear()
+        self._templates.clear()
+        self._sprites.clear()
+
+    def take_frame(self):
+        """Take all frames added so far (the frames are removed from the evaluator).
+
+        :rtype : list[RasterFrameEvaluator | int]
+        :return: The frames (a reused frame is represented by its index).
+        """
+
+        frames = self._frames
+        self._frames = []
+
+        return frames
+
+    def get_frame_count(self):
+        """Get the frame count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._frames)
+
+    def get_sprite(self, template_idx, fx, fy):
+        """Get (rasterize if needed) the sprite of a template.
+
+        :type template_idx: int
+        :type fx: float
+        :type fy: float
+        :param template_idx: The template index.
+        :param fx: The fractional part of the X axis value of the object position.
+        :param fy: The fractional part of the Y axis value of the object position.
+        :rtype : Sprite | None
+        :return: The sprite (None if the template is too large to be rasterized to a sprite).
+        """
+
+        key = (template_idx, fx, fy)
+        if key in self._sprites:
+            return self._sprites[key]
+
+        #  Get the pixels covered by the template (and its stroke).
+        half_width = _STROKE_WIDTH / 2
+        x_min, y_min, x_max, y_max = self._templates[template_idx].get_bounds()
+        x_min += fx - half_width
+        y_min += fy - half_width
+        x_max += fx + half_width
+        y_max += fy + half_width
+        if len(self._templates[template_idx].get_primitives()) == 0:
+            sprite = Sprite(_np.zeros((0, 0, 4), dtype=_np.uint8), 0, 0)
+        elif _math.isfinite(x_max - x_min) and _math.isfinite(y_max - y_min) and \
+                x_max - x_min <= _MAX_SPRITE_SIZE and y_max - y_min <= _MAX_SPRITE_SIZE:
+            left = _math.floor(x_min)
+            top = _math.floor(y_min)
+            image = _rasterize(self._templates[template_idx].get_primitives(),
+                               left, top, _math.ceil(x_max) - left, _math.ceil(y_max) - top, fx, fy)
+            sprite = Sprite(image, left, top)
+        else:
+            sprite = None
+
+        #  Save the sprite.
+        if len(self._sprites) >= _SPRITE_CACHE_SIZE:
+            self._sprites.clear()
+        self._sprites[key] = sprite
+
+        return sprite
+
+    def _draw_template(self, canvas, template_idx, x, y):
+        """Draw a template to a canvas.
+
+        :type canvas: numpy.ndarray
+        :type template_idx: int
+        :type x: int | float
+        :type y: int | float
+        :param canvas: The canvas (an RGBA array).
+        :param template_idx: The template index.
+        :param x: The X axis value of the object position.
+        :param y: The Y axis value of the object position.
+        """
+
+        #  Nothing is drawn at non-finite positions.
+        if not (_math.isfinite(x) and _math.isfinite(y)):
+            return
+
+        column = _math.floor(x)
+        row = _math.floor(y)
+        fx = float(x - column)
+        fy = float(y - row)
+        sprite = self.get_sprite(template_idx, fx, fy)
+        if sprite is not None:
+            sprite.draw(canvas, column, row)
+            return
+
+        #  Rasterize a large template in the frame (clipped to the canvas).
+        half_width = _STROKE_WIDTH / 2
+        x_min, y_min, x_max, y_max = self._templates[template_idx].get_bounds()
+        columns = _get_pixel_range(x_min - half_width + fx, x_max + half_width + fx, -column, self._width - column)
+        rows = _get_pixel_range(y_min - half_width + fy, y_max + half_width + fy, -row, self._height - row)
+        if columns is None or rows is None:
+            return
+        image = _rasterize(self._templates[template_idx].get_primitives(),
+                           columns[0], rows[0], columns[1] - columns[0], rows[1] - rows[0], fx, fy)
+        Sprite(image, columns[0], rows[0]).draw(canvas, column, row)
+
+    def render_frame(self, frame):
+        """Render a frame.
+
+        :type frame: RasterFrameEvaluator
+        :param frame: The frame evaluator.
+        :rtype : numpy.ndarray
+        :return: The image (a height x width x 4 RGBA array).
+        """
+
+        canvas = _np.zeros((self._height, self._width, 4), dtype=_np.uint8)
+        for template_idx, x, y in frame.get_rows():
+            self._draw_template(canvas, template_idx, x, y)
+
+        return canvas
+
+    def iterate_image(self):
+        """Iterate the rendered images of all frames.
+
+        A reused frame yields the same image object as the frame it reuses, so the images must not be changed.
+
+        :rtype : collections.Iterable[numpy.ndarray]
+        :return: The image iterator.
+        """
+
+        #  Keep the images of reused frames only.
+        reused = set([frame for frame in self._frames if isinstance(frame, int)])
+        images = {}
+        for frame_idx, frame in enumerate(self._frames):
+            if isinstance(frame, int):
+                image = images.get(frame)
+                if image is None:
+                    image = self.render_frame(self._frames[frame])
+            else:
+                image = self.render_frame(frame)
+                if frame_idx in reused:
+                    images[frame_idx] = image
+            yield image
+
+
+def rasterize(commands, width, height, budget=None):
+    """Compile commands to a raster animation.
+
+    :type commands: collections.Iterable[xnilang.parser.ast.CommandNode]
+    :type width: int
+    :type height: int
+    :type budget: xnilang.compiler.budget.CompileBudget | None
+    :param commands: The commands.
+    :param width: The canvas width.
+    :param height: The canvas height.
+    :param budget: The compile budget (None if unlimited).
+    :rtype : RasterAnimationEvaluator
+    :return: The animation evaluator (with the compiled frames).
+    :raise xnilang.compiler.error.CompilationError: Raise this exception if the commands can't be compiled.
+    """
+
+    evaluator = RasterAnimationEvaluator(width, height)
+    compiler = _compiler.Compiler(evaluator, "main", budget)
+    for cmd in commands:
+        compiler.compile_command(cmd)
+
+    return evaluator
+
+
+def make_sprite_sheet(images, columns=None):
+    """Tile images of the same size to a sprite sheet (from left to right, then from top to bottom).
+
+    :type images: list[numpy.ndarray]
+    :type columns: int | None
+    :param images: The images (RGBA arrays).
+    :param columns: The column count of the sheet (None if the sheet is about square).
+    :rtype : numpy.ndarray
+    :return: The sheet (an RGBA array, transparent after the last image).
+    :raise ValueError: Raise this exception if there is no image or the column count is invalid.
+    """
+
+    if len(images) == 0:
+        raise ValueError("No image.")
+    if columns is None:
+        columns = _math.ceil(_math.sqrt(len(images)))
+    if columns <= 0:
+        raise ValueError("Invalid column count.")
+
+    columns = min(columns, len(images))
+    rows = (len(images) + columns - 1) // columns
+    height, width = images[0].shape[0:2]
+    tiles = _np.zeros((rows * columns, height, width, 4), dtype=_np.uint8)
+    tiles[0:len(images)] = images
+
+    return tiles.reshape(rows, columns, height, width, 4).transpose(0, 2, 1, 3, 4).reshape(rows * height,
+                                                                                         columns * width, 4)
+
+
+def _get_png_chunk(tag, data):
+    """Get a PNG chunk.
+
+    :type tag: bytes
+    :type data: bytes
+    :param tag: The chunk type.
+    :param data: The chunk data.
+    :rtype : bytes
+    :return: The chunk.
+    """
+
+    return _struct.pack(">I", len(data)) + tag + data + _struct.pack(">I", _zlib.crc32(tag + data) & 0xFFFFFFFF)
+
+
+def encode_png(image, level=6):
+    """Encode an image as PNG (8-bit RGBA).
+
+    :type image: numpy.ndarray
+    :type level: int
+    :param image: The image (a height x width x 4 RGBA array).
+    :param level: The compression level.
+    :rtype : bytes
+    :return: The PNG data.
+    :raise ValueError: Raise this exception if the image is invalid.
+    """
+
+    if image.ndim != 3 or image.shape[2] != 4 or image.dtype != _np.uint8 or image.size == 0:
+        raise ValueError("Invalid image.")
+
+    #  Prefix each row with the filter type (none).
+    height, width = image.shape[0:2]
+    scanlines = _np.zeros((height, width * 4 + 1), dtype=_np.uint8)
+    scanlines[:, 1:] = image.reshape(height, width * 4)
+
+    return _PNG_SIGNATURE + \
+        _get_png_chunk(b"IHDR", _struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)) + \
+        _get_png_chunk(b"IDAT", _zlib.compress(scanlines.tobytes(), level)) + \
+        _get_png_chunk(b"IEND", b"")
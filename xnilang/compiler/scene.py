@@ -0,0 +1,324 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import collections as _collections
+
+
+class SceneObject:
+    """Scene object (the record of a defined object)."""
+
+    __slots__ = ("_name", "_draw_list", "_template", "_template_error", "_visible", "_x", "_y")
+
+    def __init__(self, name, draw_list, template, template_error):
+        """Initialize the object (invisible, at (0, 0)).
+
+        :type name: str
+        :type draw_list: xnilang.parser.ast.DrawList
+        :type template: int
+        :type template_error: str | None
+        :param name: The object name.
+        :param draw_list: The draw list.
+        :param template: The template index.
+        :param template_error: The template compilation error message (None if no error).
+        """
+
+        self._name = name
+        self._draw_list = draw_list
+        self._template = template
+        self._template_error = template_error
+        self._visible = False
+        self._x = 0
+        self._y = 0
+
+    def get_name(self):
+        """Get the object name.
+
+        :rtype : str
+        :return: The name.
+        """
+
+        return self._name
+
+    def get_draw_list(self):
+        """Get the draw list.
+
+        :rtype : xnilang.parser.ast.DrawList
+        :return: The draw list.
+        """
+
+        return self._draw_list
+
+    def get_template(self):
+        """Get the template index.
+
+        :rtype : int
+        :return: The index.
+        """
+
+        return self._template
+
+    def get_template_error(self):
+        """Get the template compilation error message.
+
+        :rtype : str | None
+        :return: The message (None if no error).
+        """
+
+        return self._template_error
+
+    def is_visible(self):
+        """Get whether the object is visible (placed).
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._visible
+
+    def set_visible(self, visible):
+        """Set whether the object is visible (placed).
+
+        :type visible: bool
+        :param visible: True if so.
+        """
+
+        self._visible = visible
+
+    def get_x(self):
+        """Get the X axis value of the position.
+
+        :rtype : int | float
+        :return: The value.
+        """
+
+        return self._x
+
+    def get_y(self):
+        """Get the Y axis value of the position.
+
+        :rtype : int | float
+        :return: The value.
+        """
+
+        return self._y
+
+    def set_position(self, x, y):
+        """Set the position.
+
+        :type x: int | float
+        :type y: int | float
+        :param x: The X axis value.
+        :param y: The Y axis value.
+        """
+
+        self._x = x
+        self._y = y
+
+    def copy(self):
+        """Get a copy of the object.
+
+        :rtype : SceneObject
+        :return: The copy.
+        """
+
+        obj = SceneObject(self._name, self._draw_list, self._template, self._template_error)
+        obj._visible = self._visible
+        obj._x = self._x
+        obj._y = self._y
+
+        return obj
+
+
+class SceneGraph:
+    """Scene graph (the object table and the display list).
+
+    Each object name is resolved once to an integer ID. The display list is an insertion-ordered dictionary
+    of display entries (entry sequence -> object ID) plus the queue of entries of each object, so appending
+    an entry and removing the earliest entry of an object are both O(1).
+
+    An object keeps its entries when it is redefined, so (just like a list of names) the display list may
+    contain an object more than once. Every entry draws the current record of its object.
+    """
+
+    def __init__(self):
+        """Initialize an empty scene."""
+
+        self._object_ids = {}
+        self._objects = []
+        self._entries = []
+        self._display = {}
+        self._next_entry = 0
+
+    def copy(self):
+        """Get a copy of the scene (later changes of either scene don't affect the other one).
+
+        :rtype : SceneGraph
+        :return: The copy.
+        """
+
+        scene = SceneGraph()
+        scene._object_ids = dict(self._object_ids)
+        scene._objects = [obj.copy() for obj in self._objects]
+        scene._entries = [_collections.deque(entries) for entries in self._entries]
+        scene._display = dict(self._display)
+        scene._next_entry = self._next_entry
+
+        return scene
+
+    def get_object_id(self, name):
+        """Get the ID of an object.
+
+        :type name: str
+        :param name: The object name.
+        :rtype : int | None
+        :return: The ID (None if the object hasn't been defined).
+        """
+
+        return self._object_ids.get(name)
+
+    def get_object_count(self):
+        """Get the count of defined objects.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._objects)
+
+    def get_object(self, object_id):
+        """Get the record of an object.
+
+        :type object_id: int
+        :param object_id: The object ID.
+        :rtype : SceneObject
+        :return: The record.
+        """
+
+        return self._objects[object_id]
+
+    def define(self, obj):
+        """Define (or redefine) an object.
+
+        :type obj: SceneObject
+        :param obj: The new record of the object.
+        :rtype : int
+        :return: The object ID.
+        """
+
+        object_id = self._object_ids.get(obj.get_name())
+        if object_id is None:
+            object_id = self._object_ids[obj.get_name()] = len(self._objects)
+            self._objects.append(obj)
+            self._entries.append(_collections.deque())
+        else:
+            self._objects[object_id] = obj
+
+        return object_id
+
+    def place(self, object_id, x, y):
+        """Place an object to a position and move it onto the top of the display list.
+
+        :type object_id: int
+        :type x: int | float
+        :type y: int | float
+        :param object_id: The object ID.
+        :param x: The X axis value of the position.
+        :param y: The Y axis value of the position.
+        """
+
+        obj = self._objects[object_id]
+        entries = self._entries[object_id]
+
+        #  Remove the existed display entry.
+        if obj.is_visible():
+            del self._display[entries.popleft()]
+
+        #  Place the object.
+        obj.set_position(x, y)
+        obj.set_visible(True)
+
+        #  Append an entry onto the top of the display list.
+        entry = self._next_entry
+        self._next_entry += 1
+        self._display[entry] = object_id
+        entries.append(entry)
+
+    def erase(self, object_id):
+        """Erase an object (remove its earliest display entry).
+
+        :type object_id: int
+        :param object_id: The object ID.
+        """
+
+        self._objects[object_id].set_visible(False)
+        del self._display[self._entries[object_id].popleft()]
+
+    def is_displayed(self, object_id):
+        """Get whether an object has entries in the display list.
+
+        :type object_id: int
+        :param object_id: The object ID.
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return len(self._entries[object_id]) != 0
+
+    def get_entry_count(self, object_id):
+        """Get the count of display entries of an object.
+
+        :type object_id: int
+        :param object_id: The object ID.
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._entries[object_id])
+
+    def get_top_object(self):
+        """Get the object of the top display entry.
+
+        :rtype : SceneObject | None
+        :return: The object (None if the display list is empty).
+        """
+
+        if len(self._display) == 0:
+            return None
+
+        return self._objects[next(reversed(self._display.values()))]
+
+    def get_display_count(self):
+        """Get the count of display entries.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._display)
+
+    def iterate_display(self):
+        """Iterate the objects in the display list (from bottom to top).
+
+        :rtype : collections.Iterable[SceneObject]
+        :return: The object iterator.
+        """
+
+        objects = self._objects
+        for object_id in self._display.values():
+            yield objects[object_id]
+
+    def iterate_display_id(self):
+        """Iterate the IDs of the objects in the display list (from bottom to top).
+
+        :rtype : collections.Iterable[int]
+        :return: The object ID iterator.
+        """
+
+        return iter(self._display.values())
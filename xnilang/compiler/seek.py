@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import bisect as _bisect
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.evaluator as _ev
+
+
+#  A checkpoint is taken once this count of frames has been simulated since the last checkpoint (a query
+#  simulates fewer frames than this, see SeekIndex).
+_CHECKPOINT_FRAMES = 256
+
+#  A checkpoint is taken once this count of top-level commands has been simulated since the last checkpoint.
+_CHECKPOINT_COMMANDS = 16
+
+
+class _SeekStop(Exception):
+    """Raised by _SeekCompiler when the requested frame has been reached."""
+
+    pass
+
+
+class _SeekCompiler(_compiler.SymbolicCompiler):
+    """Compiler that only simulates commands (and can take checkpoints or stop at a frame)."""
+
+    def __init__(self, scene=None):
+        """Initialize the compiler.
+
+        :type scene: xnilang.compiler.scene.SceneGraph | None
+        :param scene: The initial scene (None if empty).
+        """
+
+        #  Let the base class initialize.
+        _compiler.SymbolicCompiler.__init__(self, _ev.SymbolicAnimationEvaluator(0, False), None)
+
+        #  Restore the scene.
+        if scene is not None:
+            self._scene = scene
+
+        #  Initialize the frame to stop at.
+        self._stop_frame = None
+
+        #  Initialize the checkpoints ([frame, command index, scene, loop stack], None if no checkpoint is taken).
+        self._checkpoints = None
+        self._command_id = 0
+        self._checkpoint_commands = 0
+
+    def _add_checkpoint(self, stack):
+        """Take a checkpoint if enough frames or commands have been simulated since the last one.
+
+        :type stack: list[list]
+        :param stack: The loop stack of the current command.
+        """
+
+        frame = self._statistics.get_frame_count()
+        if len(self._checkpoints) != 0 and frame - self._checkpoints[-1][0] < _CHECKPOINT_FRAMES and \
+                self._checkpoint_commands < _CHECKPOINT_COMMANDS:
+            return
+
+        self._checkpoints.append([frame, self._command_id, self._scene.copy(), [list(item) for item in stack]])
+        self._checkpoint_commands = 0
+
+    def _begin_loop_iteration(self, stack):
+        """Handle the beginning of an iteration of a loop on the loop stack (a checkpoint may be taken).
+
+        :type stack: list[list]
+        :param stack: The loop stack.
+        """
+
+        if self._checkpoints is not None:
+            self._add_checkpoint(stack)
+
+    def _macro_redraw(self):
+        """(Macro) Count a new animation frame (and stop at the requested frame).
+
+        :raise _SeekStop: Raise this exception if the requested frame has been reached.
+        """
+
+        _compiler.SymbolicCompiler._macro_redraw(self)
+        if self._statistics.get_frame_count() == self._stop_frame:
+            raise _SeekStop()
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands.
+
+        If the requested frame is in these iterations, the iterations before it are skipped in closed form.
+
+        :type move_list: xnilang.parser.ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        :raise _SeekStop: Raise this exception if the requested frame has been reached.
+        """
+
+        if self._stop_frame is None:
+            _compiler.SymbolicCompiler._repeat_loop_body(self, move_list, steps, times)
+            return
+
+        #  Skip the iterations before the requested frame.
+        skipped = min(times, (self._stop_frame - self._statistics.get_frame_count() - 1) // len(steps))
+        _compiler.SymbolicCompiler._repeat_loop_body(self, move_list, steps, skipped)
+
+        #  Step into the iteration of the requested frame.
+        if skipped < times:
+            for mv_id in range(0, move_list.get_command_count()):
+                self._compile_move_command(move_list.get_command(mv_id))
+
+    def simulate_command(self, cmd):
+        """Simulate a command (without emitting it).
+
+        :type cmd: xnilang.parser.ast.CommandNode
+        :param cmd: The command.
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        _compiler.Compiler.compile_command(self, cmd)
+
+    def take_checkpoints(self, commands):
+        """Simulate commands and take checkpoints.
+
+        :type commands: collections.Iterable[xnilang.parser.ast.CommandNode]
+        :param commands: The commands.
+        :rtype : list[list]
+        :return: The checkpoints ([frame, command index, scene, loop stack], in order).
+        :raise _error.CompilationError: Raise this exception if an error occurred.
+        """
+
+        self._checkpoints = []
+        self._command_id = 0
+        for cmd in commands:
+            self._add_checkpoint([])
+            self.simulate_command(cmd)
+            self._command_id += 1
+            self._checkpoint_commands += 1
+
+        return self._checkpoints
+
+    def seek(self, commands, cmd_id, stack, frame):
+        """Resume the simulation of commands (from a checkpoint) until a frame.
+
+        :type commands: list[xnilang.parser.ast.CommandNode]
+        :type cmd_id: int
+        :type stack: list[list]
+        :type frame: int
+        :param commands: The commands.
+        :param cmd_id: The index of the command to resume.
+        :param stack: The loop stack of the command to resume (empty if the command hasn't been started).
+        :param frame: The frame index (relative to the first frame after the checkpoint).
+        """
+
+        self._stop_frame = self._statistics.get_frame_count() + frame + 1
+        try:
+            #  Finish the loops of the resumed command.
+            if len(stack) != 0:
+                self._run_loop_stack(stack)
+                cmd_id += 1
+
+            for cmd_id in range(cmd_id, len(commands)):
+                self.simulate_command(commands[cmd_id])
+        except _SeekStop:
+            pass
+
+
+class SeekIndex:
+    """Random-access index of the frames of a script.
+
+    While the index is built, a checkpoint (a copy of the scene and of the loop stack) is taken before a
+    top-level command or an iteration of a loop once _CHECKPOINT_FRAMES frames or _CHECKPOINT_COMMANDS
+    top-level commands have been simulated since the last one, so long loops get checkpoints between their
+    iterations. A query finds the last checkpoint before its frame by binary search and resumes the simulation
+    from there, so it simulates fewer than _CHECKPOINT_FRAMES frames (loops of place and shift commands skip to
+    the iteration of the frame in closed form).
+    """
+
+    def __init__(self, commands):
+        """Build the index (the commands are simulated once).
+
+        :type commands: collections.Iterable[xnilang.parser.ast.CommandNode]
+        :param commands: The commands.
+        :raise xnilang.compiler.error.CompilationError: Raise this exception if the commands can't be compiled.
+        """
+
+        self._commands = list(commands)
+        compiler = _SeekCompiler()
+        self._checkpoints = compiler.take_checkpoints(self._commands)
+        self._checkpoint_frames = [checkpoint[0] for checkpoint in self._checkpoints]
+        self._frame_count = compiler.get_statistics().get_frame_count()
+
+    def get_frame_count(self):
+        """Get the frame count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._frame_count
+
+    def get_checkpoint_count(self):
+        """Get the count of checkpoints.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._checkpoints)
+
+    def get_frame_state(self, frame):
+        """Get the scene state of a frame.
+
+        :type frame: int
+        :param frame: The frame index.
+        :rtype : list[(str, int | float, int | float)]
+        :return: The name and the position of each visible object, in display order (from bottom to top).
+        :raise ValueError: Raise this exception if the frame index is out of range.
+        """
+
+        if frame < 0 or frame >= self._frame_count:
+            raise ValueError("Invalid frame index.")
+
+        #  Find the last checkpoint before the frame.
+        frame_start, cmd_id, scene, stack = self._checkpoints[_bisect.bisect_right(self._checkpoint_frames, frame) - 1]
+
+        #  Resume the simulation until the frame.
+        compiler = _SeekCompiler(scene.copy())
+        compiler.seek(self._commands, cmd_id, [list(item) for item in stack], frame - frame_start)
+
+        return [(obj.get_name(), obj.get_x(), obj.get_y()) for obj in compiler.get_scene().iterate_display()]
@@ -0,0 +1,319 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import array as _array
+import numpy as _np
+import xnilang.compiler.compiler as _compiler
+import xnilang.compiler.error as _error
+import xnilang.compiler.evaluator as _ev
+
+
+class Timeline:
+    """Timeline (the intermediate representation between the compiler and the animation data backend).
+
+    Each row is a display entry of a frame: (template, x, y). A frame contains exactly the displayed objects
+    (hidden objects have no row), in display order. The rows of frame k are rows [offsets[k], offsets[k + 1]).
+
+    The geometry of each template is the draw list it was compiled from.
+    """
+
+    def __init__(self, offsets, templates, xs, ys, draw_lists, template_errors):
+        """Initialize the timeline.
+
+        :type offsets: numpy.ndarray
+        :type templates: numpy.ndarray
+        :type xs: numpy.ndarray
+        :type ys: numpy.ndarray
+        :type draw_lists: list[xnilang.parser.ast.DrawList]
+        :type template_errors: list[str | None]
+        :param offsets: The first row of each frame (and the row count at the end).
+        :param templates: The template index of each row.
+        :param xs: The X axis value of each row.
+        :param ys: The Y axis value of each row.
+        :param draw_lists: The draw list of each template.
+        :param template_errors: The compilation error message of each template (None if no error).
+        """
+
+        self._offsets = offsets
+        self._templates = templates
+        self._xs = xs
+        self._ys = ys
+        self._draw_lists = draw_lists
+        self._template_errors = template_errors
+
+    def get_frame_count(self):
+        """Get the frame count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._offsets) - 1
+
+    def get_offsets(self):
+        """Get the first row of each frame (and the row count at the end).
+
+        :rtype : numpy.ndarray
+        :return: The offsets (int64).
+        """
+
+        return self._offsets
+
+    def get_templates(self):
+        """Get the template index of each row.
+
+        :rtype : numpy.ndarray
+        :return: The template indexes (int32).
+        """
+
+        return self._templates
+
+    def get_xs(self):
+        """Get the X axis value of each row.
+
+        :rtype : numpy.ndarray
+        :return: The values (float64).
+        """
+
+        return self._xs
+
+    def get_ys(self):
+        """Get the Y axis value of each row.
+
+        :rtype : numpy.ndarray
+        :return: The values (float64).
+        """
+
+        return self._ys
+
+    def get_template_count(self):
+        """Get the template count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._draw_lists)
+
+    def get_draw_list(self, template_idx):
+        """Get the draw list (the geometry) of a template.
+
+        :type template_idx: int
+        :param template_idx: The template index.
+        :rtype : xnilang.parser.ast.DrawList
+        :return: The draw list.
+        """
+
+        return self._draw_lists[template_idx]
+
+    def get_template_error(self, template_idx):
+        """Get the compilation error message of a template.
+
+        :type template_idx: int
+        :param template_idx: The template index.
+        :rtype : str | None
+        :return: The message (None if no error).
+        """
+
+        return self._template_errors[template_idx]
+
+
+class _TemplateCounter:
+    """Evaluator stub that only numbers the templates compiled by TimelineCompiler."""
+
+    def __init__(self):
+        """Initialize the counter."""
+
+        self._count = 0
+
+    def clear_frame(self):
+        """Clear all templates."""
+
+        self._count = 0
+
+    @staticmethod
+    def create_template():
+        """Create a template evaluator.
+
+        :rtype : _ev.TemplateEvaluator
+        :return: The template evaluator.
+        """
+
+        return _ev.TemplateEvaluator()
+
+    def add_template(self, template):
+        """Number a template.
+
+        :type template: _ev.TemplateEvaluator
+        :param template: The template evaluator (discarded).
+        :rtype : int
+        :return: The template index.
+        """
+
+        self._count += 1
+
+        return self._count - 1
+
+
+class TimelineCompiler(_compiler.Compiler):
+    """Timeline compiler class.
+
+    The commands are simulated like Compiler does, but instead of emitting frames, the display entries of
+    each frame are recorded as rows of a timeline (see Timeline).
+    """
+
+    def __init__(self, budget=None):
+        """Initialize the compiler.
+
+        :type budget: xnilang.compiler.budget.CompileBudget | None
+        :param budget: The compile budget (None if unlimited).
+        """
+
+        #  Let the base class initialize.
+        _compiler.Compiler.__init__(self, _TemplateCounter(), None, budget)
+
+        #  Initialize the rows (the object IDs are only used to find the rows of shifted objects in loops).
+        self._row_offsets = _array.array("q", [0])
+        self._row_object_ids = _array.array("i")
+        self._row_templates = _array.array("i")
+        self._row_xs = _array.array("d")
+        self._row_ys = _array.array("d")
+
+        #  Initialize the geometry of templates.
+        self._draw_lists = []
+        self._template_errors = []
+
+    def _get_template(self, draw_list):
+        """Get (compile if needed) the template of a draw list.
+
+        :type draw_list: _ast.DrawList
+        :param draw_list: The draw list.
+        :rtype : list
+        :return: The template index and the compilation error message (None if no error).
+        """
+
+        tpl_info = _compiler.Compiler._get_template(self, draw_list)
+
+        #  Record the geometry of new templates.
+        if tpl_info[0] == len(self._draw_lists):
+            self._draw_lists.append(draw_list)
+            self._template_errors.append(tpl_info[1])
+
+        return tpl_info
+
+    def _macro_redraw(self):
+        """(Macro) Record the visible objects as a new frame of the timeline.
+
+        :raise _error.CompilationError: Raise this exception if the template of an object can't be compiled.
+        """
+
+        scene = self._scene
+        for object_id in scene.iterate_display_id():
+            obj = scene.get_object(object_id)
+
+            #  Check the template.
+            if obj.get_template_error() is not None:
+                raise _error.CompilationError(obj.get_template_error())
+
+            #  Record the row.
+            self._row_object_ids.append(object_id)
+            self._row_templates.append(obj.get_template())
+            self._row_xs.append(obj.get_x())
+            self._row_ys.append(obj.get_y())
+
+        #  End the frame.
+        self._row_offsets.append(len(self._row_object_ids))
+        self._count_frame(False)
+
+    def _repeat_loop_body(self, move_list, steps, times):
+        """Compile more iterations of a loop body that only contains place and shift commands.
+
+        The rows of the last iteration are repeated, and the positions of the shifted objects are generated
+        with cumulative sums of their deltas.
+
+        :type move_list: _ast.MoveList
+        :type steps: tuple
+        :type times: int
+        :param move_list: The loop body.
+        :param steps: The steps of the loop body (see _get_loop_steps()).
+        :param times: The repeat times.
+        """
+
+        #  Count the frames (before generating their rows).
+        step_count = len(steps)
+        self._count_frame(False, times * step_count)
+
+        #  Get the rows of the last iteration (one frame per step).
+        offsets = _np.array(self._row_offsets[len(self._row_offsets) - step_count - 1:], dtype=_np.int64)
+        first_row = int(offsets[0])
+        last_row = int(offsets[-1])
+        block_size = last_row - first_row
+        offsets -= first_row
+        block_object_ids = _np.array(self._row_object_ids[first_row:last_row], dtype=_np.int32)
+        block_steps = _np.repeat(_np.arange(step_count, dtype=_np.int64), _np.diff(offsets))
+
+        #  Repeat the rows.
+        iterations = _np.arange(times, dtype=_np.int64)[:, None]
+        object_ids = _np.tile(block_object_ids, times)
+        templates = _np.tile(_np.array(self._row_templates[first_row:last_row], dtype=_np.int32), times)
+        xs = _np.tile(_np.array(self._row_xs[first_row:last_row], dtype=_np.float64), times)
+        ys = _np.tile(_np.array(self._row_ys[first_row:last_row], dtype=_np.float64), times)
+
+        #  Generate the positions of the shifted objects.
+        for target_name in self._get_shift_deltas(steps):
+            object_id = self._scene.get_object_id(target_name)
+            obj = self._scene.get_object(object_id)
+            rows = _np.nonzero(block_object_ids == object_id)[0]
+            final = []
+            for axis, values, value in [(2, xs, obj.get_x()), (3, ys, obj.get_y())]:
+                #  Get the delta of each step and the count of deltas before (and at) each step.
+                step_deltas = _np.array([step[axis] if step[0] == target_name else 0 for step in steps],
+                                        dtype=_np.float64)
+                deltas = step_deltas[step_deltas != 0]
+                if len(deltas) == 0:
+                    final.append(value)
+                    continue
+                delta_counts = _np.cumsum(step_deltas != 0)
+
+                #  Accumulate the deltas (one by one, like the simulation does). Integer values are accumulated
+                #  exactly and then rounded, just like they are rounded when they are recorded.
+                if isinstance(value, int):
+                    sums = _np.cumsum(_np.concatenate(([0], _np.tile(deltas.astype(_np.int64), times))))
+                    sums = (sums + value).astype(_np.float64) if abs(value) < 2 ** 62 else \
+                        _np.array([float(value + delta) for delta in sums.tolist()], dtype=_np.float64)
+                    final.append(value + int(deltas.sum()) * times)
+                else:
+                    sums = _np.cumsum(_np.concatenate(([value], _np.tile(deltas, times))))
+                    final.append(float(sums[-1]))
+                values[(iterations * block_size + rows).ravel()] = \
+                    sums[(iterations * len(deltas) + delta_counts[block_steps[rows]]).ravel()]
+            obj.set_position(final[0], final[1])
+
+        #  Append the rows and the frames.
+        self._row_object_ids.frombytes(object_ids.astype(self._row_object_ids.typecode).tobytes())
+        self._row_templates.frombytes(templates.astype(self._row_templates.typecode).tobytes())
+        self._row_xs.frombytes(xs.tobytes())
+        self._row_ys.frombytes(ys.tobytes())
+        self._row_offsets.frombytes(((iterations * block_size + offsets[1:]).ravel() + last_row).tobytes())
+
+    def get_timeline(self):
+        """Get the timeline of the commands compiled so far.
+
+        :rtype : Timeline
+        :return: The timeline.
+        """
+
+        return Timeline(_np.array(self._row_offsets, dtype=_np.int64),
+                        _np.array(self._row_templates, dtype=_np.int32),
+                        _np.array(self._row_xs, dtype=_np.float64),
+                        _np.array(self._row_ys, dtype=_np.float64),
+                        list(self._draw_lists),
+                        list(self._template_errors))
+
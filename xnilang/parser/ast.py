@@ -11,6 +11,8 @@
 class Node:
     """Base node class."""
 
+    __slots__ = ()
+
     def __init__(self):
         """Initialize the node."""
         pass
@@ -19,6 +21,8 @@ class Node:
 class OperandNode(Node):
     """Operand node."""
 
+    __slots__ = ("_value",)
+
     def __init__(self, value):
         """Initialize the operand node.
 
@@ -45,6 +49,8 @@ class OperandNode(Node):
 class TargetNode(Node):
     """Target node class."""
 
+    __slots__ = ("_target",)
+
     def __init__(self, target_name):
         """Initialize the target node.
 
@@ -71,6 +77,8 @@ class TargetNode(Node):
 class PointNode(Node):
     """Point node."""
 
+    __slots__ = ("_x", "_y")
+
     def __init__(self, x, y):
         """Initialize the point node.
 
@@ -109,6 +117,8 @@ class PointNode(Node):
 class PointListNode(Node):
     """Point list node."""
 
+    __slots__ = ("_points",)
+
     def __init__(self, point_list):
         """Initialize the point list node.
 
@@ -120,7 +130,7 @@ class PointListNode(Node):
         Node.__init__(self)
 
         #  Save the point list.
-        self._points = point_list
+        self._points = tuple(point_list)
 
     def is_valid_index(self, idx):
         """Get whether an point index is valid.
@@ -160,6 +170,8 @@ class PointListNode(Node):
 class DirectionNode(Node):
     """Direction node."""
 
+    __slots__ = ("_indicator",)
+
     def __init__(self, indicator):
         """Initialize the direction node.
 
@@ -238,6 +250,8 @@ class DirectionNode(Node):
 class CommandNode(Node):
     """Base command node."""
 
+    __slots__ = ("_cmd", "_args")
+
     def __init__(self, cmd, args):
         """Initialize the command node.
 
@@ -252,7 +266,7 @@ class CommandNode(Node):
 
         #  Save the command and the arguments.
         self._cmd = cmd
-        self._args = args
+        self._args = tuple(args)
 
     def get_command(self):
         """Get the command.
@@ -303,6 +317,8 @@ class CommandNode(Node):
 class DrawCommand(CommandNode):
     """Base draw command node."""
 
+    __slots__ = ()
+
     def __init__(self, cmd, args):
         """Initialize the draw command node.
 
@@ -318,6 +334,8 @@ class DrawCommand(CommandNode):
 class MoveCommand(CommandNode):
     """Base move command node."""
 
+    __slots__ = ()
+
     def __init__(self, cmd, args):
         """Initialize the move command node.
 
@@ -333,6 +351,8 @@ class MoveCommand(CommandNode):
 class CircleCommand(DrawCommand):
     """Circle command node."""
 
+    __slots__ = ()
+
     def __init__(self, center, radius):
         """Initialize the circle command node.
 
@@ -366,6 +386,8 @@ class CircleCommand(DrawCommand):
 class LineCommand(DrawCommand):
     """Line command node."""
 
+    __slots__ = ()
+
     def __init__(self, p1, p2):
         """Initialize the line command node.
 
@@ -399,6 +421,8 @@ class LineCommand(DrawCommand):
 class ClosedPathCommand(DrawCommand):
     """Closed path command node."""
 
+    __slots__ = ()
+
     def __init__(self, point_list):
         """Initialize the closed path command node.
 
@@ -422,6 +446,8 @@ class ClosedPathCommand(DrawCommand):
 class CircleAreaCommand(DrawCommand):
     """Circle area command node."""
 
+    __slots__ = ()
+
     def __init__(self, center, radius):
         """Initialize the circle area command node.
 
@@ -456,6 +482,8 @@ class CircleAreaCommand(DrawCommand):
 class SquareAreaCommand(DrawCommand):
     """Square area command node."""
 
+    __slots__ = ()
+
     def __init__(self, center, width, height):
         """Initialize the square area command node.
 
@@ -501,6 +529,8 @@ class SquareAreaCommand(DrawCommand):
 class ClosedPathAreaCommand(DrawCommand):
     """Closed path area command node."""
 
+    __slots__ = ()
+
     def __init__(self, path):
         """Initialize the closed path area command.
 
@@ -524,6 +554,8 @@ class ClosedPathAreaCommand(DrawCommand):
 class PlaceCommand(MoveCommand):
     """Place command node."""
 
+    __slots__ = ()
+
     def __init__(self, target, position):
         """Initialize the place command node.
 
@@ -557,6 +589,8 @@ class PlaceCommand(MoveCommand):
 class ShiftCommand(MoveCommand):
     """Shift command node."""
 
+    __slots__ = ()
+
     def __init__(self, target, direction):
         """Initialize the shift command node.
 
@@ -590,6 +624,8 @@ class ShiftCommand(MoveCommand):
 class EraseCommand(MoveCommand):
     """Erase command node."""
 
+    __slots__ = ()
+
     def __init__(self, target):
         """Initialize the erase command node.
 
@@ -612,6 +648,8 @@ class EraseCommand(MoveCommand):
 class DrawList(Node):
     """Draw list node."""
 
+    __slots__ = ("_commands",)
+
     def __init__(self, commands):
         """Initialize the draw list node.
 
@@ -623,7 +661,7 @@ class DrawList(Node):
         Node.__init__(self)
 
         #  Save the commands list.
-        self._commands = commands
+        self._commands = tuple(commands)
 
     def get_command_count(self):
         """Get the command count.
@@ -665,6 +703,8 @@ class DrawList(Node):
 class MoveList(Node):
     """Move list node."""
 
+    __slots__ = ("_commands",)
+
     def __init__(self, commands):
         """Initialize the move list node.
 
@@ -676,7 +716,7 @@ class MoveList(Node):
         Node.__init__(self)
 
         #  Save the commands list.
-        self._commands = commands
+        self._commands = tuple(commands)
 
     def get_command_count(self):
         """Get the command count.
@@ -718,6 +758,8 @@ class MoveList(Node):
 class LoopCommand(MoveCommand):
     """Loop command node."""
 
+    __slots__ = ()
+
     def __init__(self, times, move_list):
         """Initialize the loop command node.
 
@@ -751,6 +793,8 @@ class LoopCommand(MoveCommand):
 class ObjectDefineCommand(CommandNode):
     """Object define command node."""
 
+    __slots__ = ()
+
     def __init__(self, target, draw_list):
         """Initialize the object define command node.
 
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import binascii
+import mmap
+import os
+import tempfile
+import xnilang.parser.serializer as _serializer
+
+
+class ASTCache:
+    """On-disk cache of serialized ASTs (keyed by the digest of the source script).
+
+    The count of entries can be limited. The count is tracked in the process (the directory is scanned once),
+    and when it exceeds the limit, the least recently used entries (by their modification times, which are
+    updated when the entries are loaded) are removed until a tenth of the limit is free, so the directory is
+    scanned once every few stores only.
+    """
+
+    def __init__(self, directory, max_entries=None):
+        """Initialize the cache.
+
+        :type directory: str
+        :type max_entries: int | None
+        :param directory: The cache directory (created when the first entry is stored).
+        :param max_entries: The maximum count of entries (None if unlimited).
+        :raise ValueError: Raise this exception if the maximum count is invalid.
+        """
+
+        if max_entries is not None and max_entries <= 0:
+            raise ValueError("Invalid maximum count of entries.")
+
+        self._directory = directory
+        self._max_entries = max_entries
+
+        #  The count of entries (None until the directory is scanned).
+        self._entry_count = None
+
+    def get_directory(self):
+        """Get the cache directory.
+
+        :rtype : str
+        :return: The directory.
+        """
+
+        return self._directory
+
+    def get_max_entries(self):
+        """Get the maximum count of entries.
+
+        :rtype : int | None
+        :return: The count (None if unlimited).
+        """
+
+        return self._max_entries
+
+    def _get_entry_path(self, digest):
+        """Get the path of a cache entry.
+
+        :type digest: bytes
+        :param digest: The digest of the source script.
+        :rtype : str
+        :return: The path.
+        """
+
+        return os.path.join(self._directory, "%s.ast" % binascii.hexlify(digest).decode("ascii"))
+
+    def load(self, script):
+        """Load the top-level commands of a script from the cache.
+
+        Missing, corrupted and stale entries are ignored (corrupted and stale entries are removed).
+
+        :type script: str
+        :param script: The source script.
+        :rtype : list[xnilang.parser.ast.CommandNode] | None
+        :return: The commands (None if the script is not cached).
+        """
+
+        digest = _serializer.get_source_digest(script)
+        path = self._get_entry_path(digest)
+
+        #  Map and deserialize the entry.
+        try:
+            with open(path, "rb") as fp:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    try:
+                        commands = _serializer.deserialize(data, digest)
+                    except ValueError:
+                        commands = None
+        except (OSError, ValueError):
+            #  The entry doesn't exist or is empty.
+            return None
+
+        #  Mark the entry as recently used.
+        if commands is not None:
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return commands
+
+        #  Remove the corrupted (or stale) entry.
+        try:
+            os.remove(path)
+            if self._entry_count is not None:
+                self._entry_count -= 1
+        except OSError:
+            pass
+
+        return None
+
+    def store(self, script, commands):
+        """Store the top-level commands of a script to the cache.
+
+        Commands that can't be serialized are not stored.
+
+        :type script: str
+        :type commands: list[xnilang.parser.ast.CommandNode]
+        :param script: The source script.
+        :param commands: The commands.
+        :rtype : bool
+        :return: True if stored.
+        """
+
+        #  Serialize the commands.
+        try:
+            data = _serializer.serialize(script, commands)
+        except ValueError:
+            return False
+
+        #  Write the entry to a temporary file and move it in place.
+        path = self._get_entry_path(_serializer.get_source_digest(script))
+        try:
+            os.makedirs(self._directory, exist_ok=True)
+            is_new = not os.path.exists(path)
+            fd, temp_path = tempfile.mkstemp(".tmp", "", self._directory)
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    fp.write(data)
+                os.replace(temp_path, path)
+            except OSError:
+                os.remove(temp_path)
+                raise
+        except OSError:
+            return False
+
+        #  Count the entry (and remove old entries if there are too many).
+        if self._max_entries is not None:
+            if self._entry_count is None:
+                self._evict()
+            else:
+                if is_new:
+                    self._entry_count += 1
+                if self._entry_count > self._max_entries:
+                    self._evict()
+
+        return True
+
+    def _evict(self):
+        """Scan the cache directory and count the entries. If there are too many entries, remove the least recently
+        used ones until a tenth of the limit is free."""
+
+        #  Get the entries (ordered by the last use).
+        entries = []
+        try:
+            for item in os.scandir(self._directory):
+                if item.name.endswith(".ast"):
+                    try:
+                        entries.append((item.stat().st_mtime, item.path))
+                    except OSError:
+                        pass
+        except OSError:
+            return
+        entries.sort()
+
+        #  Remove the oldest entries.
+        self._entry_count = len(entries)
+        if self._entry_count <= self._max_entries:
+            return
+        for _, path in entries[:self._entry_count - (self._max_entries - self._max_entries // 10)]:
+            try:
+                os.remove(path)
+                self._entry_count -= 1
+            except OSError:
+                pass
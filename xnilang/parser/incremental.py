@@ -0,0 +1,459 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import bisect as _bisect
+import xnilang.parser.error as _error
+import xnilang.parser.interpreter as _interpreter
+import xnilang.parser.token as _token
+
+
+#  The size of the first window of text that is parsed again after an edit (the window is doubled until the
+#  parser reaches a resync point or the end of the script).
+_WINDOW_SIZE = 4096
+
+#  The maximum count of pieces of a text and of command segments of a parse result (more pieces or segments are
+#  joined, so that they don't grow with the count of edits).
+_MAX_PIECES = 64
+_MAX_SEGMENTS = 64
+
+
+class _PieceText:
+    """Text made of pieces (slices of other strings), so that an edit shares the pieces of the original text
+    instead of copying it."""
+
+    def __init__(self, pieces):
+        """Initialize the text.
+
+        :type pieces: list[(str, int, int)]
+        :param pieces: The pieces (the string, the start offset and the end offset of each slice).
+        """
+
+        #  Join the pieces if there are too many.
+        if len(pieces) > _MAX_PIECES:
+            joined = "".join([string[start:end] for string, start, end in pieces])
+            pieces = [(joined, 0, len(joined))]
+
+        self._pieces = pieces
+        self._positions = []
+        self._length = 0
+        for _, start, end in pieces:
+            self._positions.append(self._length)
+            self._length += end - start
+        self._string = None
+
+    def get_length(self):
+        """Get the length of the text.
+
+        :rtype : int
+        :return: The length.
+        """
+
+        return self._length
+
+    def get_slice(self, start, end):
+        """Get a slice of the text.
+
+        :type start: int
+        :type end: int
+        :param start: The start position.
+        :param end: The end position.
+        :rtype : str
+        :return: The slice.
+        """
+
+        parts = []
+        idx = max(0, _bisect.bisect_right(self._positions, start) - 1)
+        while start < end and idx < len(self._pieces):
+            string, piece_start, piece_end = self._pieces[idx]
+            position = self._positions[idx]
+            piece_stop = position + piece_end - piece_start
+            parts.append(string[piece_start + start - position:piece_start + min(end, piece_stop) - position])
+            start = piece_stop
+            idx += 1
+
+        return "".join(parts)
+
+    def get_string(self):
+        """Get the text as a string (joined once).
+
+        :rtype : str
+        :return: The string.
+        """
+
+        if self._string is None:
+            self._string = self.get_slice(0, self._length)
+
+        return self._string
+
+    def edit(self, offset, removed_length, inserted_text):
+        """Get the text after an edit.
+
+        :type offset: int
+        :type removed_length: int
+        :type inserted_text: str
+        :param offset: The position of the edit.
+        :param removed_length: The length of the removed text.
+        :param inserted_text: The inserted text.
+        :rtype : _PieceText
+        :return: The edited text.
+        """
+
+        edit_end = offset + removed_length
+        before = []
+        after = []
+        for (string, start, end), position in zip(self._pieces, self._positions):
+            #  Keep the part before the edit.
+            if position < offset:
+                before.append((string, start, min(end, start + offset - position)))
+
+            #  Keep the part after the edit.
+            if position + end - start > edit_end:
+                after.append((string, max(start, start + edit_end - position), end))
+
+        return _PieceText(before + [(inserted_text, 0, len(inserted_text))] + after)
+
+
+class ParseResult:
+    """Parse result of a script (the top-level commands and their spans).
+
+    The commands are kept in segments (ranges of shared lists with an offset of their spans), so a reparsed
+    result shares the commands and the spans before and after the edit with the previous result.
+    """
+
+    def __init__(self, text, segments, error):
+        """Initialize the parse result.
+
+        :type text: _PieceText
+        :type segments: list[(list, list[int], list[int], int, int, int)]
+        :type error: Exception | None
+        :param text: The script.
+        :param segments: The segments of the top-level commands (the commands, the start positions and the end
+                         positions, the first index and the end index of the range and the offset of the spans).
+        :param error: The error that stopped the parsing (None if the script was parsed entirely).
+        """
+
+        #  Join the segments if there are too many.
+        segments = [segment for segment in segments if segment[3] < segment[4]]
+        if len(segments) > _MAX_SEGMENTS:
+            commands = []
+            starts = []
+            ends = []
+            for seg_commands, seg_starts, seg_ends, first, last, delta in segments:
+                commands.extend(seg_commands[first:last])
+                starts.extend([start + delta for start in seg_starts[first:last]])
+                ends.extend([end + delta for end in seg_ends[first:last]])
+            segments = [(commands, starts, ends, 0, len(commands), 0)]
+
+        self._text = text
+        self._segments = segments
+        self._error = error
+
+        #  Get the index of the first command of each segment.
+        self._firsts = []
+        self._count = 0
+        for segment in segments:
+            self._firsts.append(self._count)
+            self._count += segment[4] - segment[3]
+
+    def get_script(self):
+        """Get the script.
+
+        :rtype : str
+        :return: The script.
+        """
+
+        return self._text.get_string()
+
+    def get_command_count(self):
+        """Get the top-level command count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return self._count
+
+    def _locate(self, idx):
+        """Locate a top-level command in the segments.
+
+        :type idx: int
+        :param idx: The command index.
+        :rtype : (int, int)
+        :return: The segment index and the index of the command in the lists of the segment.
+        :raise IndexError: Raise this exception if the index is out of range.
+        """
+
+        if idx < 0 or idx >= self._count:
+            raise IndexError("Invalid command index.")
+        seg_idx = _bisect.bisect_right(self._firsts, idx) - 1
+
+        return seg_idx, self._segments[seg_idx][3] + idx - self._firsts[seg_idx]
+
+    def get_command(self, idx):
+        """Get a top-level command.
+
+        :type idx: int
+        :param idx: The command index.
+        :rtype : xnilang.parser.ast.CommandNode
+        :return: The command.
+        """
+
+        seg_idx, cmd_idx = self._locate(idx)
+
+        return self._segments[seg_idx][0][cmd_idx]
+
+    def get_commands(self):
+        """Get all top-level commands.
+
+        :rtype : list[xnilang.parser.ast.CommandNode]
+        :return: The commands.
+        """
+
+        commands = []
+        for segment in self._segments:
+            commands.extend(segment[0][segment[3]:segment[4]])
+
+        return commands
+
+    def get_span(self, idx):
+        """Get the span of a top-level command.
+
+        :type idx: int
+        :param idx: The command index.
+        :rtype : (int, int)
+        :return: The start position and the end position.
+        """
+
+        seg_idx, cmd_idx = self._locate(idx)
+        _, starts, ends, _, _, delta = self._segments[seg_idx]
+
+        return starts[cmd_idx] + delta, ends[cmd_idx] + delta
+
+    def get_error(self):
+        """Get the error that stopped the parsing.
+
+        :rtype : Exception | None
+        :return: The error (None if the script was parsed entirely).
+        """
+
+        return self._error
+
+    def is_ok(self):
+        """Get whether the script was parsed entirely.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._error is None
+
+    def _get_text(self):
+        """Get the script as a piece text.
+
+        :rtype : _PieceText
+        :return: The text.
+        """
+
+        return self._text
+
+    def _count_before(self, position, use_ends):
+        """Count the top-level commands that start (or end) before a position.
+
+        :type position: int
+        :type use_ends: bool
+        :param position: The position.
+        :param use_ends: True if the commands that end before (or at) the position are counted, False if the
+                         commands that start before the position are counted.
+        :rtype : int
+        :return: The count.
+        """
+
+        count = 0
+        for commands, starts, ends, first, last, delta in self._segments:
+            if use_ends:
+                idx = _bisect.bisect_right(ends, position - delta, first, last)
+            else:
+                idx = _bisect.bisect_left(starts, position - delta, first, last)
+            count += idx - first
+            if idx < last:
+                break
+
+        return count
+
+    def _get_segments(self, first, last, delta):
+        """Get the segments of a range of top-level commands.
+
+        :type first: int
+        :type last: int
+        :type delta: int
+        :param first: The index of the first command.
+        :param last: The index after the last command.
+        :param delta: The offset added to the spans.
+        :rtype : list[(list, list[int], list[int], int, int, int)]
+        :return: The segments.
+        """
+
+        segments = []
+        for (commands, starts, ends, seg_first, seg_last, seg_delta), base in zip(self._segments, self._firsts):
+            start = max(seg_first, seg_first + first - base)
+            end = min(seg_last, seg_first + last - base)
+            if start < end:
+                segments.append((commands, starts, ends, start, end, seg_delta + delta))
+
+        return segments
+
+
+def _parse_window(window, base, is_last, previous, resync_idx, delta):
+    """Parse top-level commands in a window of the script until the end of the window or a resync point.
+
+    :type window: str
+    :type base: int
+    :type is_last: bool
+    :type previous: ParseResult | None
+    :type resync_idx: int
+    :type delta: int
+    :param window: The text of the window.
+    :param base: The position of the window in the script.
+    :param is_last: True if the window reaches the end of the script.
+    :param previous: The previous parse result (None if there is no resync point).
+    :param resync_idx: The old index of the first resync point (the old commands that start after the edit).
+    :param delta: The offset between new and old positions of the resync points.
+    :rtype : (list, list[int], list[int], int | None, Exception | None) | None
+    :return: The commands, their start and end positions, the old command index of the reached resync point and
+             the error (if any), or None if the window is too small.
+    """
+
+    #  Initialize the pipeline.
+    tokenizer = _token.Tokenizer(window)
+    interpreter = _interpreter.Interpreter(tokenizer)
+    iterator = interpreter.iterate_command_with_span()
+    resync_count = 0 if previous is None else previous.get_command_count()
+
+    commands = []
+    starts = []
+    ends = []
+    try:
+        while True:
+            #  Stop at a resync point.
+            position = base + interpreter.get_position()
+            while resync_idx < resync_count and previous.get_span(resync_idx)[0] + delta < position:
+                resync_idx += 1
+            if resync_idx < resync_count and previous.get_span(resync_idx)[0] + delta == position:
+                return commands, starts, ends, resync_idx, None
+
+            #  Interpret a command.
+            try:
+                cmd, start, end = next(iterator)
+            except StopIteration:
+                if not is_last:
+                    return None
+                return commands, starts, ends, None, None
+
+            commands.append(cmd)
+            starts.append(base + start)
+            ends.append(base + end)
+    except (_error.ParserError, ValueError) as err:
+        #  The error may be caused by the end of the window if the tokenizer reached it.
+        if not is_last and tokenizer.get_cursor() == len(window):
+            return None
+        return commands, starts, ends, None, err
+
+
+def _parse_from(text, position, previous=None, resync_idx=0, delta=0):
+    """Parse top-level commands from a position until the end of the script or a resync point.
+
+    If there are resync points, the script is parsed in windows (the window is doubled until the parser reaches
+    a resync point or the end of the script), so only the text up to the resync point is read.
+
+    :type text: _PieceText
+    :type position: int
+    :type previous: ParseResult | None
+    :type resync_idx: int
+    :type delta: int
+    :param text: The script.
+    :param position: The position.
+    :param previous: The previous parse result (None if there is no resync point).
+    :param resync_idx: The old index of the first resync point (the old commands that start after the edit).
+    :param delta: The offset between new and old positions of the resync points.
+    :rtype : (list, list[int], list[int], int | None, Exception | None)
+    :return: The commands, their start and end positions, the old command index of the reached resync point and
+             the error (if any).
+    """
+
+    size = _WINDOW_SIZE if previous is not None else text.get_length()
+    while True:
+        end = min(text.get_length(), position + size)
+        result = _parse_window(text.get_slice(position, end), position, end == text.get_length(), previous,
+                               resync_idx, delta)
+        if result is not None:
+            return result
+        size *= 2
+
+
+def parse(script):
+    """Parse a script.
+
+    :type script: str
+    :param script: The script.
+    :rtype : ParseResult
+    :return: The parse result.
+    """
+
+    text = _PieceText([(script, 0, len(script))])
+    commands, starts, ends, _, error = _parse_from(text, 0)
+
+    return ParseResult(text, [(commands, starts, ends, 0, len(commands), 0)], error)
+
+
+def reparse(previous, offset, removed_length, inserted_text):
+    """Reparse a script after a text edit.
+
+    Only the top-level commands touched by the edit are parsed again. The commands before and after them are
+    reused (by identity) from the previous result, and the cost of an edit depends on the size of the edit and
+    the commands around it, not on the size of the script.
+
+    :type previous: ParseResult
+    :type offset: int
+    :type removed_length: int
+    :type inserted_text: str
+    :param previous: The previous parse result.
+    :param offset: The position of the edit.
+    :param removed_length: The length of the removed text.
+    :param inserted_text: The inserted text.
+    :rtype : ParseResult
+    :return: The parse result.
+    :raise ValueError: Raise this exception if the edit is invalid.
+    """
+
+    #  Safe check.
+    old_text = previous._get_text()
+    edit_end = offset + removed_length
+    if offset < 0 or removed_length < 0 or edit_end > old_text.get_length():
+        raise ValueError("Invalid edit.")
+
+    #  Apply the edit.
+    text = old_text.edit(offset, removed_length, inserted_text)
+    delta = len(inserted_text) - removed_length
+
+    #  Reuse the commands that end before the edit.
+    kept = previous._count_before(offset, True)
+    position = 0 if kept == 0 else previous.get_span(kept - 1)[1]
+
+    #  Parse the affected commands (the commands that start after the edit are resync points).
+    resync_idx = max(kept, previous._count_before(edit_end, False))
+    commands, starts, ends, resync_idx, error = _parse_from(text, position, previous, resync_idx, delta)
+    segments = previous._get_segments(0, kept, 0) + [(commands, starts, ends, 0, len(commands), 0)]
+
+    #  Reuse the commands after the resync point.
+    if resync_idx is not None:
+        segments += previous._get_segments(resync_idx, previous.get_command_count(), delta)
+        error = previous.get_error()
+
+    return ParseResult(text, segments, error)
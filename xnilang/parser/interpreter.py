@@ -12,19 +12,84 @@ import xnilang.parser.ast as _ast
 import xnilang.parser.token as _token
 import xnilang.parser.error as _error
 
+#  Argument kinds of command schemas.
+ARGUMENT_POINT = "point"
+ARGUMENT_OPERAND = "operand"
+ARGUMENT_POINT_LIST = "point-list"
+ARGUMENT_TARGET = "target"
+ARGUMENT_DIRECTION = "direction"
+ARGUMENT_DRAW_LIST = "draw-list"
+ARGUMENT_MOVE_LIST = "move-list"
+
+#  Operand token kind code -> value parser.
+_OPERAND_PARSERS = {
+    _token.TOKEN_KIND_INTEGER: int,
+    _token.TOKEN_KIND_FLOAT: float
+}
+
 
 class Interpreter:
     """Tokens interpreter."""
 
-    def __init__(self, tokenizer):
+    def __init__(self, tokenizer, compact=True):
         """Initialize the interpreter.
 
+        Tokens are pulled from the tokenizer lazily, only the tokens of the command being interpreted are
+        kept in memory once the commands are read by iterate_command().
+
+        In compact mode, identical operands, points, targets and directions (by their source text) share one
+        node instance.
+
         :type tokenizer: _token.Tokenizer
+        :type compact: bool
         :param tokenizer: The tokenizer.
+        :param compact: True if the compact mode is enabled.
         """
 
-        self._tokens = tokenizer.get_all_token()
+        self._tokenizer = tokenizer
+        self._tokens = _token.TokenBuffer(tokenizer.get_script())
+        self._token_kinds = self._tokens.get_kinds()
+        self._offset = 0
         self._cursor = 0
+        self._exhausted = False
+
+        #  Initialize the shared node tables (source text -> node).
+        if compact:
+            self._shared_operands = {}
+            self._shared_points = {}
+            self._shared_symbols = {}
+        else:
+            self._shared_operands = None
+            self._shared_points = None
+            self._shared_symbols = None
+
+    def _fetch_token(self, count):
+        """Pull tokens from the tokenizer until the first N tokens of the stream are read.
+
+        :type count: int
+        :param count: The token count (N).
+        :rtype : bool
+        :return: False if the stream has less tokens.
+        :raise _error.ParserError: Raise this exception if the tokenizer failed.
+        """
+
+        while self._offset + self._tokens.get_count() < count:
+            #  Stop at the end of the stream.
+            if self._exhausted:
+                return False
+
+            #  Read a token into the buffer.
+            if not self._tokenizer.read_token(self._tokens):
+                self._exhausted = True
+                return False
+
+        return True
+
+    def _release_token(self):
+        """Release all tokens before the cursor."""
+
+        self._tokens.release(self._cursor - self._offset)
+        self._offset = self._cursor
 
     def is_end(self):
         """Get whether the stream is at the end.
@@ -33,18 +98,18 @@ class Interpreter:
         :return: True if so.
         """
 
-        return self._cursor == len(self._tokens)
+        return not self._fetch_token(self._cursor + 1)
 
     def move_cursor(self, destination):
         """Move the cursor to specified destination.
 
         :type destination: int
         :param destination: The destination.
-        :raise ValueError: Raise this exception if the destination is invalid.
+        :raise ValueError: Raise this exception if the destination is invalid (or has been released).
         """
 
         #  Safe check.
-        if destination < 0 or destination > len(self._tokens):
+        if destination < self._offset or not self._fetch_token(destination):
             raise ValueError("Invalid destination.")
 
         #  Set the cursor.
@@ -71,7 +136,71 @@ class Interpreter:
         if self.is_end():
             raise IndexError("End of stream.")
 
-        return self._tokens[self._cursor]
+        return self._tokens.get_token(self._cursor - self._offset)
+
+    def get_position(self):
+        """Get the position of current token in the script.
+
+        :rtype : int
+        :return: The position (the length of the script if the stream is at the end).
+        """
+
+        if self.is_end():
+            return len(self._tokenizer.get_script())
+
+        return self._tokens.get_position(self._cursor - self._offset)
+
+    def _read_token(self):
+        """Read current token and move the cursor to the next one.
+
+        The caller should ensure that the stream is not at the end.
+
+        :rtype : int
+        :return: The kind code of the token.
+        """
+
+        kind = self._tokens.get_kind(self._cursor - self._offset)
+        self._cursor += 1
+
+        return kind
+
+    def _peek_kind(self, ahead):
+        """Get the kind code of the token N tokens after current token.
+
+        Tokens are fetched one at a time, so errors are still reported in source order when the caller peeks
+        tokens one after another.
+
+        :type ahead: int
+        :param ahead: The token count (N).
+        :rtype : int
+        :return: The kind code (0 if the stream ends before the token).
+        """
+
+        idx = self._cursor - self._offset + ahead
+        if idx >= len(self._token_kinds) and not self._fetch_token(self._cursor + ahead + 1):
+            return 0
+
+        return self._token_kinds[idx]
+
+    def _get_previous_symbol(self):
+        """Get the symbol of the token just read.
+
+        :rtype : str
+        :return: The symbol.
+        """
+
+        return self._tokens.get_symbol(self._cursor - self._offset - 1)
+
+    def _is_right_parenthesis_ahead(self):
+        """Get whether current token is a right parenthesis.
+
+        The caller should ensure that the stream is not at the end.
+
+        :rtype : bool
+        :return: True if so.
+        """
+
+        return self._tokens.get_kind(self._cursor - self._offset) == _token.TOKEN_KIND_RIGHT_PARENTHESIS
 
     def _interpret_operand(self):
         """Interpret an operand.
@@ -86,16 +215,34 @@ class Interpreter:
             raise _error.ParserError("Missing operand.")
 
         #  Read an operand.
-        operand = self.get_current_token()
-        self.move_cursor_by_offset(1)
+        parser = _OPERAND_PARSERS.get(self._read_token())
+        if parser is None:
+            raise _error.ParserError("Not an operand.")
 
         #  Create the operand node.
-        if operand.is_float_operand():
-            return _ast.OperandNode(float(operand.get_symbol()))
-        elif operand.is_integer_operand():
-            return _ast.OperandNode(int(operand.get_symbol()))
-        else:
-            raise _error.ParserError("Not an operand.")
+        return self._create_operand(parser, self._get_previous_symbol())
+
+    def _create_operand(self, parser, symbol):
+        """Create (or get the shared) operand node.
+
+        :type symbol: str
+        :param parser: The value parser.
+        :param symbol: The operand symbol.
+        :rtype : _ast.OperandNode
+        :return: The operand node.
+        """
+
+        #  Create the node directly if the compact mode is disabled.
+        shared = self._shared_operands
+        if shared is None:
+            return _ast.OperandNode(parser(symbol))
+
+        #  Get the shared node.
+        node = shared.get(symbol)
+        if node is None:
+            node = shared[symbol] = _ast.OperandNode(parser(symbol))
+
+        return node
 
     def _interpret_left_parenthesis(self):
         """Interpret a left parenthesis.
@@ -107,12 +254,8 @@ class Interpreter:
         if self.is_end():
             raise _error.ParserError("Missing parenthesis.")
 
-        #  Read a parenthesis.
-        parenthesis = self.get_current_token()
-        self.move_cursor_by_offset(1)
-
-        #  Check the operand type.
-        if not parenthesis.is_left_parenthesis():
+        #  Read a parenthesis and check its type.
+        if self._read_token() != _token.TOKEN_KIND_LEFT_PARENTHESIS:
             raise _error.ParserError("Not a left parenthesis.")
 
     def _interpret_right_parenthesis(self):
@@ -125,12 +268,8 @@ class Interpreter:
         if self.is_end():
             raise _error.ParserError("Missing parenthesis.")
 
-        #  Read a parenthesis.
-        parenthesis = self.get_current_token()
-        self.move_cursor_by_offset(1)
-
-        #  Check the operand type.
-        if not parenthesis.is_right_parenthesis():
+        #  Read a parenthesis and check its type.
+        if self._read_token() != _token.TOKEN_KIND_RIGHT_PARENTHESIS:
             raise _error.ParserError("Not a right parenthesis.")
 
     def _interpret_point(self):
@@ -140,6 +279,32 @@ class Interpreter:
         :return: The point node.
         """
 
+        #  Read well-formed points directly from the token buffer.
+        if self._peek_kind(0) == _token.TOKEN_KIND_LEFT_PARENTHESIS:
+            x_parser = _OPERAND_PARSERS.get(self._peek_kind(1))
+            if x_parser is not None:
+                y_parser = _OPERAND_PARSERS.get(self._peek_kind(2))
+                if y_parser is not None and self._peek_kind(3) == _token.TOKEN_KIND_RIGHT_PARENTHESIS:
+                    tokens = self._tokens
+                    idx = self._cursor - self._offset
+                    self._cursor += 4
+
+                    #  Get the shared node (in compact mode).
+                    shared = self._shared_points
+                    if shared is not None:
+                        text = tokens.get_text(idx, idx + 3)
+                        node = shared.get(text)
+                        if node is None:
+                            node = shared[text] = _ast.PointNode(
+                                self._create_operand(x_parser, tokens.get_symbol(idx + 1)),
+                                self._create_operand(y_parser, tokens.get_symbol(idx + 2)))
+
+                        return node
+
+                    #  Create the node.
+                    return _ast.PointNode(_ast.OperandNode(x_parser(tokens.get_symbol(idx + 1))),
+                                          _ast.OperandNode(y_parser(tokens.get_symbol(idx + 2))))
+
         #  Read the left parenthesis.
         self._interpret_left_parenthesis()
 
@@ -166,11 +331,8 @@ class Interpreter:
             raise _error.ParserError("Missing symbol.")
 
         #  Read a symbol.
-        symbol = self.get_current_token()
-        self.move_cursor_by_offset(1)
-
-        if symbol.is_symbol():
-            return symbol.get_symbol()
+        if self._read_token() == _token.TOKEN_KIND_SYMBOL:
+            return self._get_previous_symbol()
         else:
             raise _error.ParserError("Not a symbol.")
 
@@ -181,7 +343,30 @@ class Interpreter:
         :return: The target node.
         """
 
-        return _ast.TargetNode(self._interpret_symbol())
+        return self._create_symbol_node(_ast.TargetNode, self._interpret_symbol())
+
+    def _create_symbol_node(self, factory, symbol):
+        """Create (or get the shared) node of a symbol.
+
+        :type symbol: str
+        :param factory: The node factory.
+        :param symbol: The symbol.
+        :rtype : _ast.Node
+        :return: The node.
+        """
+
+        #  Create the node directly if the compact mode is disabled.
+        shared = self._shared_symbols
+        if shared is None:
+            return factory(symbol)
+
+        #  Get the shared node.
+        key = (factory, symbol)
+        node = shared.get(key)
+        if node is None:
+            node = shared[key] = factory(symbol)
+
+        return node
 
     def _interpret_direction(self):
         """Interpret a direction.
@@ -196,229 +381,131 @@ class Interpreter:
 
         #  Create the AST node.
         if direction in ["up", "down", "left", "right"]:
-            return _ast.DirectionNode(direction)
+            return self._create_symbol_node(_ast.DirectionNode, direction)
         else:
             raise _error.ParserError("Invalid direction descriptor.")
 
-    def interpret_command(self):
-        """Interpret a command.
+    def _interpret_command_head(self):
+        """Interpret the head of a command (the left parenthesis, the command and the sub-command).
 
-        :rtype : _ast.CommandNode
-        :return: The command node.
+        :rtype : list
+        :return: The command frame ([factory, readers, args]).
         :raise _error.ParserError: Raise this exception if some errors occurred.
         """
 
         #  Read the left parenthesis.
         self._interpret_left_parenthesis()
 
-        #  Read the command.
+        #  Read the command and look up its schema.
         cmd = self._interpret_symbol()
+        entry = _COMMAND_TABLE.get(cmd)
+        if entry is None:
+            raise _error.ParserError("Invalid command.")
 
-        if cmd == "line":
-            #  Interpret two points.
-            p1 = self._interpret_point()
-            p2 = self._interpret_point()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.LineCommand(p1, p2)
-        elif cmd == "circle":
-            #  Read the center point.
-            center = self._interpret_point()
-
-            #  Read the circle radius.
-            radius = self._interpret_operand()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.CircleCommand(center, radius)
-        elif cmd == "path":
-            #  Read the point list.
-            point_list = self._interpret_point_list()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.ClosedPathCommand(point_list)
-        elif cmd == "area":
-            #  Read the type.
-            area_type = self._interpret_symbol()
-
-            if area_type == "circle":
-                #  Read the center point.
-                center = self._interpret_point()
-
-                #  Read the radius.
-                radius = self._interpret_operand()
-
-                #  Read the right parenthesis.
-                self._interpret_right_parenthesis()
-
-                return _ast.CircleAreaCommand(center, radius)
-            elif area_type == "square":
-                #  Read the center point.
-                center = self._interpret_point()
-
-                #  Read the size.
-                width = self._interpret_operand()
-                height = self._interpret_operand()
-
-                #  Read the right parenthesis.
-                self._interpret_right_parenthesis()
-
-                return _ast.SquareAreaCommand(center, width, height)
-            elif area_type == "path":
-                #  Read the point list.
-                point_list = self._interpret_point_list()
-
-                #  Read the right parenthesis.
-                self._interpret_right_parenthesis()
-
-                return _ast.ClosedPathAreaCommand(point_list)
-            else:
-                raise _error.ParserError("Invalid area type.")
-        elif cmd == "define":
-            #  Read the target.
-            target = self._interpret_target()
-
-            #  Read the draw list.
-            draw_list = self._interpret_draw_list()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.ObjectDefineCommand(target, draw_list)
-        elif cmd == "place":
-            #  Read the target.
-            target = self._interpret_target()
-
-            #  Read the position.
-            position = self._interpret_point()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.PlaceCommand(target, position)
-        elif cmd == "shift":
-            #  Read the target.
-            target = self._interpret_target()
-
-            #  Read the direction descriptor.
-            direction = self._interpret_direction()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.ShiftCommand(target, direction)
-        elif cmd == "erase":
-            #  Read the target.
-            target = self._interpret_target()
-
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
-
-            #  Create the AST node.
-            return _ast.EraseCommand(target)
-        elif cmd == "loop":
-            #  Read the loop times.
-            times = self._interpret_operand()
-
-            #  Read the move list.
-            move_list = self._interpret_move_list()
+        #  Read the sub-command (if the command has sub-commands).
+        if isinstance(entry, dict):
+            entry = entry.get(self._interpret_symbol())
+            if entry is None:
+                raise _error.ParserError("Invalid %s type." % cmd)
 
-            #  Read the right parenthesis.
-            self._interpret_right_parenthesis()
+        return [entry[0], entry[1], []]
 
-            #  Create the AST node.
-            return _ast.LoopCommand(times, move_list)
-        else:
-            raise _error.ParserError("Invalid command.")
+    def interpret_command(self):
+        """Interpret a command.
 
-    def _interpret_draw_list(self):
-        """Interpret a draw list.
+        Nested commands (in draw lists and move lists) are interpreted with an explicit stack instead of
+        recursion, so the nesting depth is not limited by the recursion limit.
 
-        :rtype : _ast.DrawList
-        :return: The draw list.
+        :rtype : _ast.CommandNode
+        :return: The command node.
         :raise _error.ParserError: Raise this exception if some errors occurred.
         """
 
-        #  Read the left parenthesis.
-        self._interpret_left_parenthesis()
-
-        #  Initialize the command list.
-        cmd_list = []
+        #  The stack of command frames ([factory, readers, args]) and list frames ([list_spec, items]).
+        stack = [self._interpret_command_head()]
 
         while True:
-            #  Safe check.
-            if self.is_end():
-                raise _error.ParserError("Missing list end.")
-
-            if self.get_current_token().is_right_parenthesis():
-                #  Stop interpreting if current token is a right parenthesis.
-                break
+            frame = stack[-1]
+
+            if len(frame) == 3:
+                #  Read the arguments of the command.
+                factory, readers, args = frame
+                while len(args) < len(readers):
+                    reader = readers[len(args)]
+                    if isinstance(reader, tuple):
+                        #  Read the left parenthesis and start the command list.
+                        self._interpret_left_parenthesis()
+                        stack.append([reader, []])
+                        break
+                    else:
+                        args.append(reader(self))
+                else:
+                    #  Read the right parenthesis.
+                    self._interpret_right_parenthesis()
+
+                    #  Create the AST node.
+                    node = factory(*args)
+                    stack.pop()
+                    if len(stack) == 0:
+                        return node
+
+                    #  Type check and append the command to the list.
+                    list_spec, items = stack[-1]
+                    if not isinstance(node, list_spec[1]):
+                        raise _error.ParserError(list_spec[2])
+                    items.append(node)
             else:
-                #  Read a draw command.
-                draw_cmd = self.interpret_command()
-
-                #  Type check.
-                if not isinstance(draw_cmd, _ast.DrawCommand):
-                    raise _error.ParserError("Not a draw command.")
-
-                #  Append the command to the list.
-                cmd_list.append(draw_cmd)
-
-        #  Read the right parenthesis.
-        self._interpret_right_parenthesis()
-
-        #  Create the AST node.
-        return _ast.DrawList(cmd_list)
-
-    def _interpret_move_list(self):
-        """Interpret a move list.
-
-        :rtype : _ast.MoveList
-        :return: The move list.
+                #  Safe check.
+                if self.is_end():
+                    raise _error.ParserError("Missing list end.")
+
+                if self._is_right_parenthesis_ahead():
+                    #  Read the right parenthesis and create the list node.
+                    self._interpret_right_parenthesis()
+                    list_spec, items = stack.pop()
+                    stack[-1][2].append(list_spec[0](items))
+                else:
+                    #  Start a nested command.
+                    stack.append(self._interpret_command_head())
+
+    def iterate_command(self):
+        """Iterate all top-level commands.
+
+        Each command is yielded as soon as it is interpreted, and its tokens are released before the next
+        command is read.
+
+        :rtype : collections.Iterable[_ast.CommandNode]
+        :return: The command iterator.
         :raise _error.ParserError: Raise this exception if some errors occurred.
         """
 
-        #  Read the left parenthesis.
-        self._interpret_left_parenthesis()
+        while not self.is_end():
+            #  Interpret a command.
+            cmd = self.interpret_command()
 
-        #  Initialize the command list.
-        cmd_list = []
+            #  Release its tokens.
+            self._release_token()
 
-        while True:
-            #  Safe check.
-            if self.is_end():
-                raise _error.ParserError("Missing list end.")
+            yield cmd
 
-            if self.get_current_token().is_right_parenthesis():
-                #  Stop interpreting if current token is a right parenthesis.
-                break
-            else:
-                #  Read a move command.
-                move_cmd = self.interpret_command()
+    def iterate_command_with_span(self):
+        """Iterate all top-level commands with their spans in the script.
 
-                #  Type check.
-                if not isinstance(move_cmd, _ast.MoveCommand):
-                    raise _error.ParserError("Not a move command.")
+        :rtype : collections.Iterable[(_ast.CommandNode, int, int)]
+        :return: The iterator of the commands, their start positions and their end positions.
+        :raise _error.ParserError: Raise this exception if some errors occurred.
+        """
 
-                #  Append the command to the list.
-                cmd_list.append(move_cmd)
+        while not self.is_end():
+            #  Interpret a command.
+            start = self.get_position()
+            cmd = self.interpret_command()
+            end = self._tokens.get_end(self._cursor - self._offset - 1)
 
-        #  Read the right parenthesis.
-        self._interpret_right_parenthesis()
+            #  Release its tokens.
+            self._release_token()
 
-        #  Create the AST node.
-        return _ast.MoveList(cmd_list)
+            yield cmd, start, end
 
     def _interpret_point_list(self):
         """Interpret a point list.
@@ -439,7 +526,7 @@ class Interpreter:
             if self.is_end():
                 raise _error.ParserError("Missing list end.")
 
-            if self.get_current_token().is_right_parenthesis():
+            if self._is_right_parenthesis_ahead():
                 #  Stop interpreting if current token is a right parenthesis.
                 break
             else:
@@ -451,3 +538,64 @@ class Interpreter:
 
         #  Create the AST node.
         return _ast.PointListNode(point_list)
+
+
+#  Argument kind -> argument reader (or (list node factory, item class, type error message) for command
+#  lists, which are read by interpret_command() itself).
+_ARGUMENT_READERS = {
+    ARGUMENT_POINT: Interpreter._interpret_point,
+    ARGUMENT_OPERAND: Interpreter._interpret_operand,
+    ARGUMENT_POINT_LIST: Interpreter._interpret_point_list,
+    ARGUMENT_TARGET: Interpreter._interpret_target,
+    ARGUMENT_DIRECTION: Interpreter._interpret_direction,
+    ARGUMENT_DRAW_LIST: (_ast.DrawList, _ast.DrawCommand, "Not a draw command."),
+    ARGUMENT_MOVE_LIST: (_ast.MoveList, _ast.MoveCommand, "Not a move command.")
+}
+
+#  The command table (command -> (factory, readers) or command -> {sub-command -> (factory, readers)}).
+_COMMAND_TABLE = {}
+
+
+def register_command(cmd, factory, schema, sub_cmd=None):
+    """Register a command.
+
+    :type cmd: str
+    :type schema: list[str]
+    :type sub_cmd: str | None
+    :param cmd: The command.
+    :param factory: The AST node factory (called with the interpreted arguments).
+    :param schema: The argument kinds (ARGUMENT_*).
+    :param sub_cmd: The sub-command (the symbol that follows the command, e.g. "circle" in "area circle").
+    :raise ValueError: Raise this exception if the schema is invalid or the command is registered.
+    """
+
+    #  Precompile the schema.
+    for arg_kind in schema:
+        if arg_kind not in _ARGUMENT_READERS:
+            raise ValueError("Invalid argument kind.")
+    entry = (factory, tuple(_ARGUMENT_READERS[arg_kind] for arg_kind in schema))
+
+    #  Register the command.
+    if sub_cmd is None:
+        if cmd in _COMMAND_TABLE:
+            raise ValueError("Duplicated command.")
+        _COMMAND_TABLE[cmd] = entry
+    else:
+        sub_table = _COMMAND_TABLE.setdefault(cmd, {})
+        if not isinstance(sub_table, dict) or sub_cmd in sub_table:
+            raise ValueError("Duplicated command.")
+        sub_table[sub_cmd] = entry
+
+
+#  Register built-in commands.
+register_command("line", _ast.LineCommand, [ARGUMENT_POINT, ARGUMENT_POINT])
+register_command("circle", _ast.CircleCommand, [ARGUMENT_POINT, ARGUMENT_OPERAND])
+register_command("path", _ast.ClosedPathCommand, [ARGUMENT_POINT_LIST])
+register_command("area", _ast.CircleAreaCommand, [ARGUMENT_POINT, ARGUMENT_OPERAND], "circle")
+register_command("area", _ast.SquareAreaCommand, [ARGUMENT_POINT, ARGUMENT_OPERAND, ARGUMENT_OPERAND], "square")
+register_command("area", _ast.ClosedPathAreaCommand, [ARGUMENT_POINT_LIST], "path")
+register_command("define", _ast.ObjectDefineCommand, [ARGUMENT_TARGET, ARGUMENT_DRAW_LIST])
+register_command("place", _ast.PlaceCommand, [ARGUMENT_TARGET, ARGUMENT_POINT])
+register_command("shift", _ast.ShiftCommand, [ARGUMENT_TARGET, ARGUMENT_DIRECTION])
+register_command("erase", _ast.EraseCommand, [ARGUMENT_TARGET])
+register_command("loop", _ast.LoopCommand, [ARGUMENT_OPERAND, ARGUMENT_MOVE_LIST])
@@ -0,0 +1,393 @@
+#!/usr/bin/env python
+#
+#  Copyright 2015 XiaoJSoft Studio.
+#
+#  Use of this source code is governed by a proprietary license. You can not read, change or
+#  redistribute this source code unless you have a written authorization from the copyright
+#  holder listed above.
+#
+
+#  Import other modules.
+import array
+import hashlib
+import struct
+import sys
+import zlib
+import xnilang.parser.ast as _ast
+
+#  Format magic and version.
+FORMAT_MAGIC = b"XNIA"
+FORMAT_VERSION = 1
+
+#  Header (magic, version, byte order, source digest, payload length, payload CRC-32).
+_HEADER = struct.Struct("<4sHH20sII")
+
+#  Section lengths (operand count, point count, symbol count, symbol blob length, code count).
+_SECTIONS = struct.Struct("<IIIII")
+
+#  Byte order flag of this machine (arrays are stored in the native byte order).
+_BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+
+#  Operand kinds.
+_OPERAND_INTEGER = 0
+_OPERAND_FLOAT = 1
+_OPERAND_BIG_INTEGER = 2
+
+#  Node stream operations ("make" operations are _OP_MAKE + the index of the node class).
+_OP_OPERAND = 0
+_OP_POINT = 1
+_OP_TARGET = 2
+_OP_DIRECTION = 3
+_OP_MAKE = 4
+
+#  Serializable node classes (and whether the class is created from a list of nodes).
+_NODE_CLASSES = [
+    (_ast.PointListNode, True),
+    (_ast.DrawList, True),
+    (_ast.MoveList, True),
+    (_ast.LineCommand, False),
+    (_ast.CircleCommand, False),
+    (_ast.ClosedPathCommand, False),
+    (_ast.CircleAreaCommand, False),
+    (_ast.SquareAreaCommand, False),
+    (_ast.ClosedPathAreaCommand, False),
+    (_ast.ObjectDefineCommand, False),
+    (_ast.PlaceCommand, False),
+    (_ast.ShiftCommand, False),
+    (_ast.EraseCommand, False),
+    (_ast.LoopCommand, False)
+]
+
+#  Node class -> its index.
+_NODE_CLASS_INDEXES = dict((node_class, idx) for idx, (node_class, _) in enumerate(_NODE_CLASSES))
+
+
+def get_source_digest(script):
+    """Get the digest of a source script.
+
+    :type script: str
+    :param script: The script.
+    :rtype : bytes
+    :return: The digest (20 bytes).
+    """
+
+    return hashlib.sha1(script.encode("utf-8", "surrogatepass")).digest()
+
+
+class _Writer:
+    """Node table and node stream writer."""
+
+    def __init__(self):
+        """Initialize the writer."""
+
+        #  Operand table.
+        self._operand_kinds = array.array("B")
+        self._operand_integers = array.array("q")
+        self._operand_floats = array.array("d")
+        self._operand_indexes = {}
+
+        #  Point table (pairs of operand indexes).
+        self._points = array.array("I")
+        self._point_indexes = {}
+
+        #  Symbol table.
+        self._symbols = []
+        self._symbol_indexes = {}
+
+        #  Node stream.
+        self._codes = array.array("i")
+
+    def _add_operand(self, node):
+        """Add an operand to the operand table.
+
+        :type node: _ast.OperandNode
+        :param node: The operand node.
+        :rtype : int
+        :return: The operand index.
+        """
+
+        #  Look up the operand (the node itself is used as key since the values 1, 1.0 and True are equal).
+        idx = self._operand_indexes.get(id(node))
+        if idx is not None:
+            return idx
+
+        #  Add the operand.
+        value = node.get_value()
+        idx = len(self._operand_kinds)
+        if isinstance(value, float):
+            self._operand_kinds.append(_OPERAND_FLOAT)
+            self._operand_integers.append(0)
+            self._operand_floats.append(value)
+        elif isinstance(value, int) and -(1 << 63) <= value < (1 << 63):
+            self._operand_kinds.append(_OPERAND_INTEGER)
+            self._operand_integers.append(value)
+            self._operand_floats.append(0.0)
+        elif isinstance(value, int):
+            self._operand_kinds.append(_OPERAND_BIG_INTEGER)
+            self._operand_integers.append(self._add_symbol(str(value)))
+            self._operand_floats.append(0.0)
+        else:
+            raise ValueError("Invalid operand.")
+        self._operand_indexes[id(node)] = idx
+
+        return idx
+
+    def _add_point(self, node):
+        """Add a point to the point table.
+
+        :type node: _ast.PointNode
+        :param node: The point node.
+        :rtype : int
+        :return: The point index.
+        """
+
+        idx = self._point_indexes.get(id(node))
+        if idx is None:
+            idx = self._point_indexes[id(node)] = len(self._points) // 2
+            self._points.append(self._add_operand(node.get_x()))
+            self._points.append(self._add_operand(node.get_y()))
+
+        return idx
+
+    def _add_symbol(self, symbol):
+        """Add a symbol to the symbol table.
+
+        :type symbol: str
+        :param symbol: The symbol.
+        :rtype : int
+        :return: The symbol index.
+        """
+
+        idx = self._symbol_indexes.get(symbol)
+        if idx is None:
+            idx = self._symbol_indexes[symbol] = len(self._symbols)
+            self._symbols.append(symbol)
+
+        return idx
+
+    def write_node(self, root):
+        """Write a node (and its children) to the node stream.
+
+        :type root: _ast.Node
+        :param root: The node.
+        :raise ValueError: Raise this exception if the node can't be serialized.
+        """
+
+        #  The stack of nodes (and whether their children have been written).
+        stack = [(root, False)]
+        codes = self._codes
+
+        while len(stack) != 0:
+            node, expanded = stack.pop()
+
+            if isinstance(node, _ast.OperandNode):
+                codes.append(_OP_OPERAND)
+                codes.append(self._add_operand(node))
+            elif isinstance(node, _ast.PointNode):
+                codes.append(_OP_POINT)
+                codes.append(self._add_point(node))
+            elif isinstance(node, _ast.TargetNode):
+                codes.append(_OP_TARGET)
+                codes.append(self._add_symbol(node.get_target_name()))
+            elif isinstance(node, _ast.DirectionNode):
+                codes.append(_OP_DIRECTION)
+                codes.append(self._add_symbol(node.get_indicator()))
+            else:
+                #  Get the children.
+                if isinstance(node, _ast.PointListNode):
+                    children = [node.get_point(idx) for idx in range(0, node.get_point_count())]
+                elif isinstance(node, (_ast.DrawList, _ast.MoveList)):
+                    children = [node.get_command(idx) for idx in range(0, node.get_command_count())]
+                elif isinstance(node, _ast.CommandNode):
+                    children = [node.get_argument(idx) for idx in range(0, node.get_argument_count())]
+                else:
+                    raise ValueError("Invalid node.")
+
+                if expanded:
+                    #  Write the node after its children.
+                    class_idx = _NODE_CLASS_INDEXES.get(type(node))
+                    if class_idx is None:
+                        raise ValueError("Invalid node.")
+                    codes.append(_OP_MAKE + class_idx)
+                    codes.append(len(children))
+                else:
+                    #  Write the children first.
+                    stack.append((node, True))
+                    for child in reversed(children):
+                        stack.append((child, False))
+
+    def get_payload(self):
+        """Get the payload.
+
+        :rtype : bytes
+        :return: The payload.
+        """
+
+        symbol_blob = "\0".join(self._symbols).encode("utf-8", "surrogatepass")
+
+        return b"".join([
+            _SECTIONS.pack(len(self._operand_kinds),
+                           len(self._points) // 2,
+                           len(self._symbols),
+                           len(symbol_blob),
+                           len(self._codes)),
+            self._operand_integers.tobytes(),
+            self._operand_floats.tobytes(),
+            self._operand_kinds.tobytes(),
+            self._points.tobytes(),
+            self._codes.tobytes(),
+            symbol_blob
+        ])
+
+
+def serialize(script, commands):
+    """Serialize the top-level commands of a script.
+
+    :type script: str
+    :type commands: list[_ast.CommandNode]
+    :param script: The source script.
+    :param commands: The top-level commands.
+    :rtype : bytes
+    :return: The serialized data.
+    :raise ValueError: Raise this exception if some nodes can't be serialized.
+    """
+
+    #  Write all commands.
+    writer = _Writer()
+    for cmd in commands:
+        writer.write_node(cmd)
+    payload = writer.get_payload()
+
+    return _HEADER.pack(FORMAT_MAGIC,
+                        FORMAT_VERSION,
+                        _BYTE_ORDER,
+                        get_source_digest(script),
+                        len(payload),
+                        zlib.crc32(payload)) + payload
+
+
+def _take(buffer, offset, length):
+    """Take a section from a buffer.
+
+    :type buffer: memoryview
+    :type offset: int
+    :type length: int
+    :param buffer: The buffer.
+    :param offset: The offset of the section.
+    :param length: The length of the section.
+    :rtype : (memoryview, int)
+    :return: The section and the offset after it.
+    :raise ValueError: Raise this exception if the buffer is too short.
+    """
+
+    if offset + length > len(buffer):
+        raise ValueError("Corrupted data.")
+
+    return buffer[offset:offset + length], offset + length
+
+
+def deserialize(data, script_digest=None):
+    """Deserialize the top-level commands.
+
+    :type data: bytes | bytearray | memoryview | mmap.mmap
+    :type script_digest: bytes | None
+    :param data: The serialized data.
+    :param script_digest: The expected digest of the source script (None if not checked).
+    :rtype : list[_ast.CommandNode]
+    :return: The top-level commands.
+    :raise ValueError: Raise this exception if the data is corrupted or stale.
+    """
+
+    #  (All views of the data are released when this function returns, so the data can be closed.)
+    buffer = memoryview(data)
+    try:
+        #  Check the header.
+        if len(buffer) < _HEADER.size:
+            raise ValueError("Corrupted data.")
+        magic, version, byte_order, digest, payload_length, checksum = _HEADER.unpack_from(buffer, 0)
+        if magic != FORMAT_MAGIC or version != FORMAT_VERSION or byte_order != _BYTE_ORDER:
+            raise ValueError("Stale data.")
+        if script_digest is not None and digest != script_digest:
+            raise ValueError("Stale data.")
+        payload = buffer[_HEADER.size:]
+        if len(payload) != payload_length or zlib.crc32(payload) != checksum:
+            raise ValueError("Corrupted data.")
+
+        #  Read the sections.
+        if len(payload) < _SECTIONS.size:
+            raise ValueError("Corrupted data.")
+        operand_count, point_count, symbol_count, blob_length, code_count = _SECTIONS.unpack_from(payload, 0)
+        offset = _SECTIONS.size
+        integers, offset = _take(payload, offset, operand_count * 8)
+        floats, offset = _take(payload, offset, operand_count * 8)
+        kinds, offset = _take(payload, offset, operand_count)
+        point_operands, offset = _take(payload, offset, point_count * 8)
+        codes, offset = _take(payload, offset, code_count * 4)
+        symbol_blob, offset = _take(payload, offset, blob_length)
+        if offset != len(payload):
+            raise ValueError("Corrupted data.")
+
+        #  Rebuild the symbol table.
+        symbols = str(symbol_blob, "utf-8", "surrogatepass").split("\0") if symbol_count != 0 else []
+        if len(symbols) != symbol_count:
+            raise ValueError("Corrupted data.")
+
+        #  Rebuild the operand table.
+        operands = []
+        operand_node = _ast.OperandNode
+        for kind, integer, real in zip(kinds, integers.cast("q"), floats.cast("d")):
+            if kind == _OPERAND_INTEGER:
+                operands.append(operand_node(integer))
+            elif kind == _OPERAND_FLOAT:
+                operands.append(operand_node(real))
+            elif kind == _OPERAND_BIG_INTEGER:
+                operands.append(operand_node(int(symbols[integer])))
+            else:
+                raise ValueError("Corrupted data.")
+
+        #  Rebuild the point table.
+        point_operands = point_operands.cast("I")
+        point_node = _ast.PointNode
+        points = [point_node(operands[point_operands[idx]], operands[point_operands[idx + 1]])
+                  for idx in range(0, point_count * 2, 2)]
+
+        #  Run the node stream.
+        targets = {}
+        directions = {}
+        stack = []
+        push = stack.append
+        codes = codes.cast("i")
+        for idx in range(0, code_count, 2):
+            op = codes[idx]
+            arg = codes[idx + 1]
+            if op == _OP_POINT:
+                push(points[arg])
+            elif op == _OP_OPERAND:
+                push(operands[arg])
+            elif op == _OP_TARGET:
+                node = targets.get(arg)
+                if node is None:
+                    node = targets[arg] = _ast.TargetNode(symbols[arg])
+                push(node)
+            elif op == _OP_DIRECTION:
+                node = directions.get(arg)
+                if node is None:
+                    node = directions[arg] = _ast.DirectionNode(symbols[arg])
+                push(node)
+            else:
+                #  Make a node from the nodes on the stack.
+                if op < _OP_MAKE or arg < 0 or arg > len(stack):
+                    raise ValueError("Corrupted data.")
+                node_class, from_list = _NODE_CLASSES[op - _OP_MAKE]
+                children = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                push(node_class(children) if from_list else node_class(*children))
+
+        #  Check the commands.
+        for cmd in stack:
+            if not isinstance(cmd, _ast.CommandNode):
+                raise ValueError("Corrupted data.")
+
+        return stack
+    except (IndexError, TypeError, struct.error, UnicodeDecodeError):
+        raise ValueError("Corrupted data.")
@@ -8,6 +8,8 @@
 #
 
 #  Import other modules.
+import array
+import re
 import xnilang.parser.error as _error
 
 #  Token types.
@@ -21,6 +23,37 @@ TOKEN_SUBTYPE_OPERAND_INTEGER = "integer"
 TOKEN_SUBTYPE_PARENTHESIS_LEFT = "left"
 TOKEN_SUBTYPE_PARENTHESIS_RIGHT = "right"
 
+#  Token kind codes (used by the compact token buffer).
+TOKEN_KIND_INTEGER = 1
+TOKEN_KIND_FLOAT = 2
+TOKEN_KIND_LEFT_PARENTHESIS = 3
+TOKEN_KIND_RIGHT_PARENTHESIS = 4
+TOKEN_KIND_SYMBOL = 5
+
+#  Token kind code -> (type, sub-type).
+_KIND_TYPES = {
+    TOKEN_KIND_INTEGER: (TOKEN_TYPE_OPERAND, TOKEN_SUBTYPE_OPERAND_INTEGER),
+    TOKEN_KIND_FLOAT: (TOKEN_TYPE_OPERAND, TOKEN_SUBTYPE_OPERAND_FLOAT),
+    TOKEN_KIND_LEFT_PARENTHESIS: (TOKEN_TYPE_PARENTHESIS, TOKEN_SUBTYPE_PARENTHESIS_LEFT),
+    TOKEN_KIND_RIGHT_PARENTHESIS: (TOKEN_TYPE_PARENTHESIS, TOKEN_SUBTYPE_PARENTHESIS_RIGHT),
+    TOKEN_KIND_SYMBOL: (TOKEN_TYPE_SYMBOL, "")
+}
+
+#  (Type, sub-type) -> token kind code.
+_TYPE_KINDS = dict((types, kind) for kind, types in _KIND_TYPES.items())
+
+#  The master pattern of the tokenizer. It skips leading separators and then matches one token. Only ASCII
+#  characters are matched here, all other characters are handed over to the per-character scanner.
+_TOKEN_PATTERN = re.compile(
+    "[\n\r\t \xa0]*"
+    "(?:"
+    "(?P<operand>(?=[0-9-])-?[0-9]*(?P<dot>\\.[0-9]*)?)|"
+    "(?P<left>\\()|"
+    "(?P<right>\\))|"
+    "(?P<symbol>[A-Za-z_][A-Za-z0-9_]*)"
+    ")?"
+)
+
 
 class Token:
     """Token class."""
@@ -209,6 +242,199 @@ class Token:
         return Token(symbol, TOKEN_TYPE_SYMBOL, "", position)
 
 
+class TokenView(Token):
+    """A thin token view over one entry of a token buffer.
+
+    The view is valid until the entry is released from the buffer.
+    """
+
+    def __init__(self, buffer, idx):
+        """Initialize the token view.
+
+        :type buffer: TokenBuffer
+        :type idx: int
+        :param buffer: The token buffer.
+        :param idx: The token index in the buffer.
+        """
+
+        #  Save the buffer and the index (the base class is not initialized, all its getters are overridden).
+        self._buffer = buffer
+        self._index = idx
+
+    def get_symbol(self):
+        """Get the token symbol.
+
+        :rtype : str
+        :return: The symbol.
+        """
+
+        return self._buffer.get_symbol(self._index)
+
+    def get_type(self):
+        """Get the type of the token.
+
+        :rtype : str
+        :return: The type.
+        """
+
+        return _KIND_TYPES[self._buffer.get_kind(self._index)][0]
+
+    def get_subtype(self):
+        """Get the sub-type of the token.
+
+        :rtype : str
+        :return: The sub-type.
+        """
+
+        return _KIND_TYPES[self._buffer.get_kind(self._index)][1]
+
+    def get_position(self):
+        """Get the token position.
+
+        :rtype : int
+        :return: The position.
+        """
+
+        return self._buffer.get_position(self._index)
+
+
+class TokenBuffer:
+    """Compact token buffer.
+
+    Tokens are stored in parallel arrays of kind codes and start/end offsets into the script, symbols are
+    sliced from the script only when they are asked for.
+    """
+
+    def __init__(self, script):
+        """Initialize the token buffer.
+
+        :type script: str
+        :param script: The source script.
+        """
+
+        self._script = script
+        self._kinds = array.array("B")
+        self._starts = array.array("I")
+        self._ends = array.array("I")
+
+    def append(self, kind, start, end):
+        """Append a token.
+
+        :type kind: int
+        :type start: int
+        :type end: int
+        :param kind: The token kind code.
+        :param start: The start offset of the token.
+        :param end: The end offset of the token.
+        """
+
+        self._kinds.append(kind)
+        self._starts.append(start)
+        self._ends.append(end)
+
+    def release(self, count):
+        """Release the first N tokens.
+
+        :type count: int
+        :param count: The token count (N).
+        """
+
+        del self._kinds[:count]
+        del self._starts[:count]
+        del self._ends[:count]
+
+    def get_count(self):
+        """Get the token count.
+
+        :rtype : int
+        :return: The count.
+        """
+
+        return len(self._kinds)
+
+    def get_kinds(self):
+        """Get the kind code column (the column should not be modified by the caller).
+
+        :rtype : array.array
+        :return: The column.
+        """
+
+        return self._kinds
+
+    def get_kind(self, idx):
+        """Get the kind code of a token.
+
+        :type idx: int
+        :param idx: The token index.
+        :rtype : int
+        :return: The kind code.
+        """
+
+        return self._kinds[idx]
+
+    def get_symbol(self, idx):
+        """Get the symbol of a token.
+
+        :type idx: int
+        :param idx: The token index.
+        :rtype : str
+        :return: The symbol.
+        """
+
+        return self._script[self._starts[idx]:self._ends[idx]]
+
+    def get_text(self, first_idx, last_idx):
+        """Get the script text from a token to another token (both inclusive).
+
+        :type first_idx: int
+        :type last_idx: int
+        :param first_idx: The index of the first token.
+        :param last_idx: The index of the last token.
+        :rtype : str
+        :return: The text.
+        """
+
+        return self._script[self._starts[first_idx]:self._ends[last_idx]]
+
+    def get_position(self, idx):
+        """Get the position of a token.
+
+        :type idx: int
+        :param idx: The token index.
+        :rtype : int
+        :return: The position.
+        """
+
+        return self._starts[idx]
+
+    def get_end(self, idx):
+        """Get the end offset of a token.
+
+        :type idx: int
+        :param idx: The token index.
+        :rtype : int
+        :return: The offset.
+        """
+
+        return self._ends[idx]
+
+    def get_token(self, idx):
+        """Get a token view.
+
+        :type idx: int
+        :param idx: The token index.
+        :rtype : TokenView
+        :return: The token view.
+        :raise IndexError: Raise this exception if the index is invalid.
+        """
+
+        #  Safe check.
+        if not 0 <= idx < self.get_count():
+            raise IndexError("Invalid token index.")
+
+        return TokenView(self, idx)
+
+
 def _is_separator(ch):
     """Get whether a character is a separator.
 
@@ -299,6 +525,72 @@ class Tokenizer:
 
         return self.get_script()[self.get_cursor()]
 
+    def _scan_token(self):
+        """Scan next token.
+
+        :rtype : (int, int, int) | None
+        :return: The kind code, the start offset and the end offset of the token (None if there is no more
+                 token).
+        :raise _error.ParserError: Raise this exception if some errors occurred.
+        """
+
+        #  Match the master pattern at the cursor.
+        script = self._script
+        matched = _TOKEN_PATTERN.match(script, self._cursor)
+        end = matched.end()
+        kind = matched.lastgroup
+
+        if kind is None:
+            #  Skip the separators.
+            self._cursor = end
+
+            #  Stop at the end of the script.
+            if end == len(script):
+                return None
+
+            #  Let the reference scanner report (or handle) the character.
+            return self._scan_token_by_character()
+
+        #  Check the character that follows an operand or a symbol.
+        if end != len(script) and kind != "left" and kind != "right":
+            follow = script[end]
+            if follow >= "\x80" or (kind == "operand" and (follow.isalpha() or follow == "." or follow == "-")):
+                #  Let the reference scanner report (or handle) the token.
+                self._cursor = matched.start(kind)
+                return self._scan_token_by_character()
+
+        #  Move the cursor.
+        start = matched.start(kind)
+        self._cursor = end
+
+        #  Get the kind code.
+        if kind == "operand":
+            if matched.start("dot") >= 0:
+                return TOKEN_KIND_FLOAT, start, end
+            else:
+                return TOKEN_KIND_INTEGER, start, end
+        elif kind == "symbol":
+            return TOKEN_KIND_SYMBOL, start, end
+        elif kind == "left":
+            return TOKEN_KIND_LEFT_PARENTHESIS, start, end
+        else:
+            return TOKEN_KIND_RIGHT_PARENTHESIS, start, end
+
+    def _scan_token_by_character(self):
+        """Scan next token with the reference scanner.
+
+        :rtype : (int, int, int) | None
+        :return: The kind code, the start offset and the end offset of the token (None if there is no more
+                 token).
+        :raise _error.ParserError: Raise this exception if some errors occurred.
+        """
+
+        token = self._get_next_token_by_character()
+        if token is None:
+            return None
+
+        return _TYPE_KINDS[(token.get_type(), token.get_subtype())], token.get_position(), self._cursor
+
     def get_next_token(self):
         """Get next token.
 
@@ -307,6 +599,48 @@ class Tokenizer:
         :raise _error.ParserError: Raise this exception if some errors occurred.
         """
 
+        #  Scan the token.
+        scanned = self._scan_token()
+        if scanned is None:
+            return None
+
+        #  Create the token.
+        kind, start, end = scanned
+        token_type, token_subtype = _KIND_TYPES[kind]
+
+        return Token(self._script[start:end], token_type, token_subtype, start)
+
+    def read_token(self, buffer):
+        """Read next token into a token buffer.
+
+        :type buffer: TokenBuffer
+        :param buffer: The token buffer.
+        :rtype : bool
+        :return: False if there is no more token.
+        :raise _error.ParserError: Raise this exception if some errors occurred.
+        """
+
+        #  Scan the token.
+        scanned = self._scan_token()
+        if scanned is None:
+            return False
+
+        #  Append the token to the buffer.
+        buffer.append(scanned[0], scanned[1], scanned[2])
+
+        return True
+
+    def _get_next_token_by_character(self):
+        """Get next token by scanning the script character by character.
+
+        This is the reference scanner. It handles the rare cases (non-ASCII characters and malformed
+        operands) that the master pattern doesn't cover.
+
+        :rtype : Token
+        :return: The token.
+        :raise _error.ParserError: Raise this exception if some errors occurred.
+        """
+
         while not self.is_end():
             #  Get the initial character of the token.
             initial_char = self.get_current_character()
@@ -444,3 +778,16 @@ class Tokenizer:
             tokens.append(current)
 
         return tokens
+
+    def get_token_buffer(self):
+        """Get all tokens in a compact token buffer.
+
+        :rtype : TokenBuffer
+        :return: The token buffer.
+        """
+
+        buffer = TokenBuffer(self._script)
+        while self.read_token(buffer):
+            pass
+
+        return buffer
@@ -8,14 +8,165 @@
 #
 
 #  Import other modules.
+import concurrent.futures as _futures
+import json as _json
+import queue as _queue
+import re as _re
+import threading as _threading
+import django.conf as _conf
 import django.http as _http
+import xnilang.compiler.budget as _cp_budget
 import xnilang.compiler.compiler as _cp_compiler
+import xnilang.compiler.compression as _cp_compression
 import xnilang.compiler.evaluator as _cp_evaluator
 import xnilang.compiler.error as _cp_error
+import xnilang.compiler.estimate as _cp_estimate
+import xnilang.compiler.parallel as _cp_parallel
+import xnilang.parser.cache as _ps_cache
 import xnilang.parser.error as _ps_error
 import xnilang.parser.interpreter as _ps_ipt
 import xnilang.parser.token as _ps_token
 
+#  The animation data output modes need NumPy (they are only available if the module is installed).
+try:
+    import xnilang.compiler.data as _cp_data
+    import xnilang.compiler.timeline as _cp_timeline
+except ImportError:
+    _cp_data = None
+    _cp_timeline = None
+
+#  The AST cache (created on first use).
+_ast_cache = None
+
+#  The process pool of the parallel compile mode (created on first use).
+_compile_executor = None
+
+#  The output modes of the animation ("mode" section of the request): frame closures (also minified), the
+#  symbolic program, and the animation data (base64 or JSON arrays) played by preview.js.
+_MODE_SCRIPT = "script"
+_MODE_MIN = "min"
+_MODE_SYMBOLIC = "symbolic"
+_MODE_DATA = "data"
+_MODE_DATA_JSON = "data-json"
+_MODES = [_MODE_SCRIPT, _MODE_MIN, _MODE_SYMBOLIC]
+if _cp_data is not None:
+    _MODES += [_MODE_DATA, _MODE_DATA_JSON]
+
+#  The mode directive ("(mode <name>)" before the first command of the script, see _split_mode_directive()).
+_MODE_DIRECTIVE = _re.compile(r"\A\s*\(\s*mode\s+([a-z\-]+)\s*\)")
+
+#  The page of the evaluated animation (before and after the animation script).
+_PAGE_HEAD = "<html>\n" \
+             "<head>\n" \
+             "<link href=\"/app/styles/preview.css\" type=\"text/css\" rel=\"stylesheet\">" \
+             "<script type=\"text/javascript\" src=\"/app/libraries/jquery/jquery-2.1.4.min.js\"></script>\n" \
+             "<script type=\"text/javascript\">\n" \
+             "function StartAnimation() {\n" \
+             "var main = $(\"#main\")[0];"
+_PAGE_TAIL = "\n" \
+             "}\n" \
+             "</script>\n" \
+             "<script type=\"text/javascript\" src=\"/app/scripts/preview.js\"></script>\n" \
+             "</head>\n" \
+             "<body>\n" \
+             "<canvas id=\"main\" width=\"100px\" height=\"100px\"></canvas>" \
+             "</body>\n" \
+             "</html>\n"
+
+#  The streamed page of the evaluated animation (see _iterate_streamed_page()).
+_STREAM_PAGE_HEAD = "<html>\n" \
+                    "<head>\n" \
+                    "<link href=\"/app/styles/preview.css\" type=\"text/css\" rel=\"stylesheet\">" \
+                    "<script type=\"text/javascript\" src=\"/app/libraries/jquery/jquery-2.1.4.min.js\"></script>\n" \
+                    "<script type=\"text/javascript\" src=\"/app/scripts/preview.js\"></script>\n" \
+                    "</head>\n" \
+                    "<body>\n" \
+                    "<canvas id=\"main\" width=\"100px\" height=\"100px\"></canvas>\n"
+_STREAM_PAGE_TAIL = "</body>\n" \
+                    "</html>\n"
+_STREAM_SCRIPT_HEAD = "<script type=\"text/javascript\">\n"
+_STREAM_SCRIPT_TAIL = "\n</script>\n"
+
+#  The size of the frame scripts sent at once by the streamed page.
+_STREAM_CHUNK_SIZE = 1 << 14
+
+#  The count of frame chunks that the compiling thread of a streamed page may be ahead of the client.
+_STREAM_QUEUE_SIZE = 4
+
+#  The interval (in seconds) at which a waiting compiling thread checks whether the streamed page was closed.
+_STREAM_POLL_INTERVAL = 0.1
+
+
+class _StreamCancelled(Exception):
+    """Exception raised in the compiling thread of a streamed page if the page was closed (the client is gone)."""
+
+    pass
+
+
+class _StreamChannel:
+    """Channel between the compiling thread of a streamed page and the page iterator.
+
+    The frame chunks are put to a bounded queue, so the compiling thread waits while the client is slow and the
+    page is never kept in memory. The last item marks the end of the frames (with the error, if any).
+    """
+
+    def __init__(self):
+        """Initialize the channel."""
+
+        self._queue = _queue.Queue(_STREAM_QUEUE_SIZE)
+        self._closed = _threading.Event()
+
+    def _put(self, item):
+        """Put an item to the queue (wait while the queue is full).
+
+        :type item: (str | None, Exception | None)
+        :param item: The item (a frame chunk, or None and the error at the end).
+        :raise _StreamCancelled: Raise this exception if the channel was closed.
+        """
+
+        while True:
+            if self._closed.is_set():
+                raise _StreamCancelled()
+            try:
+                self._queue.put(item, timeout=_STREAM_POLL_INTERVAL)
+                return
+            except _queue.Full:
+                pass
+
+    def write(self, chunk):
+        """Write a frame chunk (the channel is the sink of a script buffer).
+
+        :type chunk: str
+        :param chunk: The chunk.
+        :raise _StreamCancelled: Raise this exception if the channel was closed.
+        """
+
+        self._put((chunk, None))
+
+    def finish(self, error=None):
+        """Mark the end of the frames.
+
+        :type error: Exception | None
+        :param error: The error that stopped the compilation (None if the compilation succeeded).
+        :raise _StreamCancelled: Raise this exception if the channel was closed.
+        """
+
+        self._put((None, error))
+
+    def read(self):
+        """Read the next item (wait until it's put).
+
+        :rtype : (str | None, Exception | None)
+        :return: The frame chunk (None at the end) and the error (None if the compilation succeeded).
+        """
+
+        return self._queue.get()
+
+    def close(self):
+        """Close the channel (the compiling thread stops at its next write)."""
+
+        self._closed.set()
+
 
 def index_page(request):
     """View of index page.
@@ -28,6 +179,486 @@ def index_page(request):
     return _http.HttpResponseRedirect("/app/index.html")
 
 
+def _get_ast_cache():
+    """Get the AST cache.
+
+    :rtype : _ps_cache.ASTCache | None
+    :return: The cache (None if the cache is disabled).
+    """
+
+    global _ast_cache
+
+    directory = getattr(_conf.settings, "AST_CACHE_DIR", None)
+    if directory is None:
+        return None
+    max_entries = getattr(_conf.settings, "AST_CACHE_MAX_ENTRIES", None)
+    if _ast_cache is None or _ast_cache.get_directory() != directory or _ast_cache.get_max_entries() != max_entries:
+        _ast_cache = _ps_cache.ASTCache(directory, max_entries)
+
+    return _ast_cache
+
+
+def _get_compile_executor():
+    """Get the process pool of the parallel compile mode.
+
+    :rtype : _futures.ProcessPoolExecutor | None
+    :return: The pool (None if the parallel compile mode is disabled).
+    """
+
+    global _compile_executor
+
+    workers = getattr(_conf.settings, "COMPILE_WORKERS", None)
+    if workers is None or workers <= 1:
+        return None
+    if _compile_executor is None:
+        _compile_executor = _futures.ProcessPoolExecutor(max_workers=workers)
+
+    return _compile_executor
+
+
+def _get_compile_budget():
+    """Get a new compile budget (with the limits in the settings).
+
+    :rtype : _cp_budget.CompileBudget
+    :return: The budget.
+    """
+
+    return _cp_budget.CompileBudget(getattr(_conf.settings, "COMPILE_MAX_FRAMES", None),
+                                    getattr(_conf.settings, "COMPILE_MAX_OUTPUT_BYTES", None),
+                                    getattr(_conf.settings, "COMPILE_MAX_OBJECTS", None),
+                                    getattr(_conf.settings, "COMPILE_TIME_LIMIT", None))
+
+
+def _split_mode_directive(script):
+    """Split the mode directive from a script.
+
+    A script can select its output mode with a "(mode <name>)" directive before its first command (used when the
+    "mode" section of the request is not given, e.g. by the regression cases). The directive is replaced with
+    spaces (the line breaks are kept), so the positions in the script and in the error messages don't change.
+
+    :type script: str
+    :param script: The script.
+    :rtype : (str | None, str)
+    :return: The mode in the directive (None if there is no directive) and the script without the directive.
+    """
+
+    match = _MODE_DIRECTIVE.match(script)
+    if match is None:
+        return None, script
+
+    return match.group(1), _re.sub(r"[^\n]", " ", match.group(0)) + script[match.end():]
+
+
+def _iterate_command(script):
+    """Iterate the top-level commands of a script (from the AST cache if the script is cached).
+
+    Scripts that are parsed entirely are stored to the cache. Scripts larger than AST_CACHE_MAX_SCRIPT_SIZE
+    are not cached, so their commands are not kept after being yielded.
+
+    :type script: str
+    :param script: The script.
+    :rtype : collections.Iterable[xnilang.parser.ast.CommandNode]
+    :return: The command iterator.
+    :raise _ps_error.ParserError: Raise this exception if the script can't be parsed.
+    """
+
+    #  Load the commands from the cache.
+    cache = _get_ast_cache()
+    max_size = getattr(_conf.settings, "AST_CACHE_MAX_SCRIPT_SIZE", None)
+    if max_size is not None and len(script) > max_size:
+        cache = None
+    if cache is not None:
+        commands = cache.load(script)
+        if commands is not None:
+            for cmd in commands:
+                yield cmd
+            return
+
+    #  Parse the script.
+    commands = []
+    for cmd in _ps_ipt.Interpreter(_ps_token.Tokenizer(script)).iterate_command():
+        if cache is not None:
+            commands.append(cmd)
+        yield cmd
+
+    #  Store the commands to the cache.
+    if cache is not None:
+        cache.store(script, commands)
+
+
+def _iterate_estimated_command(commands, budget):
+    """Iterate commands and check the estimated cost of each command against the compile budget before it is
+    compiled, so scripts that are too expensive are rejected without compiling them.
+
+    :type commands: collections.Iterable[xnilang.parser.ast.CommandNode]
+    :type budget: _cp_budget.CompileBudget
+    :param commands: The commands.
+    :param budget: The compile budget.
+    :rtype : collections.Iterable[xnilang.parser.ast.CommandNode]
+    :return: The command iterator.
+    :raise _cp_error.BudgetExceededError: Raise this exception if the compile budget would be exceeded.
+    """
+
+    estimator = _cp_estimate.CostEstimator("main")
+    for cmd in commands:
+        estimator.add_command(cmd)
+        budget.check_frame_estimate(estimator.get_frame_count())
+        yield cmd
+
+
+def _create_compiler(evaluator, budget):
+    """Create the compiler of an evaluation (a parallel compiler if COMPILE_WORKERS is set).
+
+    :type evaluator: _cp_evaluator.AnimationEvaluator
+    :type budget: _cp_budget.CompileBudget
+    :param evaluator: The animation evaluator.
+    :param budget: The compile budget.
+    :rtype : _cp_compiler.Compiler
+    :return: The compiler.
+    """
+
+    executor = _get_compile_executor()
+    if executor is None:
+        return _cp_compiler.Compiler(evaluator, "main", budget)
+
+    return _cp_parallel.ParallelCompiler(evaluator, "main", executor, budget=budget)
+
+
+def _create_animation_evaluator(mode, budget):
+    """Create the animation evaluator of an output mode that emits frame closures.
+
+    :type mode: str
+    :type budget: _cp_budget.CompileBudget
+    :param mode: The output mode (_MODE_SCRIPT or _MODE_MIN).
+    :param budget: The compile budget.
+    :rtype : _cp_evaluator.AnimationEvaluator
+    :return: The evaluator.
+    """
+
+    if mode == _MODE_MIN:
+        return _cp_evaluator.MinAnimationEvaluator(20, True, "main",
+                                                   getattr(_conf.settings, "EVALUATE_MIN_DECIMALS", 2),
+                                                   budget)
+
+    return _cp_evaluator.AnimationEvaluator(20, True, budget)
+
+
+def _write_script(script, buffer, budget=None, mode=_MODE_SCRIPT):
+    """Parse, compile and emit a script to a buffer as a pipeline.
+
+    Tokens are pulled lazily, each top-level command is compiled as soon as it is interpreted, and its
+    frames are written right away (emitted by the worker processes if COMPILE_WORKERS is set).
+
+    :type script: str
+    :type buffer: _cp_evaluator.ScriptBuffer
+    :type budget: _cp_budget.CompileBudget | None
+    :type mode: str
+    :param script: The script.
+    :param buffer: The buffer.
+    :param budget: The compile budget (None if the limits in the settings are used).
+    :param mode: The output mode (_MODE_SCRIPT or _MODE_MIN).
+    :raise _ps_error.ParserError: Raise this exception if the script can't be parsed.
+    :raise _cp_error.CompilationError: Raise this exception if the script can't be compiled.
+    :raise _cp_error.BudgetExceededError: Raise this exception if the compile budget is exceeded.
+    """
+
+    if budget is None:
+        budget = _get_compile_budget()
+    evaluator = _create_animation_evaluator(mode, budget)
+    compiler = _create_compiler(evaluator, budget)
+
+    #  Emit the head, all frames and the tail.
+    buffer.write(evaluator.get_script_head())
+    for frame in compiler.iterate_frame(_iterate_estimated_command(_iterate_command(script), budget)):
+        evaluator.write_frame_script(frame, buffer)
+    buffer.write(evaluator.get_script_tail())
+
+
+def _write_symbolic_script(script, buffer, budget):
+    """Parse, compile and emit a script as a symbolic program (see SymbolicAnimationEvaluator) to a buffer.
+
+    :type script: str
+    :type buffer: _cp_evaluator.ScriptBuffer
+    :type budget: _cp_budget.CompileBudget
+    :param script: The script.
+    :param buffer: The buffer.
+    :param budget: The compile budget.
+    :raise _ps_error.ParserError: Raise this exception if the script can't be parsed.
+    :raise _cp_error.CompilationError: Raise this exception if the script can't be compiled.
+    :raise _cp_error.BudgetExceededError: Raise this exception if the compile budget is exceeded.
+    """
+
+    evaluator = _cp_evaluator.SymbolicAnimationEvaluator(20, True, budget)
+    compiler = _cp_compiler.SymbolicCompiler(evaluator, "main", budget)
+    for cmd in _iterate_estimated_command(_iterate_command(script), budget):
+        compiler.compile_command(cmd)
+    buffer.write(evaluator.get_script("main"))
+
+
+def _write_data_script(script, buffer, budget, encoding):
+    """Parse, compile and emit a script as animation data (see xnilang.compiler.data.AnimationData) and the
+    call of its player to a buffer.
+
+    :type script: str
+    :type buffer: _cp_evaluator.ScriptBuffer
+    :type budget: _cp_budget.CompileBudget
+    :type encoding: str
+    :param script: The script.
+    :param buffer: The buffer.
+    :param budget: The compile budget.
+    :param encoding: The encoding of the arrays.
+    :raise _ps_error.ParserError: Raise this exception if the script can't be parsed.
+    :raise _cp_error.CompilationError: Raise this exception if the script can't be compiled.
+    :raise _cp_error.BudgetExceededError: Raise this exception if the compile budget is exceeded.
+    """
+
+    compiler = _cp_timeline.TimelineCompiler(budget)
+    for cmd in _iterate_estimated_command(_iterate_command(script), budget):
+        compiler.compile_command(cmd)
+    data = _cp_data.emit_data(compiler.get_timeline(), 20, True).get_script(encoding)
+
+    #  Count the emitted bytes (the script is ASCII).
+    budget.add_output_bytes(len(data))
+    buffer.write("PlayAnimation(main, ")
+    buffer.write(data)
+    buffer.write(");")
+
+
+def _write_animation(script, buffer, mode, budget=None):
+    """Parse, compile and emit a script in an output mode to a buffer.
+
+    :type script: str
+    :type buffer: _cp_evaluator.ScriptBuffer
+    :type mode: str
+    :type budget: _cp_budget.CompileBudget | None
+    :param script: The script.
+    :param buffer: The buffer.
+    :param mode: The output mode (one of _MODES).
+    :param budget: The compile budget (None if the limits in the settings are used).
+    :raise _ps_error.ParserError: Raise this exception if the script can't be parsed.
+    :raise _cp_error.CompilationError: Raise this exception if the script can't be compiled.
+    :raise _cp_error.BudgetExceededError: Raise this exception if the compile budget is exceeded.
+    :raise ValueError: Raise this exception if the output mode is invalid.
+    """
+
+    if budget is None:
+        budget = _get_compile_budget()
+
+    if mode == _MODE_SCRIPT or mode == _MODE_MIN:
+        _write_script(script, buffer, budget, mode)
+    elif mode == _MODE_SYMBOLIC:
+        _write_symbolic_script(script, buffer, budget)
+    elif mode == _MODE_DATA:
+        _write_data_script(script, buffer, budget, _cp_data.ENCODING_BASE64)
+    elif mode == _MODE_DATA_JSON:
+        _write_data_script(script, buffer, budget, _cp_data.ENCODING_JSON)
+    else:
+        raise ValueError("Invalid output mode.")
+
+
+def _compile_streamed_frames(script, evaluator, compiler, budget, channel):
+    """Compile a script and write the frame scripts to the channel of a streamed page (run by the compiling
+    thread of the page).
+
+    The frames are handed over by the compiler as soon as they are produced (even in the middle of a long loop)
+    and written to the channel in chunks of about _STREAM_CHUNK_SIZE characters. A chunk is only ended after a
+    whole frame script, so that each chunk (sent in its own <script> element) is a list of complete statements.
+
+    :type script: str
+    :type evaluator: _cp_evaluator.AnimationEvaluator
+    :type compiler: _cp_compiler.Compiler
+    :type budget: _cp_budget.CompileBudget
+    :type channel: _StreamChannel
+    :param script: The script.
+    :param evaluator: The animation evaluator.
+    :param compiler: The compiler.
+    :param budget: The compile budget.
+    :param channel: The channel.
+    """
+
+    buffer = _cp_evaluator.ScriptBuffer()
+
+    def write_frame(frame):
+        nonlocal buffer
+
+        #  Write the whole frame script before the chunk is checked.
+        evaluator.write_frame_script(frame, buffer)
+        if buffer.get_size() >= _STREAM_CHUNK_SIZE:
+            channel.write(buffer.get_script())
+            buffer = _cp_evaluator.ScriptBuffer()
+
+    error = None
+    try:
+        compiler.set_frame_sink(write_frame)
+        for cmd in _iterate_estimated_command(_iterate_command(script), budget):
+            compiler.compile_command(cmd)
+        compiler.flush()
+        if buffer.get_size() != 0:
+            channel.write(buffer.get_script())
+    except _StreamCancelled:
+        return
+    except Exception as err:
+        error = err
+
+    try:
+        channel.finish(error)
+    except _StreamCancelled:
+        pass
+
+
+def _iterate_streamed_page(script, mode=_MODE_SCRIPT, budget=None):
+    """Parse, compile and emit a script as a streamed page.
+
+    The page head (with the canvas) is yielded before the script is compiled. Then the script is compiled by a
+    thread, and the frames are sent in <script> elements of about _STREAM_CHUNK_SIZE characters as soon as they
+    are produced (the thread waits while the client is behind, so the page is not kept in memory). The last
+    element defines StartAnimation() (which preview.js calls when the whole page is loaded). If an error occurs,
+    the last element calls ShowError() instead, so the preview page shows the error message.
+
+    Only the output modes that emit frame closures (_MODE_SCRIPT and _MODE_MIN) are streamed frame by frame. The
+    other output modes emit the whole animation at the end, in the last element.
+
+    :type script: str
+    :type mode: str
+    :type budget: _cp_budget.CompileBudget | None
+    :param script: The script.
+    :param mode: The output mode (one of _MODES).
+    :param budget: The compile budget (None if the limits in the settings are used).
+    :rtype : collections.Iterable[str]
+    :return: The page iterator.
+    """
+
+    #  Send the page head and the animation variables at once.
+    if budget is None:
+        budget = _get_compile_budget()
+    evaluator = _create_animation_evaluator(mode, budget)
+    yield _STREAM_PAGE_HEAD + _STREAM_SCRIPT_HEAD + \
+        "var main = document.getElementById(\"main\");\n" + evaluator.get_script_head() + "}" + _STREAM_SCRIPT_TAIL
+
+    try:
+        #  Emit the whole animation in other output modes.
+        if mode != _MODE_SCRIPT and mode != _MODE_MIN:
+            animation = _cp_evaluator.ScriptBuffer()
+            _write_animation(script, animation, mode, budget)
+            yield _STREAM_SCRIPT_HEAD + "function StartAnimation() {\n" + animation.get_script() + "\n}" + \
+                _STREAM_SCRIPT_TAIL + _STREAM_PAGE_TAIL
+            return
+
+        #  Compile the frames in a thread and send them as soon as they are written (the thread stops if the
+        #  page is closed).
+        channel = _StreamChannel()
+        compiler = _create_compiler(evaluator, budget)
+        _threading.Thread(target=_compile_streamed_frames,
+                          args=(script, evaluator, compiler, budget, channel),
+                          daemon=True).start()
+        try:
+            while True:
+                chunk, error = channel.read()
+                if chunk is None:
+                    break
+                yield _STREAM_SCRIPT_HEAD + chunk + _STREAM_SCRIPT_TAIL
+        finally:
+            channel.close()
+        if error is not None:
+            raise error
+    except Exception as err:
+        #  Drop the frames that haven't been sent and let the page show the error ("</" is escaped so that the
+        #  message can't end the <script> element).
+        message = _json.dumps(str(err)).replace("</", "<\\/")
+        yield _STREAM_SCRIPT_HEAD + "ShowError(" + message + ");" + _STREAM_SCRIPT_TAIL + _STREAM_PAGE_TAIL
+        return
+
+    #  Send the time-line controller.
+    yield _STREAM_SCRIPT_HEAD + "function StartAnimation() {\n{" + evaluator.get_script_tail() + "\n}" + \
+        _STREAM_SCRIPT_TAIL + _STREAM_PAGE_TAIL
+
+
+def _iterate_compressed_page(pages, compressor):
+    """Compress a streamed page piece by piece (each piece is flushed, so the browser gets it right away).
+
+    :type pages: collections.Iterable[str]
+    :type compressor: _cp_compression.Compressor
+    :param pages: The page iterator.
+    :param compressor: The compressor.
+    :rtype : collections.Iterable[bytes]
+    :return: The compressed page iterator.
+    """
+
+    for page in pages:
+        compressor.write(page)
+        compressor.flush()
+        yield compressor.take_data()
+    compressor.finish()
+    yield compressor.take_data()
+
+
+def _get_content_encoding(request):
+    """Get the content encoding of the reply (the preferred encoding that is accepted by the client).
+
+    :type request: _http.HttpRequest
+    :param request: The request.
+    :rtype : str | None
+    :return: The encoding (None if the reply is not compressed).
+    """
+
+    if not getattr(_conf.settings, "EVALUATE_COMPRESSION", True):
+        return None
+
+    #  Get the quality of each accepted encoding.
+    qualities = {}
+    for item in request.META.get("HTTP_ACCEPT_ENCODING", "").split(","):
+        fields = item.split(";")
+        quality = 1.0
+        for field in fields[1:]:
+            name, _, value = field.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[fields[0].strip().lower()] = quality
+
+    for encoding in _cp_compression.get_encodings():
+        if qualities.get(encoding, qualities.get("*", 0.0)) > 0:
+            return encoding
+
+    return None
+
+
+def _set_encoding_headers(response, encoding):
+    """Set the encoding headers of an evaluated page.
+
+    :type response: _http.HttpResponseBase
+    :type encoding: str | None
+    :param response: The response.
+    :param encoding: The content encoding (None if the page is not compressed).
+    :rtype : _http.HttpResponseBase
+    :return: The response.
+    """
+
+    response["Vary"] = "Accept-Encoding"
+    if encoding is not None:
+        response["Content-Encoding"] = encoding
+
+    return response
+
+
+def _is_streaming(request):
+    """Get whether the page of an evaluation is streamed (the "stream" section of the request overrides the
+    EVALUATE_STREAMING setting).
+
+    :type request: _http.HttpRequest
+    :param request: The request.
+    :rtype : bool
+    :return: True if the page is streamed.
+    """
+
+    if "stream" in request.POST:
+        return request.POST["stream"] not in ["", "0", "false"]
+
+    return getattr(_conf.settings, "EVALUATE_STREAMING", False)
+
+
 def code_evaluate(request):
     """View of evaluating code.
 
@@ -44,36 +675,49 @@ def code_evaluate(request):
     if "script" not in request.POST:
         return _http.HttpResponseBadRequest("No \"script\" section.", content_type="text/plain")
 
-    #  Parse and interpret.
+    #  Check "mode" section (or the mode directive of the script).
+    directive_mode, script = _split_mode_directive(request.POST["script"])
+    if "mode" in request.POST:
+        mode = request.POST["mode"]
+    elif directive_mode is not None:
+        mode = directive_mode
+    else:
+        mode = _MODE_SCRIPT
+    if mode not in _MODES:
+        return _http.HttpResponseBadRequest("Invalid \"mode\" section.", content_type="text/plain")
+
+    #  Compress the page while it's emitted.
+    encoding = _get_content_encoding(request)
+    compressor = None
+    if encoding is not None:
+        compressor = _cp_compression.Compressor(encoding)
+
+    #  Stream the page (errors are shown by the page).
+    if _is_streaming(request):
+        pages = _iterate_streamed_page(script, mode)
+        if compressor is not None:
+            pages = _iterate_compressed_page(pages, compressor)
+        return _set_encoding_headers(_http.StreamingHttpResponse(pages, content_type="text/html"), encoding)
+
+    #  Parse, interpret and generate the reply (the animation is written between the page head and tail).
+    buffer = _cp_evaluator.ScriptBuffer(compressor)
+    buffer.write(_PAGE_HEAD)
     try:
-        interpreter = _ps_ipt.Interpreter(_ps_token.Tokenizer(request.POST["script"]))
-        evaluator = _cp_evaluator.AnimationEvaluator(20, True)
-        compiler = _cp_compiler.Compiler(evaluator, "main")
-        while not interpreter.is_end():
-            compiler.compile_command(interpreter.interpret_command())
+        _write_animation(script, buffer, mode)
     except _ps_error.ParserError as err:
         return _http.HttpResponse(str(err), content_type="text/plain")
+    except _cp_error.BudgetExceededError as err:
+        #  The script is valid, but it's too expensive to be evaluated.
+        return _http.HttpResponse(str(err), content_type="text/plain", status=422)
     except _cp_error.CompilationError as err:
         return _http.HttpResponse(str(err), content_type="text/plain")
     except Exception as err:
         return _http.HttpResponse(str(err), content_type="text/plain")
+    buffer.write(_PAGE_TAIL)
+    if compressor is None:
+        return _set_encoding_headers(_http.HttpResponse(buffer.get_script(), content_type="text/html"), None)
+
+    buffer.flush()
+    compressor.finish()
 
-    #  Generate the reply.
-    reply = "<html>\n"
-    reply += "<head>\n"
-    reply += "<link href=\"/app/styles/preview.css\" type=\"text/css\" rel=\"stylesheet\">"
-    reply += "<script type=\"text/javascript\" src=\"/app/libraries/jquery/jquery-2.1.4.min.js\"></script>\n"
-    reply += "<script type=\"text/javascript\">\n"
-    reply += "function StartAnimation() {\n"
-    reply += "var main = $(\"#main\")[0];"
-    reply += evaluator.get_script() + "\n"
-    reply += "}\n"
-    reply += "</script>\n"
-    reply += "<script type=\"text/javascript\" src=\"/app/scripts/preview.js\"></script>\n"
-    reply += "</head>\n"
-    reply += "<body>\n"
-    reply += "<canvas id=\"main\" width=\"100px\" height=\"100px\"></canvas>"
-    reply += "</body>\n"
-    reply += "</html>\n"
-
-    return _http.HttpResponse(reply, content_type="text/html")
+    return _set_encoding_headers(_http.HttpResponse(compressor.take_data(), content_type="text/html"), encoding)
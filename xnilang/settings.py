@@ -59,3 +59,31 @@ STATIC_URL = WEBAPP_BASE + "/"
 STATICFILES_DIRS = (
     WEBAPP_DIR,
 )
+
+#  AST cache (set to a directory, e.g. os.path.join(SERVER_DIR, "internal", "ast-cache"), to enable the cache).
+AST_CACHE_DIR = None
+
+#  Maximum count of AST cache entries (the least recently used entries are removed, set to None for no limit).
+AST_CACHE_MAX_ENTRIES = 1024
+
+#  Maximum size of cached scripts (larger scripts are streamed through the parser without being cached).
+AST_CACHE_MAX_SCRIPT_SIZE = 256 * 1024
+
+#  Compile budgets of each evaluation (set a budget to None to disable it).
+COMPILE_MAX_FRAMES = 200000
+COMPILE_MAX_OUTPUT_BYTES = 32 * 1024 * 1024
+COMPILE_MAX_OBJECTS = 10000
+COMPILE_TIME_LIMIT = 10
+
+#  Worker processes that emit frames in parallel (set to None to compile in the server process only).
+COMPILE_WORKERS = None
+
+#  Count of decimals of coordinates in the minified output mode.
+EVALUATE_MIN_DECIMALS = 2
+
+#  Stream the page of each evaluation (a "stream" section of the request overrides this). Errors of streamed pages
+#  are shown by the page (with status 200), so clients opt in.
+EVALUATE_STREAMING = False
+
+#  Compress the page of each evaluation (gzip, or brotli if the module is installed) if the client accepts it.
+EVALUATE_COMPRESSION = True
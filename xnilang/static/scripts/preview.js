@@ -6,6 +6,102 @@
 //  holder listed above.
 //
 
+//
+//  Error part (a streamed page calls ShowError() if the compilation fails after the page head was sent).
+//
+var $error = null;
+
+function ShowError(message) {
+    $error = message;
+}
+
+//
+//  Data player part (plays the animation data emitted by xnilang.compiler.data).
+//
+function DecodeArray(value, type) {
+    //  A base64 string contains the bytes of the array, otherwise the array is a list of numbers.
+    if (typeof value !== "string") {
+        return new type(value);
+    }
+    var text = atob(value);
+    var bytes = new Uint8Array(text.length);
+    for (var i = 0; i < text.length; i++) {
+        bytes[i] = text.charCodeAt(i);
+    }
+    return new type(bytes.buffer);
+}
+
+function PlayAnimation(canvas, data) {
+    var ops = DecodeArray(data.ops, Uint8Array);
+    var coords = DecodeArray(data.coords, Float32Array);
+    var template_ops = DecodeArray(data.template_ops, Uint32Array);
+    var template_coords = DecodeArray(data.template_coords, Uint32Array);
+    var state_offsets = DecodeArray(data.state_offsets, Uint32Array);
+    var row_templates = DecodeArray(data.row_templates, Uint32Array);
+    var row_positions = DecodeArray(data.row_positions, Float32Array);
+    var frames = DecodeArray(data.frames, Uint32Array);
+
+    function DrawTemplate(ctx, template, x, y) {
+        var c = template_coords[template];
+        for (var i = template_ops[template]; i < template_ops[template + 1]; i++) {
+            switch (ops[i]) {
+            case 0:
+                ctx.beginPath();
+                ctx.moveTo(x + coords[c], y + coords[c + 1]);
+                c += 2;
+                break;
+            case 1:
+                ctx.lineTo(x + coords[c], y + coords[c + 1]);
+                c += 2;
+                break;
+            case 2:
+                ctx.beginPath();
+                ctx.arc(x + coords[c], y + coords[c + 1], coords[c + 2], 0, 2 * Math.PI, false);
+                c += 3;
+                break;
+            case 3:
+                ctx.closePath();
+                ctx.stroke();
+                break;
+            case 4:
+                ctx.closePath();
+                ctx.fill();
+                ctx.stroke();
+                break;
+            }
+        }
+    }
+
+    function DrawFrame(frame) {
+        var ctx = canvas.getContext("2d");
+        ctx.fillStyle = "rgb(255, 255, 255)";
+        ctx.strokeStyle = "rgb(0, 0, 0)";
+        ctx.lineWidth = 2;
+        ctx.clearRect(0, 0, canvas.width, canvas.height);
+        var state = frames[frame];
+        for (var row = state_offsets[state]; row < state_offsets[state + 1]; row++) {
+            DrawTemplate(ctx, row_templates[row], row_positions[2 * row], row_positions[2 * row + 1]);
+        }
+    }
+
+    var current = 0;
+    var animator = setInterval(function() {
+        if (current == frames.length) {
+            clearInterval(animator);
+            return;
+        }
+        DrawFrame(current);
+        current++;
+        if (current == frames.length) {
+            if (data.loop) {
+                current = 0;
+            } else {
+                clearInterval(animator);
+            }
+        }
+    }, data.interval);
+}
+
 $(document).ready(function() {
     //
     //  Resize part.
@@ -25,5 +121,9 @@ $(document).ready(function() {
     //
     //  Animation part.
     //
+    if ($error !== null) {
+        $("body").empty().append($("<pre id=\"error\"></pre>").text($error));
+        return;
+    }
     StartAnimation();
 });
\ No newline at end of file